@@ -0,0 +1,3 @@
+"""
+Shared helpers for the Sales Success Playbook notebooks and dashboard.
+"""
@@ -0,0 +1,164 @@
+"""
+Related-entity lookups for the dashboard detail panels.
+
+Everything that depends on the size of the data (row positions, revenue
+rollups per company and per parent group) is computed once when the index
+is built, so a click only slices a CSR adjacency run and takes the matching
+rows from the already-loaded frames.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+from sales_playbook.graph_index import RelationshipGraph
+from sales_playbook.ids import id_index
+
+
+def _row_index(df: Optional[pd.DataFrame], id_column: str) -> pd.Series:
+    """
+    Hash index from entity ID to row position (first occurrence wins).
+
+    Args:
+        df (pd.DataFrame, optional): Entity frame
+        id_column (str): ID column in the frame
+
+    Returns:
+        pd.Series: Row positions indexed by unique int64 IDs
+    """
+    if df is None or id_column not in df.columns:
+        return pd.Series(dtype='int64', index=pd.Index([], dtype='int64'))
+    return id_index(df[id_column])
+
+
+class RelatedEntityIndex:
+    """
+    Precomputed join index between deals, tickets and companies built on top
+    of a RelationshipGraph.
+    """
+
+    def __init__(self,
+                 graph: RelationshipGraph,
+                 deals: pd.DataFrame,
+                 tickets: Optional[pd.DataFrame] = None,
+                 companies: Optional[pd.DataFrame] = None):
+        """
+        Initialize the index and precompute revenue rollups.
+
+        Args:
+            graph (RelationshipGraph): Relationship index
+            deals (pd.DataFrame): Deals with 'Record ID', 'Amount' and 'Is Closed Won'
+            tickets (pd.DataFrame, optional): Tickets with 'Ticket ID'
+            companies (pd.DataFrame, optional): Companies with 'Record ID'
+        """
+        self.graph = graph
+        self.deals = deals
+        self.tickets = tickets
+        self.companies = companies
+
+        self._deal_rows = _row_index(deals, 'Record ID')
+        self._ticket_rows = _row_index(tickets, 'Ticket ID')
+        self._company_rows = _row_index(companies, 'Record ID')
+
+        # Per-deal revenue keyed by deal ID
+        deal_positions = self._deal_rows.to_numpy()
+        amount = deals['Amount'].fillna(0).to_numpy(dtype='float64')[deal_positions]
+        won = (deals['Is Closed Won'].fillna(0).to_numpy(dtype='float64')[deal_positions]
+               if 'Is Closed Won' in deals.columns else np.zeros(len(deal_positions)))
+        amounts = pd.Series(amount, index=self._deal_rows.index)
+        won_amounts = pd.Series(amount * won, index=self._deal_rows.index)
+
+        # Revenue rolled up to every company and to every parent company group
+        company_keys = graph.node_keys.get('company', np.empty(0, dtype=np.int64))
+        self.company_revenue = self._rollup(company_keys, ['company_deals'], amounts)
+        self.company_won_revenue = self._rollup(company_keys, ['company_deals'], won_amounts)
+
+        parent_keys = graph.node_keys.get('company_name', np.empty(0, dtype=str))
+        if 'company_parent_name' in graph.relations:
+            self.parent_revenue = self._rollup(parent_keys, ['~company_parent_name', 'company_deals'], amounts)
+            self.parent_size = pd.Series(np.diff(graph.arrays['company_parent_name.rev.indptr']), index=parent_keys)
+        else:
+            self.parent_revenue = pd.Series(dtype='float64')
+            self.parent_size = pd.Series(dtype='int64')
+
+    def _rollup(self, keys: np.ndarray, path, values: pd.Series) -> pd.Series:
+        """Roll values up the graph, tolerating relationships missing from the index."""
+        if not all(step.lstrip('~') in self.graph.relations for step in path):
+            return pd.Series(0.0, index=keys)
+        return self.graph.rollup(keys, path, values)
+
+    @staticmethod
+    def _take(df: Optional[pd.DataFrame], rows: pd.Series, ids: np.ndarray) -> pd.DataFrame:
+        """Rows of df for the given IDs, skipping IDs that are not loaded."""
+        if df is None:
+            return pd.DataFrame()
+        hits = rows.index.get_indexer(ids)
+        return df.iloc[rows.to_numpy()[hits[hits >= 0]]]
+
+    def company_detail(self, company_id) -> Dict:
+        """
+        Linked records and revenue for one company.
+
+        Args:
+            company_id: Company Record ID
+
+        Returns:
+            Dict: deals, tickets (DataFrames), parent_names, siblings, children
+                (ID arrays), revenue, won_revenue and group_revenue totals
+        """
+        graph = self.graph
+        company_id = int(company_id)
+        parent_names = graph.parent_names(company_id)
+
+        siblings = np.empty(0, dtype=np.int64)
+        group_revenue = 0.0
+        if len(parent_names):
+            parent = parent_names[0]
+            siblings = graph.children_of_name(parent)
+            siblings = siblings[siblings != company_id]
+            group_revenue = float(self.parent_revenue.get(parent, 0.0))
+
+        return {
+            'deals': self._take(self.deals, self._deal_rows, graph.deals_for_company(company_id)),
+            'tickets': self._take(self.tickets, self._ticket_rows, graph.tickets_for_company(company_id)),
+            'parent_names': parent_names,
+            'siblings': siblings,
+            'children': graph.children(company_id),
+            'revenue': float(self.company_revenue.get(company_id, 0.0)),
+            'won_revenue': float(self.company_won_revenue.get(company_id, 0.0)),
+            'group_revenue': group_revenue,
+        }
+
+    def deal_detail(self, deal_id) -> Dict:
+        """
+        Linked records for one deal.
+
+        Args:
+            deal_id: Deal Record ID
+
+        Returns:
+            Dict: company_ids, companies and tickets
+        """
+        company_ids = self.graph.companies_for_deal(int(deal_id))
+        return {
+            'company_ids': company_ids,
+            'companies': self._take(self.companies, self._company_rows, company_ids),
+            'tickets': self._take(self.tickets, self._ticket_rows, self.graph.tickets_for_deal(int(deal_id))),
+        }
+
+    def ticket_detail(self, ticket_id) -> Dict:
+        """
+        Linked records for one ticket.
+
+        Args:
+            ticket_id: Ticket ID
+
+        Returns:
+            Dict: company_ids, companies and deals
+        """
+        company_ids = self.graph.companies_for_ticket(int(ticket_id))
+        return {
+            'company_ids': company_ids,
+            'companies': self._take(self.companies, self._company_rows, company_ids),
+            'deals': self._take(self.deals, self._deal_rows, self.graph.deals_for_ticket(int(ticket_id))),
+        }
@@ -0,0 +1,137 @@
+"""
+Vectorized parsing of HubSpot "(HH:mm:ss)" duration columns.
+
+HubSpot exports durations as hour-minute-second strings where the hour
+field is unbounded ("2705:47:48"), so they cannot go through a time-of-day
+parser. Values are parsed with array operations on their code points
+instead of a per-row apply; anything that does not match becomes NaN.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+# Deal pipeline stages in funnel order, mapped to their cumulative-time column
+PIPELINE_STAGES: Dict[str, str] = {
+    'Partner Referrals': 'Cumulative time in "Partner Referrals  (Sales Pipeline)" (HH:mm:ss)',
+    'Renewals': 'Cumulative time in "Renewals  (Sales Pipeline)" (HH:mm:ss)',
+    'Opportunity': 'Cumulative time in "Opportunity (Sales Pipeline)" (HH:mm:ss)',
+    "BANT Deal. Pain ID'ed": 'Cumulative time in "BANT Deal. Pain ID\'ed (Sales Pipeline)" (HH:mm:ss)',
+    'Deep Dive. PSP Drafted': 'Cumulative time in "Deep Dive. PSP Drafted (Sales Pipeline)" (HH:mm:ss)',
+    'In Trial - Trial in Progress': 'Cumulative time in "In Trial - Trial in Progress (Sales Pipeline)" (HH:mm:ss)',
+    'Closed Trial': 'Cumulative time in "Closed Trial (Sales Pipeline)" (HH:mm:ss)',
+    'Negotiation': 'Cumulative time in "Negotiation (Sales Pipeline)" (HH:mm:ss)',
+    'Contract Sent': 'Cumulative time in "Contract Sent (Sales Pipeline)" (HH:mm:ss)',
+    'Closed Won': 'Cumulative time in "Closed Won (Sales Pipeline)" (HH:mm:ss)',
+    'Closed Lost': 'Cumulative time in "Closed Lost (Sales Pipeline)" (HH:mm:ss)',
+}
+
+
+def _hms_to_hours(text: np.ndarray) -> np.ndarray:
+    """
+    Parse a unicode array of "H+:MM:SS" strings on its code points.
+
+    The minute and second fields sit at fixed offsets from the end of each
+    string, so only the hour field has a variable width; it is accumulated
+    one character column at a time (Horner's rule), which loops over the
+    string width rather than over the rows.
+
+    Args:
+        text (np.ndarray): Fixed-width unicode array
+
+    Returns:
+        np.ndarray: Float64 hours, NaN where the layout does not match
+    """
+    width = max(text.dtype.itemsize // 4, 1)
+    codes = text.view(np.uint32).reshape(len(text), width)
+    length = (codes != 0).sum(axis=1)
+    # Shift to digit values; anything outside ASCII collapses to an invalid marker
+    digits = np.minimum(codes, 127).astype(np.int16) - ord('0')
+
+    rows = np.arange(len(text))
+
+    def at_end(offset: int) -> np.ndarray:
+        return digits[rows, np.maximum(length - offset, 0)]
+
+    colon = ord(':') - ord('0')
+    minute_tens, minute_ones, second_tens, second_ones = at_end(5), at_end(4), at_end(2), at_end(1)
+    valid = (length >= 7) & (at_end(6) == colon) & (at_end(3) == colon)
+    for digit, upper in ((minute_tens, 5), (minute_ones, 9), (second_tens, 5), (second_ones, 9)):
+        valid &= (digit >= 0) & (digit <= upper)
+
+    # Hour field: everything before the second-to-last colon, optional leading '-'
+    positions = np.arange(width)
+    hour_width = length - 6
+    negative = digits[:, 0] == ord('-') - ord('0')
+    in_hours = (positions < hour_width[:, None]) & ~(negative[:, None] & (positions == 0))
+    is_digit = (digits >= 0) & (digits <= 9)
+    valid &= ~(in_hours & ~is_digit).any(axis=1) & (hour_width - negative >= 1)
+
+    hours = np.zeros(len(text))
+    for position in range(width):
+        hours = np.where(in_hours[:, position], hours * 10 + digits[:, position], hours)
+
+    total = hours + (minute_tens * 10 + minute_ones) / 60 + (second_tens * 10 + second_ones) / 3600
+    total = np.where(negative, -total, total)
+    return np.where(valid, total, np.nan)
+
+
+def parse_duration_hours(values: pd.Series) -> pd.Series:
+    """
+    Convert "HH:mm:ss" durations to hours.
+
+    The hour field may be any width ("2705:47:48") and may carry a leading
+    minus sign; minutes and seconds must be two digits.
+
+    Args:
+        values (pd.Series): Duration strings; numeric series are assumed to
+            already be in hours and are returned as float
+
+    Returns:
+        pd.Series: Float64 hours with the same index, NaN for missing or
+            malformed values
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype('float64')
+
+    raw = values.to_numpy(dtype=object)
+    present = pd.notna(raw)
+    hours = np.full(len(raw), np.nan)
+    if present.any():
+        hours[present] = _hms_to_hours(raw[present].astype(str))
+    return pd.Series(hours, index=values.index, name=values.name)
+
+
+def stage_duration_matrix(df: pd.DataFrame,
+                          stages: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Build the deals x pipeline-stages matrix of hours spent in each stage.
+
+    All stage columns are parsed together in one pass. A stage whose column
+    is missing from df is returned as all-NaN, so the matrix shape does not
+    depend on which columns survived cleaning. NaN means the deal never
+    entered the stage.
+
+    Args:
+        df (pd.DataFrame): Deals with the cumulative-time columns
+        stages (List[str], optional): Stage names from PIPELINE_STAGES;
+            defaults to all of them in funnel order
+
+    Returns:
+        pd.DataFrame: float32 hours, one column per stage, indexed like df
+    """
+    stages = list(PIPELINE_STAGES) if stages is None else stages
+    present = [stage for stage in stages if PIPELINE_STAGES[stage] in df.columns]
+
+    matrix = np.full((len(df), len(stages)), np.nan, dtype=np.float32)
+    if present and len(df):
+        # Stack the present columns end to end and parse them in one pass
+        stacked = pd.Series(
+            np.concatenate([df[PIPELINE_STAGES[stage]].to_numpy(dtype=object) for stage in present]),
+            dtype=object
+        )
+        hours = parse_duration_hours(stacked).to_numpy(dtype=np.float32)
+        positions = [stages.index(stage) for stage in present]
+        matrix[:, positions] = hours.reshape(len(present), len(df)).T
+
+    return pd.DataFrame(matrix, index=df.index, columns=stages)
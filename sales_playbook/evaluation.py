@@ -0,0 +1,240 @@
+"""
+Parallel model evaluation over a declarative grid.
+
+Final_code fits each candidate model one after another on a single split.
+evaluate_grid() runs every (model, class weighting, split) combination in
+a process pool instead. The feature matrix and labels are copied into
+shared memory once; workers attach to that block by name rather than
+receiving a pickled copy per task. Each task records accuracy, precision,
+recall, F1 and AUC, the fit and predict latency, and the peak memory
+of the fit, and everything comes back as one results table. Peak memory
+is the growth of the worker's resident-set high-water mark, reset before
+each fit (Linux), so native XGBoost buffers count and fits are not slowed;
+elsewhere it falls back to the tracemalloc peak.
+"""
+
+import os
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from xgboost import XGBClassifier
+
+# Model name -> (estimator class, constructor arguments), as compared in Final_code
+DEFAULT_MODELS: Dict[str, Tuple[type, Dict[str, Any]]] = {
+    'Logistic Regression': (LogisticRegression, {'max_iter': 1000, 'random_state': 42}),
+    'Random Forest': (RandomForestClassifier, {'n_estimators': 100, 'random_state': 42}),
+    'XGBClassifier': (XGBClassifier, {'n_estimators': 100, 'eval_metric': 'logloss', 'random_state': 42}),
+}
+
+# 'none' keeps the model defaults; 'balanced' reweights the minority class
+WEIGHTINGS: List[str] = ['none', 'balanced']
+
+METRICS: List[str] = ['accuracy', 'precision', 'recall', 'f1', 'auc']
+
+# Shared blocks attached in this worker process, by name
+_ATTACHED: Dict[str, Tuple[shared_memory.SharedMemory, np.ndarray]] = {}
+
+_PROC_STATUS = '/proc/self/status'
+
+
+def _share(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, Tuple[str, Tuple[int, ...], str]]:
+    """Copy an array into a new shared-memory block; returns the block and its (name, shape, dtype)."""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _attach(spec: Tuple[str, Tuple[int, ...], str]) -> np.ndarray:
+    """Read-only view of a shared block, attached once per worker."""
+    name, shape, dtype = spec
+    if name not in _ATTACHED:
+        # Pool workers share the parent's resource tracker, which unlinks the block once
+        block = shared_memory.SharedMemory(name=name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        _ATTACHED[name] = (block, array)
+    return _ATTACHED[name][1]
+
+
+def _status_mb(field: str) -> float:
+    """A memory field of /proc/self/status (e.g. VmRSS, VmHWM) in MB."""
+    with open(_PROC_STATUS) as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    raise KeyError(field)
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the resident-set high-water mark; False where that is unsupported."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _weighted_params(estimator: type, params: Dict[str, Any], weighting: str, y_train: np.ndarray) -> Dict[str, Any]:
+    """Constructor arguments for a class weighting."""
+    params = dict(params)
+    if weighting == 'balanced':
+        if issubclass(estimator, XGBClassifier):
+            positives = int(np.sum(y_train == 1))
+            params['scale_pos_weight'] = (len(y_train) - positives) / max(positives, 1)
+        else:
+            params['class_weight'] = 'balanced'
+    elif weighting != 'none':
+        raise ValueError(f"Unknown weighting '{weighting}'; expected one of {WEIGHTINGS}")
+    return params
+
+
+def _evaluate_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Fit and score one (model, weighting, split) combination in a worker."""
+    X = _attach(task['X'])
+    y = _attach(task['y'])
+    train, test = task['train'], task['test']
+    X_train, y_train = X[train], y[train]
+    X_test, y_test = X[test], y[test]
+
+    estimator, params = task['estimator'], task['params']
+    model = estimator(**_weighted_params(estimator, params, task['weighting'], y_train))
+
+    use_rss = task['track_memory'] and _reset_peak_rss()
+    if use_rss:
+        # The reset sets the high-water mark to the current RSS; growth is measured from it
+        baseline_mb = _status_mb('VmHWM')
+    elif task['track_memory']:
+        tracemalloc.start()
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    peak_mb = np.nan
+    if use_rss:
+        peak_mb = max(_status_mb('VmHWM') - baseline_mb, 0.0)
+    elif task['track_memory']:
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    y_proba = model.predict_proba(X_test)[:, 1] if hasattr(model, 'predict_proba') else None
+    predict_seconds = time.perf_counter() - start
+
+    auc = np.nan
+    if y_proba is not None and len(np.unique(y_test)) > 1:
+        auc = roc_auc_score(y_test, y_proba)
+    return {
+        'model_name': task['model_name'],
+        'weighting': task['weighting'],
+        'fold': task['fold'],
+        'accuracy': accuracy_score(y_test, y_pred),
+        'precision': precision_score(y_test, y_pred, zero_division=0),
+        'recall': recall_score(y_test, y_pred, zero_division=0),
+        'f1': f1_score(y_test, y_pred, zero_division=0),
+        'auc': auc,
+        'fit_seconds': fit_seconds,
+        'predict_seconds': predict_seconds,
+        'peak_mb': peak_mb,
+    }
+
+
+def evaluate_grid(X,
+                  y,
+                  models: Optional[Dict[str, Tuple[type, Dict[str, Any]]]] = None,
+                  weightings: Sequence[str] = ('none',),
+                  cv: int = 5,
+                  test: Optional[Tuple[Any, Any]] = None,
+                  max_workers: Optional[int] = None,
+                  random_state: int = 42,
+                  track_memory: bool = True) -> pd.DataFrame:
+    """
+    Evaluate every model x weighting x split in a process pool.
+
+    Splits are cv stratified folds of (X, y) and, when test is given, a
+    'holdout' split that trains on all of X and scores on test.
+
+    Args:
+        X: Training features (array or DataFrame)
+        y: Training labels
+        models (Dict, optional): Name -> (estimator class, kwargs);
+            defaults to DEFAULT_MODELS
+        weightings (Sequence[str]): Class weightings from WEIGHTINGS
+        cv (int): Stratified folds over X (0 for holdout only)
+        test (Tuple, optional): (X_test, y_test) for the holdout split
+        max_workers (int, optional): Pool size; defaults to the CPU count
+        random_state (int): Fold shuffling seed
+        track_memory (bool): Record the peak memory of each fit
+
+    Returns:
+        pd.DataFrame: One row per combination with METRICS, fit / predict
+            seconds and peak_mb
+    """
+    models = DEFAULT_MODELS if models is None else models
+    X_all = np.asarray(X, dtype=np.float64)
+    y_all = np.asarray(y)
+
+    splits: List[Tuple[Any, np.ndarray, np.ndarray]] = []
+    if cv:
+        folds = StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state)
+        splits += [(fold, train, valid) for fold, (train, valid) in enumerate(folds.split(X_all, y_all))]
+    if test is not None:
+        n_train = len(X_all)
+        X_all = np.vstack([X_all, np.asarray(test[0], dtype=np.float64)])
+        y_all = np.concatenate([y_all, np.asarray(test[1])])
+        splits.append(('holdout', np.arange(n_train), np.arange(n_train, len(X_all))))
+    if not splits:
+        raise ValueError("Nothing to evaluate: set cv > 1 or pass a test split")
+
+    X_block, X_spec = _share(np.ascontiguousarray(X_all))
+    y_block, y_spec = _share(np.ascontiguousarray(y_all))
+    try:
+        tasks = [
+            {'model_name': name, 'estimator': estimator, 'params': params, 'weighting': weighting,
+             'fold': fold, 'train': train, 'test': valid, 'X': X_spec, 'y': y_spec,
+             'track_memory': track_memory}
+            for name, (estimator, params) in models.items()
+            for weighting in weightings
+            for fold, train, valid in splits
+        ]
+        # Longest fits first so the pool does not wait on one slow straggler
+        tasks.sort(key=lambda task: task['estimator'] is LogisticRegression)
+        workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(_evaluate_task, tasks))
+    finally:
+        for block in (X_block, y_block):
+            block.close()
+            block.unlink()
+
+    order = {name: position for position, name in enumerate(models)}
+    results = pd.DataFrame(rows)
+    results = results.sort_values(['model_name', 'weighting', 'fold'],
+                                  key=lambda s: s.map(order) if s.name == 'model_name' else s.astype(str))
+    return results.reset_index(drop=True)
+
+
+def summarize(results: pd.DataFrame, holdout: bool = False) -> pd.DataFrame:
+    """
+    Mean of every metric per model and weighting.
+
+    Args:
+        results (pd.DataFrame): Output of evaluate_grid
+        holdout (bool): Summarize the holdout split instead of the CV folds
+
+    Returns:
+        pd.DataFrame: Indexed by (model_name, weighting)
+    """
+    is_holdout = results['fold'].astype(str) == 'holdout'
+    subset = results[is_holdout if holdout else ~is_holdout]
+    columns = METRICS + ['fit_seconds', 'predict_seconds', 'peak_mb']
+    return subset.groupby(['model_name', 'weighting'], sort=False)[columns].mean()
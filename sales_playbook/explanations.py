@@ -0,0 +1,301 @@
+"""
+Cached TreeSHAP explanations for the deal-win model.
+
+XGBoost computes exact TreeSHAP contributions with
+Booster.predict(pred_contribs=True), one value per feature plus the bias,
+on the log-odds scale. Over hundreds of features that is too slow to run
+when a deal is opened, so every deal is explained in one batch: row
+chunks go to a joblib worker pool (each worker parses the booster once),
+each worker keeps only the k largest |contribution| features of its rows, and
+the result is saved as
+
+    <directory>/<version>.npz    ids, top feature positions (int16),
+                                 contributions and feature values (float32)
+
+keyed by the data/model version. ExplanationCache runs the batch in a
+background thread the first time a version is requested; afterwards
+opening a deal is a dictionary lookup.
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from joblib import Parallel, delayed
+from typing import Dict, List, Optional, Tuple
+
+from sales_playbook.deal_model import DealWinModel
+from sales_playbook.ids import id_array, id_index
+
+DEFAULT_EXPLANATIONS_DIR = os.path.join('models', 'explanations')
+
+DEFAULT_TOP_K = 5
+
+# Rows per pool task; a chunk's contribution matrix is rows x (features + 1) float32
+_CHUNK_ROWS = 4096
+
+# Bumped whenever the saved layout changes
+_FORMAT_VERSION = 1
+
+# Boosters parsed in this worker process, by digest of the serialized model
+_BOOSTERS: Dict[str, xgb.Booster] = {}
+
+
+def _worker_booster(raw_model: bytes, digest: str) -> xgb.Booster:
+    if digest not in _BOOSTERS:
+        booster = xgb.Booster(model_file=bytearray(raw_model))
+        # One thread per worker; the pool provides the parallelism
+        booster.set_param({'nthread': 1})
+        _BOOSTERS.clear()
+        _BOOSTERS[digest] = booster
+    return _BOOSTERS[digest]
+
+
+def _top_k(contributions: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions and values of the k largest |contribution| features per row, largest first."""
+    k = min(k, contributions.shape[1])
+    if k == 0:
+        return np.empty((len(contributions), 0), dtype=np.int16), np.empty((len(contributions), 0), dtype=np.float32)
+    magnitude = np.abs(contributions)
+    top = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(magnitude, top, axis=1), axis=1, kind='stable')
+    top = np.take_along_axis(top, order, axis=1)
+    return top.astype(np.int16), np.take_along_axis(contributions, top, axis=1).astype(np.float32)
+
+
+def _explain_chunk(X: np.ndarray, k: int, booster) -> Tuple[np.ndarray, np.ndarray, float]:
+    """TreeSHAP for one chunk, reduced to its top-k features and the bias.
+
+    booster is a Booster, or (serialized model, digest) inside a pool worker.
+    """
+    if isinstance(booster, tuple):
+        booster = _worker_booster(*booster)
+    contributions = booster.predict(xgb.DMatrix(X), pred_contribs=True)
+    top, values = _top_k(contributions[:, :-1], k)
+    bias = float(contributions[0, -1]) if len(contributions) else 0.0
+    return top, values, bias
+
+
+class DealExplanations:
+    """
+    Top-k TreeSHAP contributions per deal, with an ID lookup.
+    """
+
+    def __init__(self,
+                 ids: np.ndarray,
+                 features: List[str],
+                 top_features: np.ndarray,
+                 contributions: np.ndarray,
+                 feature_values: np.ndarray,
+                 base_value: float,
+                 version: Optional[str] = None):
+        """
+        Initialize from computed arrays; use explain_deals() to create one.
+
+        Args:
+            ids (np.ndarray): int64 deal IDs in row order
+            features (List[str]): Model feature names; top_features indexes into them
+            top_features (np.ndarray): int16 (rows x k) feature positions, largest |contribution| first
+            contributions (np.ndarray): float32 (rows x k) log-odds contributions
+            feature_values (np.ndarray): float32 (rows x k) input values of those features
+            base_value (float): Log-odds bias shared by every row
+            version (str, optional): Data/model version the arrays were computed for
+        """
+        self.ids = ids
+        self.features = list(features)
+        self.top_features = top_features
+        self.contributions = contributions
+        self.feature_values = feature_values
+        self.base_value = base_value
+        self.version = version
+        self._rows = id_index(ids)
+
+    @property
+    def k(self) -> int:
+        return self.top_features.shape[1]
+
+    def explain(self, deal_id) -> pd.DataFrame:
+        """
+        Top contributing features of one deal.
+
+        Args:
+            deal_id: Deal Record ID
+
+        Returns:
+            pd.DataFrame: 'Feature', 'Value' and 'Contribution' (log-odds;
+                positive pushes towards a win), largest effect first; empty
+                if the deal was not explained
+        """
+        ids, valid = id_array([deal_id])
+        row = self._rows.get(int(ids[0])) if valid[0] else None
+        if row is None:
+            return pd.DataFrame(columns=['Feature', 'Value', 'Contribution'])
+        return pd.DataFrame({
+            'Feature': [self.features[i] for i in self.top_features[row]],
+            'Value': self.feature_values[row],
+            'Contribution': self.contributions[row],
+        })
+
+    def save(self, path: str) -> None:
+        """
+        Save the arrays as an uncompressed .npz (written atomically).
+
+        Args:
+            path (str): Output file (parent directories are created)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        scratch = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}.npz"
+        np.savez(scratch,
+                 format_version=_FORMAT_VERSION,
+                 version=self.version or '',
+                 ids=self.ids,
+                 features=np.asarray(self.features, dtype=str),
+                 top_features=self.top_features,
+                 contributions=self.contributions,
+                 feature_values=self.feature_values,
+                 base_value=self.base_value)
+        os.replace(scratch, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'DealExplanations':
+        """
+        Load explanations written by save().
+
+        Args:
+            path (str): Saved .npz file
+
+        Returns:
+            DealExplanations: Explanations ready to look up
+        """
+        with np.load(path) as state:
+            if int(state['format_version']) != _FORMAT_VERSION:
+                raise ValueError(f"{path} was saved in an unsupported format; recompute the explanations")
+            return cls(state['ids'], state['features'].tolist(), state['top_features'],
+                       state['contributions'], state['feature_values'], float(state['base_value']),
+                       str(state['version']) or None)
+
+
+def explain_deals(model: DealWinModel,
+                  frame: pd.DataFrame,
+                  k: int = DEFAULT_TOP_K,
+                  max_workers: Optional[int] = None,
+                  chunk_rows: int = _CHUNK_ROWS,
+                  version: Optional[str] = None) -> DealExplanations:
+    """
+    TreeSHAP contributions of every deal, kept as the top k per row.
+
+    Args:
+        model (DealWinModel): Fitted deal-win model
+        frame (pd.DataFrame): Output of build_deal_company_frame, with 'Record ID'
+        k (int): Features kept per deal
+        max_workers (int, optional): Pool size; defaults to the CPU count.
+            With one worker (or one chunk) the batch runs in-process.
+        chunk_rows (int): Rows per pool task
+        version (str, optional): Recorded with the result
+
+    Returns:
+        DealExplanations: Per-deal top-k features, contributions and values
+    """
+    X = np.ascontiguousarray(model.transform(frame), dtype=np.float32)
+    # Raw (unscaled) inputs, to show the value a contribution was computed from
+    raw = frame[model.features].astype('float64').fillna(0).to_numpy(dtype=np.float32)
+    ids, _ = id_array(frame['Record ID'])
+
+    chunks = [X[start:start + chunk_rows] for start in range(0, len(X), chunk_rows)]
+    workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+    booster = model.classifier.get_booster()
+    if workers <= 1:
+        parts = [_explain_chunk(chunk, k, booster) for chunk in chunks]
+    else:
+        raw_model = bytes(booster.save_raw())
+        serialized = (raw_model, hashlib.sha256(raw_model).hexdigest())
+        parts = Parallel(n_jobs=workers)(delayed(_explain_chunk)(chunk, k, serialized) for chunk in chunks)
+
+    k = min(k, X.shape[1])
+    top = np.vstack([p[0] for p in parts]) if parts else np.empty((0, k), dtype=np.int16)
+    contributions = np.vstack([p[1] for p in parts]) if parts else np.empty((0, k), dtype=np.float32)
+    base_value = parts[0][2] if parts else 0.0
+    return DealExplanations(ids, model.features, top, contributions,
+                            np.take_along_axis(raw, top.astype(np.int64), axis=1), base_value, version)
+
+
+class ExplanationCache:
+    """
+    Explanations on disk per version, computed in the background on a miss.
+    """
+
+    def __init__(self, directory: str = DEFAULT_EXPLANATIONS_DIR, k: int = DEFAULT_TOP_K,
+                 max_workers: Optional[int] = None):
+        """
+        Initialize a cache over a directory (created on first write).
+
+        Args:
+            directory (str): Where <version>.npz files are kept
+            k (int): Features kept per deal
+            max_workers (int, optional): Pool size for each batch
+        """
+        self.directory = directory
+        self.k = k
+        self.max_workers = max_workers
+        self._loaded: Dict[str, DealExplanations] = {}
+        self._jobs: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # One batch at a time; each batch already uses the whole process pool
+        self._runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix='explanations')
+
+    def path(self, version: str) -> str:
+        return os.path.join(self.directory, f"{version}.npz")
+
+    def get(self, version: str) -> Optional[DealExplanations]:
+        """
+        Explanations for a version if they are already computed.
+
+        Args:
+            version (str): Data/model version
+
+        Returns:
+            DealExplanations or None: None while missing or still running
+        """
+        with self._lock:
+            if version not in self._loaded and os.path.exists(self.path(version)):
+                self._loaded[version] = DealExplanations.load(self.path(version))
+            return self._loaded.get(version)
+
+    def _compute(self, version: str, model: DealWinModel, frame: pd.DataFrame) -> DealExplanations:
+        explanations = explain_deals(model, frame, k=self.k, max_workers=self.max_workers, version=version)
+        explanations.save(self.path(version))
+        with self._lock:
+            self._loaded[version] = explanations
+        return explanations
+
+    def ensure(self, version: str, model: DealWinModel, frame: pd.DataFrame, retry: bool = False) -> Future:
+        """
+        Start computing a version in the background unless it exists or is running.
+
+        Args:
+            version (str): Data/model version
+            model (DealWinModel): Fitted model for that version
+            frame (pd.DataFrame): Deal frame for that version
+            retry (bool): Restart the batch if the previous one failed
+
+        Returns:
+            Future: Resolves to the DealExplanations (already done on a hit);
+                a failed batch keeps its exception until retry=True
+        """
+        explanations = self.get(version)
+        with self._lock:
+            if explanations is not None:
+                done: Future = Future()
+                done.set_result(explanations)
+                return done
+            job = self._jobs.get(version)
+            if job is None or (retry and job.done() and job.exception() is not None):
+                job = self._runner.submit(self._compute, version, model, frame)
+                self._jobs[version] = job
+            return job
@@ -0,0 +1,186 @@
+"""
+Warm-started L1 regularization path for feature selection.
+
+Replaces the cold GridSearchCV over C used in the notebooks. Each fold
+walks the whole C grid from the strongest penalty to the weakest with
+warm_start, so every fit starts from the previous solution instead of
+from zero, and the folds run in parallel on the same read-only arrays
+(joblib memory-maps large inputs rather than copying them into each
+worker). The support (non-zero coefficients) at every C is kept, so the
+selected-feature list for any C on the path is a lookup.
+"""
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import StratifiedKFold
+from typing import List, Optional, Tuple
+
+# The C grid searched in Final_code / Model
+DEFAULT_CS = np.logspace(-3, 1, 10)
+
+
+def _fit_path(X: np.ndarray,
+              y: np.ndarray,
+              Cs: np.ndarray,
+              train: np.ndarray,
+              test: Optional[np.ndarray],
+              scoring: str,
+              max_iter: int,
+              tol: float,
+              random_state: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fit one warm-started pass over Cs (ascending) on the train rows.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Coefficients (len(Cs) x n_features)
+            and the score on the test rows at each C (NaN without test rows)
+    """
+    model = LogisticRegression(penalty='l1', solver='saga', warm_start=True,
+                               max_iter=max_iter, tol=tol, random_state=random_state)
+    scorer = get_scorer(scoring)
+    coefs = np.empty((len(Cs), X.shape[1]))
+    scores = np.full(len(Cs), np.nan)
+    for position, C in enumerate(Cs):
+        model.set_params(C=C)
+        model.fit(X[train], y[train])
+        coefs[position] = model.coef_[0]
+        if test is not None:
+            scores[position] = scorer(model, X[test], y[test])
+    return coefs, scores
+
+
+class L1Path:
+    """
+    Coefficients, supports and cross-validated scores along an L1 path.
+    """
+
+    def __init__(self, Cs: np.ndarray, coefs: np.ndarray, cv_scores: np.ndarray,
+                 columns: Optional[List[str]] = None):
+        """
+        Initialize from fitted path arrays.
+
+        Args:
+            Cs (np.ndarray): C values in the caller's order
+            coefs (np.ndarray): Full-data coefficients, one row per C
+            cv_scores (np.ndarray): Fold scores, folds x Cs
+            columns (List[str], optional): Feature names
+        """
+        self.Cs = np.asarray(Cs, dtype=np.float64)
+        self.coefs = coefs
+        self.cv_scores = cv_scores
+        self.columns = list(columns) if columns is not None else None
+        # Cached once: the selected features for every C on the path
+        self.supports = coefs != 0
+
+    @property
+    def mean_scores(self) -> np.ndarray:
+        return self.cv_scores.mean(axis=0)
+
+    @property
+    def best_C(self) -> float:
+        """C with the best mean fold score (first one on ties, as GridSearchCV)."""
+        return float(self.Cs[int(np.argmax(self.mean_scores))])
+
+    def _position(self, C: Optional[float]) -> int:
+        if C is None:
+            return int(np.argmax(self.mean_scores))
+        matches = np.flatnonzero(np.isclose(self.Cs, C))
+        if len(matches) == 0:
+            raise KeyError(f"C={C} is not on the path; available: {self.Cs.tolist()}")
+        return int(matches[0])
+
+    def support(self, C: Optional[float] = None) -> np.ndarray:
+        """
+        Boolean mask of selected features.
+
+        Args:
+            C (float, optional): A C on the path; defaults to best_C
+
+        Returns:
+            np.ndarray: True where the coefficient is non-zero
+        """
+        return self.supports[self._position(C)]
+
+    def coef(self, C: Optional[float] = None) -> np.ndarray:
+        """Full-data coefficients at C (defaults to best_C)."""
+        return self.coefs[self._position(C)]
+
+    def selected_features(self, C: Optional[float] = None) -> List:
+        """
+        Names (or indices, without column names) of the features kept at C.
+
+        Args:
+            C (float, optional): A C on the path; defaults to best_C
+
+        Returns:
+            List: Selected feature names or positions
+        """
+        selected = np.flatnonzero(self.support(C))
+        if self.columns is None:
+            return selected.tolist()
+        return [self.columns[i] for i in selected]
+
+    def summary(self) -> pd.DataFrame:
+        """Mean / std fold score and support size at every C."""
+        return pd.DataFrame({
+            'C': self.Cs,
+            'mean_score': self.mean_scores,
+            'std_score': self.cv_scores.std(axis=0),
+            'n_selected': self.supports.sum(axis=1),
+        })
+
+
+def l1_path(X,
+            y,
+            Cs: Optional[np.ndarray] = None,
+            cv: int = 5,
+            scoring: str = 'f1',
+            n_jobs: int = -1,
+            max_iter: int = 5000,
+            tol: float = 1e-4,
+            random_state: int = 42) -> L1Path:
+    """
+    Cross-validated L1 logistic-regression path with warm starts.
+
+    Folds match GridSearchCV's default for classifiers (unshuffled
+    StratifiedKFold), and the full-data path is fitted alongside them.
+
+    Args:
+        X: Standardized feature matrix (array or DataFrame)
+        y: Binary labels
+        Cs (np.ndarray, optional): C values; defaults to DEFAULT_CS
+        cv (int): Number of folds
+        scoring (str): sklearn scorer name used to rank C values
+        n_jobs (int): Parallel jobs (folds plus the full-data path)
+        max_iter (int): saga iteration cap per C
+        tol (float): saga tolerance
+        random_state (int): saga seed
+
+    Returns:
+        L1Path: Path coefficients, supports and fold scores
+    """
+    columns = list(X.columns) if isinstance(X, pd.DataFrame) else None
+    X = np.ascontiguousarray(np.asarray(X, dtype=np.float64))
+    y = np.asarray(y)
+    Cs = DEFAULT_CS if Cs is None else np.asarray(Cs, dtype=np.float64)
+
+    # Walk from the sparsest model (smallest C) up so each fit warm-starts from a nearby solution
+    order = np.argsort(Cs)
+    ascending = Cs[order]
+
+    splits = list(StratifiedKFold(n_splits=cv).split(X, y))
+    jobs = [(train, test) for train, test in splits] + [(np.arange(len(y)), None)]
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_path)(X, y, ascending, train, test, scoring, max_iter, tol, random_state)
+        for train, test in jobs
+    )
+
+    cv_scores = np.empty((cv, len(Cs)))
+    coefs = np.empty((len(Cs), X.shape[1]))
+    for fold, (_, scores) in enumerate(results[:-1]):
+        cv_scores[fold, order] = scores
+    coefs[order] = results[-1][0]
+    return L1Path(Cs, coefs, cv_scores, columns)
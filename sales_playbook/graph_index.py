@@ -0,0 +1,563 @@
+"""
+Compact relationship graph over companies, deals and tickets.
+
+The nested string mappings in mappings.json are converted once into integer
+CSR adjacency arrays (forward and reverse for every relationship) and stored
+in a single binary file that is memory-mapped on load, so opening the index
+costs a header read instead of a JSON parse.
+
+Node types:
+    company, deal, ticket        keyed by Hubspot Record ID / Ticket ID (int64)
+    company_name, deal_name      keyed by anonymized name (e.g. 'Company_300e98f5')
+
+ParentChildRelationships and TicketToDeal point at anonymized names rather
+than IDs, so they land on the name node types. Passing the anonymized
+name -> Record ID lookups (from the anonymized companies/deals exports) adds
+alias edges that let traversals continue on to the real company/deal nodes.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from sales_playbook.ids import id_array
+from sales_playbook.relationships import Edges
+
+# Relationship name -> (source node type, target node type)
+RELATIONS = {
+    'company_deals': ('company', 'deal'),
+    'company_tickets': ('company', 'ticket'),
+    'company_parent_name': ('company', 'company_name'),
+    'ticket_deal_name': ('ticket', 'deal_name'),
+    'company_name_company': ('company_name', 'company'),
+    'deal_name_deal': ('deal_name', 'deal'),
+}
+
+# mappings.json section -> relationship it feeds
+MAPPING_SECTIONS = {
+    'CompanyToDeals': 'company_deals',
+    'CompanyToTickets': 'company_tickets',
+    'ParentChildRelationships': 'company_parent_name',
+    'TicketToDeal': 'ticket_deal_name',
+}
+
+# Node types keyed by anonymized names instead of integer IDs
+LABEL_NODE_TYPES = ('company_name', 'deal_name')
+
+_MAGIC = b'SPGRAPH1'
+_ALIGN = 64
+
+
+def _nested_to_edges(section: Mapping, label_targets: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flatten a {source: target | [targets]} mapping into aligned key arrays.
+
+    Args:
+        section (Mapping): One section of mappings.json
+        label_targets (bool): Whether targets are anonymized names rather than IDs
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Source keys (int64) and target keys
+    """
+    targets = [v if isinstance(v, list) else [v] for v in section.values()]
+    counts = np.fromiter((len(t) for t in targets), dtype=np.int64, count=len(targets))
+    sources, valid = id_array(pd.Series(list(section.keys()), dtype=object))
+    sources = np.repeat(sources, counts)
+    valid = np.repeat(valid, counts)
+    flat = pd.Series([t for group in targets for t in group], dtype=object)
+
+    if label_targets:
+        flat = flat.astype(str).to_numpy()
+    else:
+        flat, flat_valid = id_array(flat)
+        valid &= flat_valid
+
+    return sources[valid], flat[valid]
+
+
+def _alias_edges(names: Mapping) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert an anonymized name -> Record ID lookup into alias edges.
+
+    Args:
+        names (Mapping): Anonymized name -> Record ID (dict or Series)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Name keys and int64 Record IDs
+    """
+    names = pd.Series(names) if not isinstance(names, pd.Series) else names
+    ids, valid = id_array(names)
+    valid &= names.index.notna()
+    return names.index[valid].astype(str).to_numpy(), ids[valid]
+
+
+class RelationshipGraph:
+    """
+    Integer CSR adjacency index over company/deal/ticket relationships,
+    with forward and reverse edges for every relationship type.
+    """
+
+    def __init__(self, node_keys: Dict[str, np.ndarray], arrays: Dict[str, np.ndarray]):
+        """
+        Initialize the graph from already-built arrays (use from_mappings,
+        from_edges or load instead of calling this directly).
+
+        Args:
+            node_keys (Dict[str, np.ndarray]): Node type -> sorted unique keys
+            arrays (Dict[str, np.ndarray]): CSR arrays named
+                '<relation>.<fwd|rev>.indptr' / '<relation>.<fwd|rev>.indices'
+        """
+        self.node_keys = node_keys
+        self.arrays = arrays
+        self.relations = [r for r in RELATIONS if f'{r}.fwd.indptr' in arrays]
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_edges(cls, edges: Dict[str, Edges]) -> 'RelationshipGraph':
+        """
+        Build the graph from key-level edge lists.
+
+        Args:
+            edges (Dict[str, Edges]): Relationship name (see RELATIONS) ->
+                (source keys, target keys)
+
+        Returns:
+            RelationshipGraph: The built index
+        """
+        unknown = set(edges) - set(RELATIONS)
+        if unknown:
+            raise ValueError(f"Unknown relationship(s): {sorted(unknown)}")
+
+        # Collect the key universe of every node type
+        collected = {}
+        for relation, (sources, targets) in edges.items():
+            src_type, dst_type = RELATIONS[relation]
+            collected.setdefault(src_type, []).append(np.asarray(sources))
+            collected.setdefault(dst_type, []).append(np.asarray(targets))
+
+        node_keys = {}
+        for node_type, parts in collected.items():
+            dtype = str if node_type in LABEL_NODE_TYPES else np.int64
+            node_keys[node_type] = np.unique(np.concatenate(parts).astype(dtype))
+
+        arrays = {}
+        for relation, (sources, targets) in edges.items():
+            src_type, dst_type = RELATIONS[relation]
+            src_idx = np.searchsorted(node_keys[src_type], sources)
+            dst_idx = np.searchsorted(node_keys[dst_type], targets)
+
+            # Drop duplicate edges before building adjacency
+            n_dst = len(node_keys[dst_type])
+            pairs = np.unique(src_idx.astype(np.int64) * n_dst + dst_idx)
+            src_idx, dst_idx = pairs // n_dst, pairs % n_dst
+
+            n_src = len(node_keys[src_type])
+            for direction, (a, b, n) in (('fwd', (src_idx, dst_idx, n_src)),
+                                         ('rev', (dst_idx, src_idx, n_dst))):
+                order = np.argsort(a, kind='stable')
+                indptr = np.zeros(n + 1, dtype=np.int64)
+                np.cumsum(np.bincount(a, minlength=n), out=indptr[1:])
+                arrays[f'{relation}.{direction}.indptr'] = indptr
+                arrays[f'{relation}.{direction}.indices'] = b[order].astype(np.int32)
+
+        return cls(node_keys, arrays)
+
+    @classmethod
+    def from_mappings(cls,
+                      mappings: Dict,
+                      company_names: Optional[Mapping] = None,
+                      deal_names: Optional[Mapping] = None) -> 'RelationshipGraph':
+        """
+        Build the graph from the nested mappings.json structure.
+
+        Args:
+            mappings (Dict): Parsed mappings.json
+            company_names (Mapping, optional): Anonymized company name -> company Record ID,
+                enables parent/child traversal between company nodes
+            deal_names (Mapping, optional): Anonymized deal name -> deal Record ID,
+                enables ticket <-> deal traversal between deal and ticket nodes
+
+        Returns:
+            RelationshipGraph: The built index
+        """
+        edges = {}
+        for section, relation in MAPPING_SECTIONS.items():
+            if mappings.get(section):
+                label_targets = RELATIONS[relation][1] in LABEL_NODE_TYPES
+                edges[relation] = _nested_to_edges(mappings[section], label_targets)
+
+        if company_names is not None:
+            edges['company_name_company'] = _alias_edges(company_names)
+        if deal_names is not None:
+            edges['deal_name_deal'] = _alias_edges(deal_names)
+
+        return cls.from_edges(edges)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        """
+        Write the index to a single memory-mappable binary file.
+
+        Layout: magic bytes, header length, JSON header describing every
+        array (dtype, shape, offset), then the raw 64-byte aligned arrays.
+
+        Args:
+            path (str): Output file path
+        """
+        named = {f'nodes.{t}': keys for t, keys in self.node_keys.items()}
+        named.update(self.arrays)
+
+        layout = {}
+        offset = 0
+        for name, array in named.items():
+            offset = -(-offset // _ALIGN) * _ALIGN
+            layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset += array.nbytes
+
+        header = json.dumps({'arrays': layout}).encode('utf-8')
+        data_start = -(-(len(_MAGIC) + 8 + len(header)) // _ALIGN) * _ALIGN
+
+        with open(path, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(np.uint64(len(header)).tobytes())
+            f.write(header)
+            for name, array in named.items():
+                f.seek(data_start + layout[name]['offset'])
+                f.write(np.ascontiguousarray(array).tobytes())
+
+    @classmethod
+    def load(cls, path: str) -> 'RelationshipGraph':
+        """
+        Open a saved index. Arrays are views onto a read-only memory map,
+        so only the pages that are actually touched get read from disk.
+
+        Args:
+            path (str): Path written by save()
+
+        Returns:
+            RelationshipGraph: The loaded index
+        """
+        with open(path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a relationship graph index")
+            header_len = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+            header = json.loads(f.read(header_len).decode('utf-8'))
+
+        data_start = -(-(len(_MAGIC) + 8 + header_len) // _ALIGN) * _ALIGN
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+
+        node_keys, arrays = {}, {}
+        for name, spec in header['arrays'].items():
+            array = np.ndarray(tuple(spec['shape']), dtype=np.dtype(spec['dtype']),
+                               buffer=buffer, offset=data_start + spec['offset'])
+            if name.startswith('nodes.'):
+                node_keys[name[len('nodes.'):]] = array
+            else:
+                arrays[name] = array
+
+        return cls(node_keys, arrays)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def _csr(self, relation: str, reverse: bool) -> Tuple[np.ndarray, np.ndarray, str, str]:
+        """Return (indptr, indices, source type, target type) for one direction."""
+        if relation not in self.relations:
+            raise KeyError(f"Relationship '{relation}' is not in this index")
+        src_type, dst_type = RELATIONS[relation]
+        direction = 'rev' if reverse else 'fwd'
+        if reverse:
+            src_type, dst_type = dst_type, src_type
+        return (self.arrays[f'{relation}.{direction}.indptr'],
+                self.arrays[f'{relation}.{direction}.indices'],
+                src_type, dst_type)
+
+    def node_index(self, node_type: str, keys) -> np.ndarray:
+        """
+        Map node keys to dense node positions (-1 for unknown keys).
+
+        Args:
+            node_type (str): Node type, e.g. 'company'
+            keys: Scalar or array of keys
+
+        Returns:
+            np.ndarray: Node positions
+        """
+        node_keys = self.node_keys.get(node_type)
+        keys = np.atleast_1d(np.asarray(keys))
+        if node_keys is None or len(node_keys) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+
+        if node_type in LABEL_NODE_TYPES:
+            keys = keys.astype(str)
+        else:
+            keys, valid = id_array(keys)
+            keys = np.where(valid, keys, -1)
+
+        positions = np.searchsorted(node_keys, keys)
+        positions = np.minimum(positions, len(node_keys) - 1)
+        return np.where(node_keys[positions] == keys, positions, -1)
+
+    def _expand(self, indptr: np.ndarray, indices: np.ndarray,
+                positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized CSR expansion: every input position -> all its neighbors.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (row in input, neighbor position) pairs
+        """
+        known = positions >= 0
+        rows = np.flatnonzero(known)
+        starts = indptr[positions[known]]
+        counts = indptr[positions[known] + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        # Offset of each edge inside its own adjacency run
+        run_start = np.repeat(np.cumsum(counts) - counts, counts)
+        edge_pos = np.repeat(starts, counts) + (np.arange(total) - run_start)
+        return np.repeat(rows, counts), indices[edge_pos].astype(np.int64)
+
+    def neighbors(self, relation: str, key, reverse: bool = False) -> np.ndarray:
+        """
+        Keys adjacent to a single node.
+
+        Args:
+            relation (str): Relationship name (see RELATIONS)
+            key: Source node key (Record ID, Ticket ID or anonymized name)
+            reverse (bool): Follow the relationship backwards
+
+        Returns:
+            np.ndarray: Neighbor keys
+        """
+        indptr, indices, src_type, dst_type = self._csr(relation, reverse)
+        position = self.node_index(src_type, key)[0]
+        if position < 0:
+            return self.node_keys[dst_type][:0]
+        return self.node_keys[dst_type][indices[indptr[position]:indptr[position + 1]]]
+
+    def join(self, relation: str, keys, reverse: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized batch join: all (source key, neighbor key) pairs for many sources.
+
+        Args:
+            relation (str): Relationship name (see RELATIONS)
+            keys: Array of source keys
+            reverse (bool): Follow the relationship backwards
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Aligned source keys and neighbor keys
+        """
+        keys = np.atleast_1d(np.asarray(keys))
+        indptr, indices, src_type, dst_type = self._csr(relation, reverse)
+        rows, neighbors = self._expand(indptr, indices, self.node_index(src_type, keys))
+        return keys[rows], self.node_keys[dst_type][neighbors]
+
+    def edges(self, relation: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Every edge of a relationship as (source key, target key) arrays.
+
+        Args:
+            relation (str): Relationship name (see RELATIONS)
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Source keys and target keys
+        """
+        src_type, _ = RELATIONS[relation]
+        return self.join(relation, self.node_keys[src_type])
+
+    def traverse(self, keys, path: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Multi-hop traversal. Each path step is a relationship name, prefixed
+        with '~' to follow it backwards, e.g. company -> deals -> tickets is
+        ['company_deals', '~deal_name_deal', '~ticket_deal_name'].
+
+        Args:
+            keys: Array of starting node keys
+            path (List[str]): Relationship steps
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Aligned (starting key, reached key) pairs,
+                de-duplicated per starting key
+        """
+        keys = np.atleast_1d(np.asarray(keys))
+        if not path:
+            return keys, keys
+
+        first = path[0].lstrip('~')
+        src_type = RELATIONS[first][1] if path[0].startswith('~') else RELATIONS[first][0]
+        origin = np.arange(len(keys))
+        current = self.node_index(src_type, keys)
+
+        node_type = src_type
+        for step in path:
+            reverse = step.startswith('~')
+            indptr, indices, step_src, node_type = self._csr(step.lstrip('~'), reverse)
+            rows, current = self._expand(indptr, indices, current)
+            origin = origin[rows]
+
+            # De-duplicate (origin, node) pairs so fan-in does not multiply rows
+            if len(origin):
+                width = np.int64(len(self.node_keys[node_type]))
+                pairs = np.unique(origin.astype(np.int64) * width + current)
+                origin, current = pairs // width, pairs % width
+
+        return keys[origin], self.node_keys[node_type][current]
+
+    def rollup(self, keys, path: List[str], values: pd.Series) -> pd.Series:
+        """
+        Sum a per-node value over everything reachable from each starting key,
+        e.g. total deal revenue under each parent company.
+
+        Args:
+            keys: Array of starting node keys
+            path (List[str]): Relationship steps (see traverse)
+            values (pd.Series): Values indexed by the reached node keys
+
+        Returns:
+            pd.Series: Rolled-up total per starting key
+        """
+        keys = np.atleast_1d(np.asarray(keys))
+        origin, reached = self.traverse(keys, path)
+        positions = values.index.get_indexer(reached)
+        found = positions >= 0
+        origin_pos = pd.Index(keys).get_indexer(origin[found])
+        totals = np.bincount(origin_pos, weights=values.to_numpy(dtype='float64')[positions[found]],
+                             minlength=len(keys))
+        return pd.Series(totals, index=keys)
+
+    # ------------------------------------------------------------------
+    # Common traversals
+    # ------------------------------------------------------------------
+
+    def deals_for_company(self, company_id) -> np.ndarray:
+        """Deal Record IDs associated with a company."""
+        return self.neighbors('company_deals', company_id)
+
+    def tickets_for_company(self, company_id) -> np.ndarray:
+        """Ticket IDs associated with a company."""
+        return self.neighbors('company_tickets', company_id)
+
+    def companies_for_deal(self, deal_id) -> np.ndarray:
+        """Company Record IDs a deal belongs to."""
+        return self.neighbors('company_deals', deal_id, reverse=True)
+
+    def companies_for_ticket(self, ticket_id) -> np.ndarray:
+        """Company Record IDs a ticket belongs to."""
+        return self.neighbors('company_tickets', ticket_id, reverse=True)
+
+    def tickets_for_deal(self, deal_id) -> np.ndarray:
+        """Ticket IDs linked to a deal (requires deal name aliases)."""
+        if 'deal_name_deal' not in self.relations or 'ticket_deal_name' not in self.relations:
+            return self.node_keys.get('ticket', np.empty(0, dtype=np.int64))[:0]
+        return self.traverse([deal_id], ['~deal_name_deal', '~ticket_deal_name'])[1]
+
+    def deals_for_ticket(self, ticket_id) -> np.ndarray:
+        """Deal Record IDs linked to a ticket (requires deal name aliases)."""
+        if 'deal_name_deal' not in self.relations or 'ticket_deal_name' not in self.relations:
+            return self.node_keys.get('deal', np.empty(0, dtype=np.int64))[:0]
+        return self.traverse([ticket_id], ['ticket_deal_name', 'deal_name_deal'])[1]
+
+    def parent_names(self, company_id) -> np.ndarray:
+        """Anonymized name of a company's parent company."""
+        if 'company_parent_name' not in self.relations:
+            return np.empty(0, dtype=str)
+        return self.neighbors('company_parent_name', company_id)
+
+    def children_of_name(self, parent_name: str) -> np.ndarray:
+        """Company Record IDs whose parent has the given anonymized name."""
+        if 'company_parent_name' not in self.relations:
+            return np.empty(0, dtype=np.int64)
+        return self.neighbors('company_parent_name', parent_name, reverse=True)
+
+    def children(self, company_id) -> np.ndarray:
+        """Child company Record IDs of a company (requires company name aliases)."""
+        if 'company_name_company' not in self.relations or 'company_parent_name' not in self.relations:
+            return np.empty(0, dtype=np.int64)
+        return self.traverse([company_id], ['~company_name_company', '~company_parent_name'])[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of all index arrays in bytes."""
+        return (sum(a.nbytes for a in self.arrays.values()) +
+                sum(k.nbytes for k in self.node_keys.values()))
+
+
+def load_or_build(mappings_file: str,
+                  index_file: Optional[str] = None,
+                  company_names: Optional[Mapping] = None,
+                  deal_names: Optional[Mapping] = None) -> RelationshipGraph:
+    """
+    Open the binary index for a mappings file, rebuilding it when the JSON
+    is newer than the index (or the index does not exist yet).
+
+    Args:
+        mappings_file (str): Path to mappings.json
+        index_file (str, optional): Path of the binary index; defaults to
+            the mappings file with a '.graph' extension
+        company_names (Mapping, optional): See RelationshipGraph.from_mappings
+        deal_names (Mapping, optional): See RelationshipGraph.from_mappings
+
+    Returns:
+        RelationshipGraph: The loaded index
+    """
+    if index_file is None:
+        index_file = os.path.splitext(mappings_file)[0] + '.graph'
+
+    if (os.path.exists(index_file) and
+            os.path.getmtime(index_file) >= os.path.getmtime(mappings_file)):
+        graph = RelationshipGraph.load(index_file)
+        # Rebuild if name aliases were supplied but the saved index was built without them
+        missing_aliases = ((company_names is not None and 'company_name_company' not in graph.relations) or
+                           (deal_names is not None and 'deal_name_deal' not in graph.relations))
+        if not missing_aliases:
+            return graph
+
+    with open(mappings_file, 'r') as f:
+        mappings = json.load(f)
+
+    graph = RelationshipGraph.from_mappings(mappings, company_names=company_names, deal_names=deal_names)
+    try:
+        graph.save(index_file)
+        print(f"Relationship index saved to {index_file}")
+    except OSError as e:
+        print(f"Warning: Could not save relationship index: {e}")
+    return graph
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the binary relationship index from mappings.json")
+    parser.add_argument('mappings_file', help="Path to mappings.json")
+    parser.add_argument('--output', help="Index path (defaults to <mappings>.graph)")
+    parser.add_argument('--deals', help="Anonymized deals CSV with 'Deal Name' and 'Record ID'")
+    parser.add_argument('--companies', help="Anonymized companies CSV with 'Company name' and 'Record ID'")
+    args = parser.parse_args()
+
+    deal_names = company_names = None
+    if args.deals:
+        deals = pd.read_csv(args.deals, usecols=['Deal Name', 'Record ID'])
+        deal_names = deals.set_index('Deal Name')['Record ID']
+    if args.companies:
+        companies = pd.read_csv(args.companies, usecols=['Company name', 'Record ID'], low_memory=False)
+        company_names = companies.set_index('Company name')['Record ID']
+
+    with open(args.mappings_file, 'r') as f:
+        mappings = json.load(f)
+
+    graph = RelationshipGraph.from_mappings(mappings, company_names=company_names, deal_names=deal_names)
+    output = args.output or os.path.splitext(args.mappings_file)[0] + '.graph'
+    graph.save(output)
+    print(f"Saved {', '.join(graph.relations)} ({graph.nbytes / 1024:.0f} KB) to {output}")
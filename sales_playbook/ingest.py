@@ -0,0 +1,200 @@
+"""
+Typed CSV ingest for the HubSpot exports.
+
+Date columns are parsed once, with a format detected from a small sample of
+each column, and the typed frame is pickled next to the CSV. Later loads
+read the pickle (datetime64 columns included) as long as it is newer than
+the CSV, and the analyzers skip columns that are already datetime64.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+# Date columns across the deals, tickets and companies exports
+DATE_COLUMNS: List[str] = [
+    # Deals
+    'Create Date', 'Close Date', 'Last Activity Date', 'Last Modified Date',
+    'Contract Start Date', 'Contract End Date', 'Trial Start date', 'Trial End Date',
+    # Tickets
+    'Create date', 'Close date', 'Last modified date', 'Latest Milestone Update Date',
+    'Target Launch Date', 'Trial Start Date', '1st Syms presented for review',
+    'Stage Date - Project Initiation', 'Stage Date - Planning Phase',
+    'Stage Date - Project Launch', 'Stage Date - Execution',
+    'Stage Date - Monitoring and Control Phase', 'Stage Date - Closure Phase',
+    'Stage Date - Converted Won',
+]
+
+# Tried in order; the first format that parses the whole sample wins
+CANDIDATE_FORMATS: List[str] = [
+    '%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d',
+    '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%S.%f',
+    '%m/%d/%Y %H:%M', '%m/%d/%Y', '%d/%m/%Y %H:%M', '%d/%m/%Y',
+    'ISO8601',
+]
+
+EPOCH_SECONDS = 'epoch_s'
+EPOCH_MILLISECONDS = 'epoch_ms'
+
+
+def detect_datetime_format(values: pd.Series, sample_size: int = 500) -> Optional[str]:
+    """
+    Detect the format of a date column from a sample of its values.
+
+    Args:
+        values (pd.Series): Raw column
+        sample_size (int): Number of non-null values to test
+
+    Returns:
+        Optional[str]: A strftime format, 'ISO8601', EPOCH_SECONDS /
+            EPOCH_MILLISECONDS for numeric timestamps, or None if no
+            candidate parses the whole sample
+    """
+    sample = values.dropna()
+    if sample.empty:
+        return None
+    sample = sample.iloc[np.linspace(0, len(sample) - 1, min(sample_size, len(sample))).astype(int)]
+
+    if pd.api.types.is_numeric_dtype(sample):
+        # Epoch milliseconds pass 1e11 in 1973; seconds will not until year 5138
+        return EPOCH_MILLISECONDS if sample.abs().median() > 1e11 else EPOCH_SECONDS
+
+    sample = sample.astype(str)
+    for fmt in CANDIDATE_FORMATS:
+        if pd.to_datetime(sample, format=fmt, errors='coerce').notna().all():
+            return fmt
+    return None
+
+
+def parse_datetime(values: pd.Series, fmt: Optional[str] = None) -> pd.Series:
+    """
+    Parse a column to datetime64 with an explicit (or detected) format.
+
+    Columns that are already datetime64 are returned unchanged.
+
+    Args:
+        values (pd.Series): Raw column
+        fmt (str, optional): Format from detect_datetime_format; detected
+            when omitted
+
+    Returns:
+        pd.Series: datetime64 column, NaT where a value does not match
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    fmt = fmt or detect_datetime_format(values)
+    if fmt == EPOCH_SECONDS:
+        return pd.to_datetime(values, unit='s', errors='coerce')
+    if fmt == EPOCH_MILLISECONDS:
+        return pd.to_datetime(values, unit='ms', errors='coerce')
+    if fmt is None:
+        # Nothing matched the sample; fall back to per-element inference
+        return pd.to_datetime(values, errors='coerce')
+    return pd.to_datetime(values, format=fmt, errors='coerce')
+
+
+def parse_date_columns(df: pd.DataFrame, columns: Optional[List[str]] = None) -> Dict[str, Optional[str]]:
+    """
+    Parse date columns of df in place, skipping ones that are already typed.
+
+    Args:
+        df (pd.DataFrame): Frame to convert
+        columns (List[str], optional): Columns to parse; defaults to DATE_COLUMNS
+
+    Returns:
+        Dict[str, Optional[str]]: Detected format for each column parsed
+    """
+    formats = {}
+    for col in (DATE_COLUMNS if columns is None else columns):
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            formats[col] = detect_datetime_format(df[col])
+            df[col] = parse_datetime(df[col], formats[col])
+    return formats
+
+
+def data_version(*paths: str) -> str:
+    """
+    Short fingerprint of input files, for keying caches on the data they read.
+
+    Args:
+        *paths (str): Files the cached result depends on; missing files count
+            as absent rather than failing
+
+    Returns:
+        str: 12-character hex digest of each file's size and mtime
+    """
+    digest = hashlib.md5()
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f'{path}:{stat.st_size}:{stat.st_mtime_ns}\n'.encode())
+        else:
+            digest.update(f'{path}:missing\n'.encode())
+    return digest.hexdigest()[:12]
+
+
+def _stable(value):
+    """value with dict keys sorted at every level, so its repr is order-independent."""
+    if isinstance(value, dict):
+        return sorted((repr(k), _stable(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [_stable(v) for v in value]
+    return value
+
+
+def options_hash(**options) -> str:
+    """
+    Short hash of keyword options, independent of their order.
+
+    Args:
+        **options: Options a cached result depends on
+
+    Returns:
+        str: 8-character hex digest
+    """
+    return hashlib.md5(repr(_stable(options)).encode()).hexdigest()[:8]
+
+
+def load_typed_csv(path: str,
+                   date_columns: Optional[List[str]] = None,
+                   cache_file: Optional[str] = None,
+                   **read_csv_kwargs) -> pd.DataFrame:
+    """
+    Read a CSV with its date columns parsed, reusing a pickled typed copy.
+
+    Args:
+        path (str): CSV file
+        date_columns (List[str], optional): Columns to parse; defaults to DATE_COLUMNS
+        cache_file (str, optional): Typed copy; defaults to <path minus .csv>.typed.pkl,
+            with a short hash of date_columns and read_csv_kwargs added when
+            they are given
+        **read_csv_kwargs: Passed to pd.read_csv
+
+    Returns:
+        pd.DataFrame: Frame with datetime64 date columns
+    """
+    if cache_file is None:
+        # Different column selections and read options get their own typed copy
+        key = ''
+        if date_columns is not None or read_csv_kwargs:
+            key = '.' + options_hash(date_columns=date_columns, read_csv_kwargs=read_csv_kwargs)
+        cache_file = os.path.splitext(path)[0] + key + '.typed.pkl'
+
+    if os.path.exists(cache_file) and os.path.getmtime(cache_file) >= os.path.getmtime(path):
+        df = pd.read_pickle(cache_file)
+        # Columns requested since the cache was written are parsed and saved back
+        if parse_date_columns(df, date_columns):
+            df.to_pickle(cache_file)
+        return df
+
+    df = pd.read_csv(path, **read_csv_kwargs)
+    parse_date_columns(df, date_columns)
+    try:
+        df.to_pickle(cache_file)
+    except OSError:
+        # Read-only data directory: keep the parsed frame, just don't persist it
+        pass
+    return df
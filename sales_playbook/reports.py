@@ -0,0 +1,677 @@
+"""
+Batch-rendered figure reports for the ticket and company analyzers.
+
+The analyzers in sales-pipeline-processing.ipynb drew one figure at a time
+with pyplot, and several plot methods re-ran the same analyze_* call
+(every win-rate chart recomputed the deal performance groupbys). Here each
+chart is split in two:
+
+    <chart>_figure(aggregates)   picks the plain data the chart needs from
+                                 already computed aggregates and returns a
+                                 ReportFigure, or None when the data is missing
+    _draw_<chart>(fig, **data)   draws it onto a Matplotlib Figure
+
+ticket_figures() and company_figures() run every analyze_* method of an
+analyzer once and share the results between its charts. build_report()
+then renders the figures across a process pool to PNG/SVG/PDF files and
+writes an index.html that bundles them. Workers draw on bare Figure
+objects (Agg canvas, no pyplot state), so nothing opens a window. The
+notebook plot_* methods draw the same ReportFigure onto a pyplot figure.
+"""
+
+import html
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from matplotlib import colormaps
+from matplotlib.dates import DateFormatter, MonthLocator
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.colors import ListedColormap
+from matplotlib.ticker import FuncFormatter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+MILESTONE_SEQUENCE: List[str] = [
+    'Stage Date - Project Initiation',
+    'Stage Date - Project Launch',
+    'Stage Date - Execution',
+    'Stage Date - Closure Phase',
+    'Stage Date - Converted Won',
+]
+
+COMPANY_SIZE_ORDER: List[str] = ['Very Small', 'Small', 'Medium', 'Large', 'Enterprise']
+
+# Categories with fewer records are left out of the per-attribute charts
+MIN_CATEGORY_COUNT = 5
+
+SEGMENT_COLORS: Dict[str, str] = {
+    'Strategic (High Value, Quick Implementation)': 'green',
+    'Complex (High Value, Long Implementation)': 'orange',
+    'Transactional (Low Value, Quick Implementation)': 'blue',
+    'Resource-Intensive (Low Value, Long Implementation)': 'red',
+}
+
+_ATTRIBUTE_KEYS: Dict[str, Tuple[str, str]] = {
+    'industry': ('by_industry', 'Industry'),
+    'size': ('by_company_size', 'Company Size'),
+    'region': ('by_region', 'Region'),
+    'deal_size': ('by_deal_size', 'Deal Size'),
+}
+
+
+class ReportFigure:
+    """
+    A chart's data plus the function that draws it; picklable for the pool.
+    """
+
+    def __init__(self, name: str, title: str, draw: Callable, data: Dict, figsize: Tuple[float, float]):
+        """
+        Args:
+            name (str): File name stem, unique within a report section
+            title (str): Caption in the HTML report
+            draw (Callable): Module-level function draw(fig, **data)
+            data (Dict): Plain data the chart needs
+            figsize (Tuple[float, float]): Size in inches
+        """
+        self.name = name
+        self.title = title
+        self._draw = draw
+        self.data = data
+        self.figsize = figsize
+
+    def draw(self, fig: Optional[Figure] = None) -> Figure:
+        """
+        Draw the chart.
+
+        Args:
+            fig (Figure, optional): Figure to draw on (e.g. plt.figure() in a
+                notebook); a new non-pyplot Figure by default
+
+        Returns:
+            Figure: The drawn figure
+        """
+        if fig is None:
+            fig = Figure(figsize=self.figsize)
+        else:
+            fig.set_size_inches(*self.figsize)
+        self._draw(fig, **self.data)
+        return fig
+
+
+def _palette(n: int) -> np.ndarray:
+    return colormaps['viridis'](np.linspace(0, 1, max(n, 1)))
+
+
+def _annotate(ax, text: str, x: float, y: float, ha: str, va: str) -> None:
+    ax.annotate(text, xy=(x, y), xycoords='axes fraction', ha=ha, va=va, fontsize=12,
+                bbox=dict(boxstyle="round,pad=0.5", fc="white", alpha=0.8))
+
+
+def _rotate_xticks(ax, rotation: int = 45, ha: str = 'right') -> None:
+    for label in ax.get_xticklabels():
+        label.set_rotation(rotation)
+        label.set_ha(ha)
+
+
+def _metric_key(metrics: Dict, name: str):
+    """Key of a metric in a groupby .to_dict(), flat ('mean') or MultiIndex (('x', 'count'))."""
+    for key in metrics:
+        if key == name or (isinstance(key, tuple) and name in key):
+            return key
+    return None
+
+
+# ----- Renderers -----
+
+def _draw_duration_histogram(fig: Figure, durations: np.ndarray) -> None:
+    ax = fig.subplots()
+    counts, edges, _ = ax.hist(durations, bins=20, alpha=0.6, edgecolor='white')
+    if len(durations) > 1 and np.std(durations) > 0:
+        # Gaussian KDE (Scott's bandwidth) scaled to the histogram counts
+        bandwidth = np.std(durations, ddof=1) * len(durations) ** (-1 / 5)
+        grid = np.linspace(edges[0], edges[-1], 200)
+        density = np.exp(-0.5 * ((grid[:, None] - durations[None, :]) / bandwidth) ** 2).sum(axis=1)
+        density /= len(durations) * bandwidth * np.sqrt(2 * np.pi)
+        ax.plot(grid, density * len(durations) * (edges[1] - edges[0]))
+
+    mean, median = durations.mean(), np.median(durations)
+    ax.axvline(mean, color='red', linestyle='--', label=f'Mean: {mean:.1f} days')
+    ax.axvline(median, color='green', linestyle=':', label=f'Median: {median:.1f} days')
+    ax.set_title('Distribution of Implementation Duration', fontsize=16)
+    ax.set_xlabel('Duration (Days)', fontsize=14)
+    ax.set_ylabel('Frequency', fontsize=14)
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    _annotate(ax, (f"n = {len(durations)}\nMean: {mean:.1f} days\nMedian: {median:.1f} days\n"
+                   f"Min: {durations.min():.1f} days\nMax: {durations.max():.1f} days"),
+              0.95, 0.95, 'right', 'top')
+    fig.tight_layout()
+
+
+def _draw_milestone_progression(fig: Figure, names: List[str], counts: List[int], conversion: List[Optional[float]]) -> None:
+    ax = fig.subplots()
+    ax.bar(names, counts, color='skyblue')
+    for i, count in enumerate(counts):
+        ax.text(i, count + 1, str(count), ha='center', fontweight='bold')
+    for i, rate in enumerate(conversion):
+        if rate is not None:
+            ax.annotate(f"{rate:.1f}%", xy=(i + 0.5, (counts[i] + counts[i + 1]) / 2), xytext=(0, 20),
+                        textcoords='offset points', ha='center', va='bottom',
+                        bbox=dict(boxstyle="round,pad=0.3", fc='white', alpha=0.8),
+                        arrowprops=dict(arrowstyle="->", connectionstyle="arc3,rad=.2"))
+    ax.set_title('Project Milestone Progression', fontsize=16)
+    ax.set_xlabel('Milestone', fontsize=14)
+    ax.set_ylabel('Number of Projects', fontsize=14)
+    ax.grid(True, alpha=0.3, axis='y')
+    _rotate_xticks(ax)
+    fig.tight_layout()
+
+
+def _draw_training_completion(fig: Figure, names: List[str], rates: List[float], overall: float) -> None:
+    ax = fig.subplots()
+    ax.barh(names, rates, color='lightgreen')
+    for i, rate in enumerate(rates):
+        ax.text(rate + 1, i, f"{rate:.1f}%", va='center')
+    ax.set_title('Training Completion Rates', fontsize=16)
+    ax.set_xlabel('Completion Rate (%)', fontsize=14)
+    ax.grid(True, alpha=0.3, axis='x')
+    _annotate(ax, f"Overall completion rate: {overall:.1f}%", 0.95, 0.05, 'right', 'bottom')
+    fig.tight_layout()
+
+
+def _draw_monthly_trends(fig: Figure, months: pd.Series, tickets: np.ndarray, days: np.ndarray) -> None:
+    ax1 = fig.subplots()
+    ax1.set_xlabel('Month', fontsize=14)
+    ax1.set_ylabel('Number of Implementations', color='tab:blue', fontsize=14)
+    ax1.bar(months, tickets, width=20, color='tab:blue', alpha=0.7)
+    ax1.tick_params(axis='y', labelcolor='tab:blue')
+    ax1.xaxis.set_major_formatter(DateFormatter('%b %Y'))
+    ax1.xaxis.set_major_locator(MonthLocator(interval=2))
+    _rotate_xticks(ax1)
+
+    ax2 = ax1.twinx()
+    ax2.set_ylabel('Avg. Implementation Days', color='tab:red', fontsize=14)
+    ax2.plot(months, days, color='tab:red', marker='o')
+    ax2.tick_params(axis='y', labelcolor='tab:red')
+    ax1.set_title('Monthly Implementation Trends', fontsize=16)
+    ax1.legend(['New Implementations'], loc='upper left')
+    ax2.legend(['Avg. Duration'], loc='upper right')
+    fig.tight_layout()
+
+
+def _draw_pie(fig: Figure, labels: List[str], values: List[int], colors, title: str, legend_title: str) -> None:
+    ax = fig.subplots()
+    wedges, _, autotexts = ax.pie(values, labels=None, autopct='%1.1f%%', colors=colors, startangle=90,
+                                  wedgeprops={'edgecolor': 'white', 'linewidth': 1})
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+    ax.legend(wedges, [f"{label} ({value})" for label, value in zip(labels, values)],
+              title=legend_title, loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
+    ax.set_title(title, fontsize=16)
+    ax.axis('equal')
+    fig.tight_layout()
+
+
+def _draw_deal_vs_duration(fig: Figure, amount: np.ndarray, days: np.ndarray) -> None:
+    ax = fig.subplots()
+    points = ax.scatter(amount, days, alpha=0.7, c=days, cmap='viridis', s=100)
+    slope, intercept = np.polyfit(amount, days, 1)
+    order = np.argsort(amount)
+    ax.plot(amount[order], slope * amount[order] + intercept, "r--", alpha=0.8,
+            label=f"Trend: y={slope:.2e}x + {intercept:.2f}")
+    ax.set_title('Relationship: Deal Size vs. Implementation Duration', fontsize=16)
+    ax.set_xlabel('Deal Amount', fontsize=14)
+    ax.set_ylabel('Implementation Duration (Days)', fontsize=14)
+    ax.xaxis.set_major_formatter(FuncFormatter(lambda x, _: f'${x:,.0f}'))
+    ax.grid(True, alpha=0.3)
+    fig.colorbar(points, ax=ax, label='Implementation Days')
+    ax.legend()
+    _annotate(ax, f"Correlation: {np.corrcoef(amount, days)[0, 1]:.2f}", 0.05, 0.95, 'left', 'top')
+    fig.tight_layout()
+
+
+def _draw_ranked_bars(fig: Figure, labels: List[str], values: List[float], title: str,
+                      xlabel: str, ylabel: str, label_format: str, label_offset: float) -> None:
+    ax = fig.subplots()
+    positions = np.arange(len(values))
+    ax.barh(positions, values, color=_palette(len(values)))
+    ax.set_yticks(positions, labels)
+    # Largest at the top, as seaborn's categorical axis drew it
+    ax.invert_yaxis()
+    for i, value in enumerate(values):
+        ax.text(value + label_offset, i, label_format.format(value), va='center')
+    ax.set_title(title, fontsize=16)
+    ax.set_xlabel(xlabel, fontsize=14)
+    ax.set_ylabel(ylabel, fontsize=14)
+    ax.grid(True, alpha=0.3, axis='x')
+    fig.tight_layout()
+
+
+def _draw_company_growth(fig: Figure, months: pd.Series, new: np.ndarray, total: np.ndarray) -> None:
+    ax1 = fig.subplots()
+    ax1.bar(months, new, width=20, color='skyblue', alpha=0.7)
+    ax1.set_xlabel('Month', fontsize=14)
+    ax1.set_ylabel('New Companies', fontsize=14, color='skyblue')
+    ax1.tick_params(axis='y', labelcolor='skyblue')
+    ax2 = ax1.twinx()
+    ax2.plot(months, total, 'r-', linewidth=2)
+    ax2.set_ylabel('Total Companies', fontsize=14, color='red')
+    ax2.tick_params(axis='y', labelcolor='red')
+    ax1.xaxis.set_major_formatter(DateFormatter('%b %Y'))
+    _rotate_xticks(ax1, ha='center')
+    ax1.set_title('Company Growth Over Time', fontsize=16)
+    fig.tight_layout()
+
+
+def _draw_journey(fig: Figure, categories: List[str], mean: List[float], median: List[float],
+                  count: List[int], title: str, attr_name: str) -> None:
+    ax = fig.subplots()
+    x = np.arange(len(categories))
+    width = 0.35
+    means = ax.bar(x - width / 2, mean, width, label='Mean', color='skyblue')
+    medians = ax.bar(x + width / 2, median, width, label='Median', color='lightgreen')
+    ax.set_xlabel(attr_name, fontsize=14)
+    ax.set_ylabel('Days from Deal to Implementation', fontsize=14)
+    ax.set_title(title, fontsize=16)
+    ax.set_xticks(x, categories)
+    _rotate_xticks(ax)
+    ax.legend()
+    for i, n in enumerate(count):
+        ax.text(i, max(mean) * 1.05, f"n={n}", ha='center', va='bottom', fontsize=9, alpha=0.7)
+    for rect in list(means) + list(medians):
+        height = rect.get_height()
+        ax.text(rect.get_x() + rect.get_width() / 2., height + 0.5, f"{height:.1f}", ha='center', va='bottom', fontsize=9)
+    ax.grid(True, alpha=0.3, axis='y')
+    fig.tight_layout()
+
+
+def _draw_segmentation_matrix(fig: Figure, amount: np.ndarray, days: np.ndarray) -> None:
+    ax = fig.subplots()
+    median_amount, median_days = np.median(amount), np.median(days)
+    high_value = amount >= median_amount
+    long_implementation = days >= median_days
+    quadrants = list(SEGMENT_COLORS)
+    # Strategic, Complex, Transactional, Resource-Intensive
+    codes = np.where(high_value, np.where(long_implementation, 1, 0), np.where(long_implementation, 3, 2))
+    counts = np.bincount(codes, minlength=4)
+    ax.scatter(amount, days, c=codes, cmap=ListedColormap(list(SEGMENT_COLORS.values())),
+               vmin=0, vmax=3, alpha=0.7, s=80)
+    ax.axvline(x=median_amount, color='gray', linestyle='--', alpha=0.5)
+    ax.axhline(y=median_days, color='gray', linestyle='--', alpha=0.5)
+    labels = [
+        (amount.max() * 0.75, days.min() * 1.1, 'Strategic', 0),
+        (amount.max() * 0.75, days.max() * 0.9, 'Complex', 1),
+        (amount.min() * 1.5, days.min() * 1.1, 'Transactional', 2),
+        (amount.min() * 1.5, days.max() * 0.9, 'Resource-Intensive', 3),
+    ]
+    for x, y, name, code in labels:
+        ax.text(x, y, f"{name}\n({counts[code]} companies)", fontsize=12, ha='center', va='center',
+                color=SEGMENT_COLORS[quadrants[code]])
+    ax.set_xscale('log')
+    ax.set_xlabel('Deal Amount ($)', fontsize=14)
+    ax.set_ylabel('Implementation Time (Days)', fontsize=14)
+    ax.set_title('Customer Segmentation Matrix', fontsize=16)
+    ax.legend(handles=[Line2D([0], [0], marker='o', color='w', markerfacecolor=color, markersize=10, label=quadrant)
+                       for quadrant, color in SEGMENT_COLORS.items()],
+              title="Segments", loc='upper center', bbox_to_anchor=(0.5, -0.05), ncol=2)
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+
+
+# ----- Ticket charts -----
+
+def duration_histogram_figure(tickets: pd.DataFrame) -> Optional[ReportFigure]:
+    """Implementation durations up to Q3 + 1.5 IQR, from processed tickets."""
+    if 'Implementation_Duration_Days' not in tickets.columns:
+        return None
+    durations = tickets['Implementation_Duration_Days'].dropna()
+    if durations.empty:
+        return None
+    q1, q3 = durations.quantile([0.25, 0.75])
+    durations = durations[durations <= q3 + 1.5 * (q3 - q1)].to_numpy(dtype=np.float64)
+    return ReportFigure('implementation_duration', 'Distribution of Implementation Duration',
+                        _draw_duration_histogram, {'durations': durations}, (12, 6))
+
+
+def milestone_figure(milestone_stats: Dict) -> Optional[ReportFigure]:
+    """Milestone counts and step conversion, from analyze_implementation_milestones()."""
+    if 'milestone_counts' not in milestone_stats:
+        return None
+    counts = milestone_stats['milestone_counts']
+    conversion = milestone_stats.get('milestone_conversion', {})
+    milestones = [m for m in MILESTONE_SEQUENCE if m in counts]
+    rates = [conversion.get(f"{current} → {following}")
+             for current, following in zip(milestones, milestones[1:])]
+    return ReportFigure('milestone_progression', 'Project Milestone Progression', _draw_milestone_progression,
+                        {'names': [m.replace('Stage Date - ', '') for m in milestones],
+                         'counts': [int(counts[m]) for m in milestones], 'conversion': rates}, (14, 7))
+
+
+def training_figure(training_stats: Dict) -> Optional[ReportFigure]:
+    """Per-training completion rates, from analyze_training_completion()."""
+    individual = training_stats.get('individual_training_completion') if training_stats else None
+    if not individual:
+        return None
+    return ReportFigure('training_completion', 'Training Completion Rates', _draw_training_completion,
+                        {'names': [name.replace('Training: ', '') for name in individual],
+                         'rates': [float(stats['percentage']) for stats in individual.values()],
+                         'overall': float(training_stats.get('overall_completion_rate', 0))}, (12, 6))
+
+
+def monthly_trends_figure(time_trends: Dict) -> Optional[ReportFigure]:
+    """Tickets and mean duration per month, from analyze_time_trends()."""
+    if not time_trends or 'monthly_trends' not in time_trends:
+        return None
+    monthly = pd.DataFrame(time_trends['monthly_trends'])
+    monthly['Date'] = pd.to_datetime(monthly['YearMonth'] + '-01')
+    monthly = monthly.sort_values('Date')
+    return ReportFigure('monthly_trends', 'Monthly Implementation Trends', _draw_monthly_trends,
+                        {'months': monthly['Date'], 'tickets': monthly['TicketCount'].to_numpy(),
+                         'days': monthly['AvgImplementationDays'].to_numpy()}, (14, 7))
+
+
+def status_figure(status_stats: Dict) -> Optional[ReportFigure]:
+    """Ticket status shares, from analyze_status_distribution()."""
+    if not status_stats or 'status_counts' not in status_stats:
+        return None
+    counts = status_stats['status_counts']
+    names = sorted(counts)
+    colors = ['green' if s.lower() == 'closed' else 'orange' if 'waiting' in s.lower()
+              else 'blue' if s.lower() == 'in progress' else 'gray' for s in names]
+    return ReportFigure('implementation_status', 'Implementation Ticket Status Distribution', _draw_pie,
+                        {'labels': names, 'values': [int(counts[s]) for s in names], 'colors': colors,
+                         'title': 'Implementation Ticket Status Distribution', 'legend_title': 'Ticket Status'},
+                        (10, 6))
+
+
+def deal_duration_figure(joined: Optional[pd.DataFrame]) -> Optional[ReportFigure]:
+    """Deal amount against implementation duration, from the ticket-deal join."""
+    if joined is None or 'Amount' not in joined.columns or 'Implementation_Duration_Days' not in joined.columns:
+        return None
+    valid = joined[(joined['Amount'] > 0) & (joined['Implementation_Duration_Days'] > 0)]
+    if len(valid) < MIN_CATEGORY_COUNT:
+        return None
+    return ReportFigure('deal_vs_implementation', 'Deal Size vs. Implementation Duration', _draw_deal_vs_duration,
+                        {'amount': valid['Amount'].to_numpy(dtype=np.float64),
+                         'days': valid['Implementation_Duration_Days'].to_numpy(dtype=np.float64)}, (12, 8))
+
+
+def ticket_figures(analyzer) -> List[ReportFigure]:
+    """
+    Every TicketAnalyzer chart, with each analysis run once.
+
+    Args:
+        analyzer: TicketAnalyzer from sales-pipeline-processing.ipynb
+
+    Returns:
+        List[ReportFigure]: Charts whose data is available
+    """
+    tickets = analyzer.processed_tickets if analyzer.processed_tickets is not None else analyzer.preprocess_tickets()
+    joined = analyzer.joined_data
+    if joined is None and analyzer.deals is not None and analyzer.ticket_to_deal_mapping is not None:
+        joined = analyzer.join_tickets_with_deals()
+    figures = [
+        duration_histogram_figure(tickets),
+        milestone_figure(analyzer.analyze_implementation_milestones()),
+        training_figure(analyzer.analyze_training_completion()),
+        monthly_trends_figure(analyzer.analyze_time_trends()),
+        status_figure(analyzer.analyze_status_distribution()),
+        deal_duration_figure(joined),
+    ]
+    return [figure for figure in figures if figure is not None]
+
+
+# ----- Company charts -----
+
+def industry_distribution_figure(companies: pd.DataFrame) -> Optional[ReportFigure]:
+    """Top ten industries by company count, from processed companies."""
+    if 'Industry_Standardized' not in companies.columns:
+        return None
+    counts = companies['Industry_Standardized'].value_counts().nlargest(10)
+    return ReportFigure('industry_distribution', 'Companies by Industry (Top 10)', _draw_ranked_bars,
+                        {'labels': counts.index.astype(str).tolist(), 'values': counts.astype(float).tolist(),
+                         'title': 'Companies by Industry (Top 10)', 'xlabel': 'Number of Companies',
+                         'ylabel': 'Industry', 'label_format': '{:.0f}', 'label_offset': 0.5}, (12, 7))
+
+
+def size_distribution_figure(companies: pd.DataFrame) -> Optional[ReportFigure]:
+    """Company size shares, from processed companies."""
+    if 'Company_Size_Category' not in companies.columns:
+        return None
+    counts = companies['Company_Size_Category'].value_counts().reindex(COMPANY_SIZE_ORDER).dropna()
+    return ReportFigure('company_size', 'Company Size Distribution', _draw_pie,
+                        {'labels': counts.index.tolist(), 'values': counts.astype(int).tolist(),
+                         'colors': _palette(len(counts)), 'title': 'Company Size Distribution',
+                         'legend_title': 'Company Size'}, (10, 6))
+
+
+def technology_figure(companies: pd.DataFrame) -> Optional[ReportFigure]:
+    """Adoption rate of each Uses_ technology flag, from processed companies."""
+    columns = [col for col in companies.columns if col.startswith('Uses_')]
+    if not columns:
+        return None
+    adoption = (companies[columns].mean() * 100).sort_values(ascending=False)
+    return ReportFigure('technology_adoption', 'Technology Adoption Rates', _draw_ranked_bars,
+                        {'labels': [col.replace('Uses_', '').replace('_', ' ') for col in adoption.index],
+                         'values': adoption.tolist(), 'title': 'Technology Adoption Rates',
+                         'xlabel': 'Adoption Rate (%)', 'ylabel': 'Technology', 'label_format': '{:.1f}%',
+                         'label_offset': 1}, (12, 6))
+
+
+def company_growth_figure(companies: pd.DataFrame) -> Optional[ReportFigure]:
+    """New and cumulative companies per month, from processed companies."""
+    if 'Create_YearMonth' not in companies.columns:
+        return None
+    monthly = companies['Create_YearMonth'].value_counts().sort_index()
+    return ReportFigure('company_growth', 'Company Growth Over Time', _draw_company_growth,
+                        {'months': pd.to_datetime(monthly.index.to_series() + '-01').reset_index(drop=True),
+                         'new': monthly.to_numpy(), 'total': monthly.cumsum().to_numpy()}, (14, 7))
+
+
+def win_rate_figure(deal_metrics: Optional[Dict], attribute: str = 'industry') -> Optional[ReportFigure]:
+    """
+    Win rate per company attribute, from analyze_deal_performance_by_company().
+
+    Args:
+        deal_metrics (Dict, optional): Deal performance metrics
+        attribute (str): 'industry', 'size' or 'region'
+
+    Returns:
+        ReportFigure or None: None without metrics or enough deals
+    """
+    key, attr_name = _ATTRIBUTE_KEYS.get(attribute, (None, None))
+    if not deal_metrics or key not in deal_metrics:
+        return None
+    metrics = deal_metrics[key]
+    rate_key, count_key = _metric_key(metrics, 'win_rate'), _metric_key(metrics, 'count')
+    if rate_key is None or count_key is None:
+        return None
+    rates = pd.Series({category: rate for category, rate in metrics[rate_key].items()
+                       if metrics[count_key].get(category, 0) >= MIN_CATEGORY_COUNT and pd.notna(rate)})
+    if rates.empty:
+        return None
+    rates = rates.sort_values(ascending=False)
+    return ReportFigure(f'win_rate_{attribute}', f'Win Rate by {attr_name}', _draw_ranked_bars,
+                        {'labels': rates.index.astype(str).tolist(), 'values': rates.astype(float).tolist(),
+                         'title': f'Win Rate by {attr_name}', 'xlabel': 'Win Rate (%)', 'ylabel': attr_name,
+                         'label_format': '{:.1f}%', 'label_offset': 2}, (12, 7))
+
+
+def implementation_duration_figure(impl_metrics: Optional[Dict], attribute: str = 'industry') -> Optional[ReportFigure]:
+    """
+    Mean implementation days per company attribute, from
+    analyze_implementation_success_by_company().
+
+    Args:
+        impl_metrics (Dict, optional): Implementation success metrics
+        attribute (str): 'industry', 'size' or 'region'
+
+    Returns:
+        ReportFigure or None: None without metrics or enough tickets
+    """
+    key, attr_name = _ATTRIBUTE_KEYS.get(attribute, (None, None))
+    if not impl_metrics or key not in impl_metrics:
+        return None
+    metrics = impl_metrics[key]
+    count_key = ('Implementation_Completed', 'count')
+    if 'mean' not in metrics or count_key not in metrics:
+        return None
+    durations = pd.Series({category: days for category, days in metrics['mean'].items()
+                           if metrics[count_key].get(category, 0) >= MIN_CATEGORY_COUNT and pd.notna(days)})
+    if durations.empty:
+        return None
+    durations = durations.sort_values(ascending=False)
+    return ReportFigure(f'implementation_duration_{attribute}', f'Implementation Duration by {attr_name}',
+                        _draw_ranked_bars,
+                        {'labels': durations.index.astype(str).tolist(), 'values': durations.astype(float).tolist(),
+                         'title': f'Implementation Duration by {attr_name}',
+                         'xlabel': 'Average Implementation Duration (Days)', 'ylabel': attr_name,
+                         'label_format': '{:.1f} days', 'label_offset': 2}, (12, 7))
+
+
+def journey_figure(journey_metrics: Optional[Dict], attribute: str = 'industry') -> Optional[ReportFigure]:
+    """
+    Mean and median deal-to-implementation days, from analyze_full_customer_journey().
+
+    Args:
+        journey_metrics (Dict, optional): Journey metrics
+        attribute (str): 'industry', 'size' or 'deal_size'
+
+    Returns:
+        ReportFigure or None: None without metrics or enough journeys
+    """
+    key, attr_name = _ATTRIBUTE_KEYS.get(attribute, (None, None))
+    if not journey_metrics or key not in journey_metrics:
+        return None
+    metrics = journey_metrics[key]
+    journey = pd.DataFrame({'mean': metrics['mean'], 'median': metrics['median'], 'count': metrics['count']})
+    journey = journey[journey['count'] >= MIN_CATEGORY_COUNT].sort_values('mean', ascending=False)
+    if journey.empty:
+        return None
+    return ReportFigure(f'journey_{attribute}', f'Deal-to-Implementation Time by {attr_name}', _draw_journey,
+                        {'categories': journey.index.astype(str).tolist(), 'mean': journey['mean'].tolist(),
+                         'median': journey['median'].tolist(), 'count': journey['count'].astype(int).tolist(),
+                         'title': f'Deal-to-Implementation Time by {attr_name}', 'attr_name': attr_name}, (14, 8))
+
+
+def segmentation_matrix_figure(full_joined: Optional[pd.DataFrame]) -> Optional[ReportFigure]:
+    """Deal value against implementation time quadrants, from the full company join."""
+    if full_joined is None:
+        return None
+    amount_col = next((col for col in full_joined.columns if 'Deal_Amount' in col), None)
+    if amount_col is None:
+        return None
+    if 'Days_From_Deal_To_Implementation' in full_joined.columns:
+        days = full_joined['Days_From_Deal_To_Implementation']
+    else:
+        deal_closed = next((col for col in full_joined.columns if 'Deal_Close Date' in col), None)
+        ticket_closed = next((col for col in full_joined.columns if 'Ticket_Close date' in col), None)
+        if deal_closed is None or ticket_closed is None:
+            return None
+        days = (pd.to_datetime(full_joined[ticket_closed], errors='coerce')
+                - pd.to_datetime(full_joined[deal_closed], errors='coerce')).dt.days
+    valid = (full_joined[amount_col] > 0) & (days > 0) & (days < 365)
+    if valid.sum() < 10:
+        return None
+    return ReportFigure('segmentation_matrix', 'Customer Segmentation Matrix', _draw_segmentation_matrix,
+                        {'amount': full_joined.loc[valid, amount_col].to_numpy(dtype=np.float64),
+                         'days': days[valid].to_numpy(dtype=np.float64)}, (12, 10))
+
+
+def company_figures(analyzer) -> List[ReportFigure]:
+    """
+    Every CompaniesAnalyzer chart, with each analysis run once.
+
+    Args:
+        analyzer: CompaniesAnalyzer from sales-pipeline-processing.ipynb
+
+    Returns:
+        List[ReportFigure]: Charts whose data is available
+    """
+    companies = (analyzer.processed_companies if analyzer.processed_companies is not None
+                 else analyzer.preprocess_companies())
+    deal_metrics = analyzer.analyze_deal_performance_by_company() if analyzer.deals is not None else None
+    impl_metrics = analyzer.analyze_implementation_success_by_company() if analyzer.tickets is not None else None
+    journey_metrics = analyzer.analyze_full_customer_journey()
+    figures = [
+        industry_distribution_figure(companies),
+        size_distribution_figure(companies),
+        technology_figure(companies),
+        company_growth_figure(companies),
+        *(win_rate_figure(deal_metrics, attribute) for attribute in ('industry', 'size', 'region')),
+        *(implementation_duration_figure(impl_metrics, attribute) for attribute in ('industry', 'size')),
+        *(journey_figure(journey_metrics, attribute) for attribute in ('industry', 'deal_size')),
+        segmentation_matrix_figure(analyzer.full_joined_data),
+    ]
+    return [figure for figure in figures if figure is not None]
+
+
+# ----- Report bundle -----
+
+def _slug(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def _render(figure: ReportFigure, stem: str, formats: Sequence[str], dpi: int) -> List[str]:
+    """Draw one figure and save it in every format; runs in a pool worker."""
+    fig = figure.draw()
+    paths = []
+    for fmt in formats:
+        path = f"{stem}.{fmt}"
+        fig.savefig(path, format=fmt, dpi=dpi, bbox_inches='tight')
+        paths.append(path)
+    return paths
+
+
+def build_report(sections: Dict[str, List[ReportFigure]],
+                 directory: str,
+                 title: str = 'Pipeline Report',
+                 formats: Sequence[str] = ('png',),
+                 dpi: int = 100,
+                 n_jobs: int = -1) -> str:
+    """
+    Render every figure to files and write an HTML page linking them.
+
+    Args:
+        sections (Dict[str, List[ReportFigure]]): Section heading -> figures,
+            e.g. {'Tickets': ticket_figures(a), 'Companies': company_figures(b)}
+        directory (str): Output directory (created if missing)
+        title (str): Page title
+        formats (Sequence[str]): Image formats to write ('png', 'svg', 'pdf');
+            the page shows the first
+        dpi (int): Resolution of raster formats
+        n_jobs (int): Worker processes; 1 renders in-process
+
+    Returns:
+        str: Path of the index.html
+    """
+    os.makedirs(directory, exist_ok=True)
+    jobs = [(heading, figure, os.path.join(directory, f"{_slug(heading)}-{figure.name}"))
+            for heading, figures in sections.items() for figure in figures]
+    if n_jobs == 1 or len(jobs) <= 1:
+        outputs = [_render(figure, stem, formats, dpi) for _, figure, stem in jobs]
+    else:
+        outputs = Parallel(n_jobs=n_jobs)(delayed(_render)(figure, stem, formats, dpi) for _, figure, stem in jobs)
+
+    body = [f"<h1>{html.escape(title)}</h1>"]
+    current = None
+    for (heading, figure, _), paths in zip(jobs, outputs):
+        if heading != current:
+            body.append(f"<h2>{html.escape(heading)}</h2>")
+            current = heading
+        links = ' | '.join(f'<a href="{os.path.basename(p)}">{p.rsplit(".", 1)[1].upper()}</a>' for p in paths)
+        body.append(f'<figure><img src="{os.path.basename(paths[0])}" alt="{html.escape(figure.title)}">'
+                    f'<figcaption>{html.escape(figure.title)} ({links})</figcaption></figure>')
+
+    index = os.path.join(directory, 'index.html')
+    with open(index, 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+                f'<title>{html.escape(title)}</title>'
+                '<style>body{font-family:sans-serif;max-width:1100px;margin:auto}'
+                'img{max-width:100%}figure{margin:2em 0}</style></head><body>\n'
+                + '\n'.join(body) + '\n</body></html>\n')
+    return index
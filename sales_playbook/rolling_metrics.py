@@ -0,0 +1,358 @@
+"""
+Date-window pipeline KPIs from time-bucketed prefix sums.
+
+HubspotDealsAnalyzer.extract_pipeline_metrics() and analyze_temporal_trends()
+aggregate the whole history with fresh groupbys, so comparing "the last 90
+days with the 90 before" per owner or segment meant refiltering the deals
+for every window. RollingMetrics instead keeps, for the whole pipeline and
+every segment of each segment column, per-day (or per-week) sums of
+
+    created, amount, amount_count          bucketed by 'Create Date'
+    won, lost, revenue, won_days,          bucketed by 'Close Date'
+    won_days_count, lost_days, lost_days_count
+
+and their cumulative sums along time. Any window total is then one
+subtraction of two prefix entries, so win rate, revenue, average deal size
+and cycle length for any window and segment cost O(1), and a whole
+segment column is answered in one vectorized subtraction.
+
+upsert() takes new and changed deals (keyed by Record ID): a changed deal's
+old contribution is subtracted and the new one added, touching only its
+buckets. Prefix sums are rebuilt lazily on the next query, and only from
+the earliest bucket that changed. Medians are not additive and stay in
+extract_pipeline_metrics().
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+
+from sales_playbook.forecasting import DEFAULT_SEGMENTS, segment_labels
+from sales_playbook.ids import normalize_ids
+
+METRICS: List[str] = [
+    'created', 'amount', 'amount_count',
+    'won', 'lost', 'revenue',
+    'won_days', 'won_days_count', 'lost_days', 'lost_days_count',
+]
+
+KPIS: List[str] = [
+    'created', 'won', 'lost', 'win_rate', 'revenue',
+    'avg_deal_size', 'avg_days_to_close_won', 'avg_days_to_close_lost',
+]
+
+# Position of each metric on the middle axis of the sums
+_METRIC_INDEX: Dict[str, int] = {metric: i for i, metric in enumerate(METRICS)}
+
+# Metrics counted on the create date; the rest on the close date
+_CREATE_METRICS = {'created', 'amount', 'amount_count'}
+
+DEFAULT_DIMENSIONS: List[str] = ['Deal owner'] + DEFAULT_SEGMENTS
+
+_BUCKET_DAYS: Dict[str, int] = {'D': 1, 'W': 7}
+
+# Day number of a missing date
+_NO_DAY = np.iinfo(np.int64).min
+
+# 1970-01-05, the first Monday after the epoch; weekly buckets start on Mondays
+_FIRST_MONDAY = 4
+
+
+def _day_numbers(dates: pd.Series) -> np.ndarray:
+    """Days since the epoch, _NO_DAY where the date is missing."""
+    days = np.full(len(dates), _NO_DAY, dtype=np.int64)
+    valid = dates.notna().to_numpy()
+    days[valid] = dates[valid].dt.normalize().to_numpy().astype('datetime64[D]').astype(np.int64)
+    return days
+
+
+def _kpis(totals: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    KPIS from window totals of METRICS.
+
+    Args:
+        totals (np.ndarray): (... x METRICS) window totals
+
+    Returns:
+        Dict[str, np.ndarray]: Counts, win rate (%), won revenue and averages;
+            rates and averages are NaN when their denominator is zero
+    """
+    def total(metric: str) -> np.ndarray:
+        return totals[..., _METRIC_INDEX[metric]]
+
+    def ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+        return np.divide(numerator, denominator, out=np.full_like(numerator, np.nan), where=denominator > 0)
+
+    won, lost = total('won'), total('lost')
+    return {
+        'created': np.rint(total('created')).astype(np.int64),
+        'won': np.rint(won).astype(np.int64),
+        'lost': np.rint(lost).astype(np.int64),
+        'win_rate': ratio(won, won + lost) * 100,
+        'revenue': total('revenue'),
+        'avg_deal_size': ratio(total('amount'), total('amount_count')),
+        'avg_days_to_close_won': ratio(total('won_days'), total('won_days_count')),
+        'avg_days_to_close_lost': ratio(total('lost_days'), total('lost_days_count')),
+    }
+
+
+class RollingMetrics:
+    """
+    Per-segment bucketed sums and prefix sums of deal metrics.
+    """
+
+    def __init__(self, freq: str = 'D', segment_by: Optional[Sequence[str]] = None):
+        """
+        Args:
+            freq (str): Bucket width, 'D' (day) or 'W' (week starting Monday);
+                weekly windows are widened to whole weeks
+            segment_by (Sequence[str], optional): Segment columns; defaults to
+                DEFAULT_DIMENSIONS (those missing from the first deals are skipped)
+        """
+        if freq not in _BUCKET_DAYS:
+            raise ValueError(f"freq must be one of {sorted(_BUCKET_DAYS)}, got {freq!r}")
+        self.freq = freq
+        self.segment_by = None if segment_by is None else list(segment_by)
+        self._width = _BUCKET_DAYS[freq]
+        # (dimension, segment) of every row of the sums; row 0 is the whole pipeline
+        self._keys: List[tuple] = [('All', 'All')]
+        self._rows: Dict[tuple, int] = {('All', 'All'): 0}
+        self._origin: Optional[int] = None
+        self._n_buckets = 0
+        self._sums = np.zeros((1, len(METRICS), 0))
+        self._prefix = np.zeros((1, len(METRICS), 1))
+        self._stale_from: Optional[int] = None
+        # Contribution of every deal, indexed by Record ID, so changes can be undone
+        self._deals: Optional[pd.DataFrame] = None
+
+    @property
+    def keys(self) -> pd.DataFrame:
+        """'dimension' and 'segment' of every row."""
+        return pd.DataFrame(self._keys, columns=['dimension', 'segment'])
+
+    @property
+    def n_deals(self) -> int:
+        return 0 if self._deals is None else len(self._deals)
+
+    def _row(self, dimension: str, segment: str) -> int:
+        key = (dimension, segment)
+        if key not in self._rows:
+            self._rows[key] = len(self._keys)
+            self._keys.append(key)
+        return self._rows[key]
+
+    def _contributions(self, deals: pd.DataFrame) -> pd.DataFrame:
+        """Day numbers, metric values and segment rows of each deal."""
+        won = deals['Is Closed Won'].fillna(0).to_numpy() == 1
+        lost = deals['Is closed lost'].fillna(0).to_numpy() == 1
+        amount = pd.to_numeric(deals['Amount'], errors='coerce').to_numpy(dtype=np.float64)
+        has_amount = ~np.isnan(amount)
+        created_at = pd.to_datetime(deals['Create Date'], errors='coerce')
+        closed_at = pd.to_datetime(deals['Close Date'], errors='coerce')
+        created, closed = _day_numbers(created_at), _day_numbers(closed_at)
+        if 'Days_in_Pipeline' in deals.columns:
+            days = pd.to_numeric(deals['Days_in_Pipeline'], errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            # Same whole days as HubspotDealsAnalyzer.preprocess_data()
+            days = (closed_at - created_at).dt.days.to_numpy(dtype=np.float64, na_value=np.nan)
+        has_days = ~np.isnan(days)
+
+        contributions = pd.DataFrame({
+            'created_day': created,
+            'closed_day': closed,
+            'created': 1.0,
+            'amount': np.where(has_amount, amount, 0.0),
+            'amount_count': has_amount.astype(np.float64),
+            'won': won.astype(np.float64),
+            'lost': lost.astype(np.float64),
+            'revenue': np.where(won & has_amount, amount, 0.0),
+            'won_days': np.where(won & has_days, days, 0.0),
+            'won_days_count': (won & has_days).astype(np.float64),
+            'lost_days': np.where(lost & has_days, days, 0.0),
+            'lost_days_count': (lost & has_days).astype(np.float64),
+        }, index=pd.Index(normalize_ids(deals['Record ID']).to_numpy(), name='Record ID'))
+
+        if self.segment_by is None:
+            self.segment_by = []
+            for column in DEFAULT_DIMENSIONS:
+                try:
+                    segment_labels(deals, column)
+                except KeyError:
+                    continue
+                self.segment_by.append(column)
+        for i, column in enumerate(self.segment_by):
+            labels = segment_labels(deals, column).to_numpy()
+            uniques, codes = np.unique(labels, return_inverse=True)
+            rows = np.array([self._row(column, label) for label in uniques], dtype=np.int64)
+            contributions[f'row_{i}'] = rows[codes]
+        return contributions[~contributions.index.duplicated(keep='last')]
+
+    def _reserve(self, days: np.ndarray) -> None:
+        """Grow rows and buckets so every day and segment row has a slot."""
+        counted = days[days != _NO_DAY]
+        n_rows = len(self._keys)
+        if n_rows > self._sums.shape[0]:
+            extra = n_rows - self._sums.shape[0]
+            self._sums = np.pad(self._sums, ((0, extra), (0, 0), (0, 0)))
+            self._prefix = np.pad(self._prefix, ((0, extra), (0, 0), (0, 0)))
+        if len(counted) == 0:
+            return
+        first, last = counted.min(), counted.max()
+        if self._origin is None:
+            self._origin = first - (first - _FIRST_MONDAY) % 7 if self._width == 7 else first
+        if first < self._origin:
+            # Earlier deals than any seen: shift every bucket right
+            shift = -((first - self._origin) // self._width)
+            self._origin -= shift * self._width
+            self._sums = np.pad(self._sums, ((0, 0), (0, 0), (shift, 0)))
+            self._n_buckets += shift
+            self._prefix = np.zeros(self._sums.shape[:2] + (self._sums.shape[2] + 1,))
+            self._stale_from = 0
+        needed = (last - self._origin) // self._width + 1
+        if needed > self._n_buckets:
+            self._n_buckets = needed
+        if needed > self._sums.shape[2]:
+            # Grown with headroom so a daily trickle of new deals rarely reallocates
+            capacity = max(needed, int(self._sums.shape[2] * 1.5))
+            old = self._sums.shape[2]
+            self._sums = np.pad(self._sums, ((0, 0), (0, 0), (0, capacity - old)))
+            self._prefix = np.pad(self._prefix, ((0, 0), (0, 0), (0, capacity - old)))
+            self._stale_from = old if self._stale_from is None else min(self._stale_from, old)
+
+    def _apply(self, contributions: pd.DataFrame, sign: float) -> None:
+        rows = [np.zeros(len(contributions), dtype=np.int64)]
+        rows += [contributions[f'row_{i}'].to_numpy() for i in range(len(self.segment_by))]
+        for m, metric in enumerate(METRICS):
+            days = contributions['created_day' if metric in _CREATE_METRICS else 'closed_day'].to_numpy()
+            values = contributions[metric].to_numpy()
+            counted = (days != _NO_DAY) & (values != 0)
+            if not counted.any():
+                continue
+            buckets = (days[counted] - self._origin) // self._width
+            for segment_rows in rows:
+                np.add.at(self._sums, (segment_rows[counted], m, buckets), sign * values[counted])
+            first = int(buckets.min())
+            self._stale_from = first if self._stale_from is None else min(self._stale_from, first)
+
+    def upsert(self, deals: pd.DataFrame) -> 'RollingMetrics':
+        """
+        Add new deals and replace changed ones (matched on Record ID).
+
+        Args:
+            deals (pd.DataFrame): Deals with 'Record ID', 'Create Date',
+                'Close Date', 'Is Closed Won', 'Is closed lost', 'Amount' and
+                the segment columns (raw or one-hot); 'Days_in_Pipeline' is
+                used when present, close minus create date otherwise
+
+        Returns:
+            RollingMetrics: self
+        """
+        new = self._contributions(deals)
+        self._reserve(np.concatenate([new['created_day'].to_numpy(), new['closed_day'].to_numpy()]))
+        if self._deals is not None:
+            replaced = self._deals.index.intersection(new.index)
+            if len(replaced):
+                self._apply(self._deals.loc[replaced], -1.0)
+            self._deals = pd.concat([self._deals.drop(replaced), new])
+        else:
+            self._deals = new
+        self._apply(new, 1.0)
+        return self
+
+    def _refresh(self) -> None:
+        if self._stale_from is None:
+            return
+        start = self._stale_from
+        np.cumsum(self._sums[:, :, start:], axis=2, out=self._prefix[:, :, start + 1:])
+        self._prefix[:, :, start + 1:] += self._prefix[:, :, start:start + 1]
+        self._stale_from = None
+
+    def _bucket(self, date) -> int:
+        """Bucket of date; negative before the origin, >= the bucket count after the last one."""
+        day = (pd.Timestamp(date).normalize() - pd.Timestamp(0)).days
+        return int((day - self._origin) // self._width)
+
+    def _window(self, start, end, rows) -> np.ndarray:
+        """(rows x metrics) totals of deals with event dates in [start, end]."""
+        if self._origin is None:
+            return np.zeros((len(rows), len(METRICS)))
+        self._refresh()
+        # Clamp to the stored buckets; a window entirely outside them is empty
+        first = max(self._bucket(start), 0)
+        last = min(self._bucket(end) + 1, self._n_buckets)
+        if last <= first:
+            return np.zeros((len(rows), len(METRICS)))
+        return self._prefix[rows, :, last] - self._prefix[rows, :, first]
+
+    def window(self, start, end, dimension: Optional[str] = None, segment: Optional[str] = None) -> Dict[str, float]:
+        """
+        KPIs of one segment over a date window.
+
+        Args:
+            start: First date of the window (inclusive)
+            end: Last date of the window (inclusive)
+            dimension (str, optional): Segment column; whole pipeline by default
+            segment (str, optional): Segment within dimension
+
+        Returns:
+            Dict[str, float]: One value per KPIS entry
+        """
+        key = ('All', 'All') if dimension is None else (dimension, str(segment))
+        if key not in self._rows:
+            raise KeyError(f"No segment {key[1]!r} in {key[0]!r}")
+        kpis = _kpis(self._window(start, end, [self._rows[key]])[0])
+        return {name: kpis[name].item() for name in KPIS}
+
+    def segments(self, start, end, dimension: Optional[str] = None) -> pd.DataFrame:
+        """
+        KPIs of every segment of a column over a date window.
+
+        Args:
+            start: First date of the window (inclusive)
+            end: Last date of the window (inclusive)
+            dimension (str, optional): Segment column; whole pipeline by default
+
+        Returns:
+            pd.DataFrame: KPIS columns indexed by segment
+        """
+        dimension = 'All' if dimension is None else dimension
+        rows = [row for (dim, _), row in self._rows.items() if dim == dimension]
+        if not rows:
+            raise KeyError(f"{dimension!r} is not a segment column; use one of {self.segment_by}")
+        index = pd.Index([self._keys[row][1] for row in rows], name=dimension)
+        return pd.DataFrame(_kpis(self._window(start, end, rows)), index=index, columns=KPIS).sort_index()
+
+    def compare(self, days: int = 90, end=None, dimension: Optional[str] = None) -> pd.DataFrame:
+        """
+        The last `days` days against the `days` before them, per segment.
+
+        Args:
+            days (int): Window length
+            end: Last date of the current window; defaults to today
+            dimension (str, optional): Segment column; whole pipeline by default
+
+        Returns:
+            pd.DataFrame: ('current' | 'prior', KPI) columns indexed by segment
+        """
+        end = pd.Timestamp.today().normalize() if end is None else pd.Timestamp(end).normalize()
+        start = end - pd.Timedelta(days=days - 1)
+        current = self.segments(start, end, dimension)
+        prior = self.segments(start - pd.Timedelta(days=days), start - pd.Timedelta(days=1), dimension)
+        return pd.concat({'current': current, 'prior': prior}, axis=1)
+
+
+def build_rolling_metrics(deals: pd.DataFrame,
+                          freq: str = 'D',
+                          segment_by: Optional[Sequence[str]] = None) -> RollingMetrics:
+    """
+    Bucketed metrics of every deal.
+
+    Args:
+        deals (pd.DataFrame): Deals, as accepted by RollingMetrics.upsert()
+        freq (str): 'D' or 'W'
+        segment_by (Sequence[str], optional): Segment columns
+
+    Returns:
+        RollingMetrics: Ready to query; upsert() later changes into it
+    """
+    return RollingMetrics(freq, segment_by).upsert(deals)
@@ -0,0 +1,150 @@
+"""
+Sparse training matrices for the wide one-hot companies frame.
+
+After one-hot encoding the companies frame has ~1,000 columns
+(Web Technologies_, Industry_, Country/Region_, ...) that are almost all
+zero, so a dense float64 copy is dominated by zeros. to_sparse() builds a
+CSR matrix column by column, never materializing the dense block, and
+keeps the column names alongside it. Only the 0/1 columns are stored
+sparsely; numeric columns keep their zeros, because XGBoost reads an
+unstored entry as missing. XGBoost trains on the CSR matrix directly;
+models that need dense input go through prune_rare_columns() first, which
+drops near-constant columns on the sparse side.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from typing import Dict, Optional, Sequence
+
+
+class SparseFeatures:
+    """
+    CSR feature matrix with a column-name index.
+    """
+
+    def __init__(self, matrix: sparse.csr_matrix, columns: pd.Index, index: Optional[pd.Index] = None):
+        """
+        Initialize from a CSR matrix and its labels.
+
+        Args:
+            matrix (sparse.csr_matrix): Feature values, one row per sample
+            columns (pd.Index): Column names, one per matrix column
+            index (pd.Index, optional): Row labels; defaults to a RangeIndex
+        """
+        self.matrix = matrix.tocsr()
+        self.columns = pd.Index(columns)
+        self.index = pd.RangeIndex(matrix.shape[0]) if index is None else pd.Index(index)
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the CSR arrays."""
+        return self.matrix.data.nbytes + self.matrix.indices.nbytes + self.matrix.indptr.nbytes
+
+    def select(self, columns: Sequence[str]) -> 'SparseFeatures':
+        """
+        Subset of columns, in the given order.
+
+        Args:
+            columns (Sequence[str]): Column names
+
+        Returns:
+            SparseFeatures: Column subset
+        """
+        positions = self.columns.get_indexer(columns)
+        if (positions < 0).any():
+            missing = [col for col, pos in zip(columns, positions) if pos < 0]
+            raise KeyError(f"Unknown feature column(s): {missing[:5]}")
+        return SparseFeatures(self.matrix[:, positions], self.columns[positions], self.index)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Dense DataFrame copy (only for already-pruned or small selections)."""
+        return pd.DataFrame(self.matrix.toarray(), index=self.index, columns=self.columns)
+
+    def memory_report(self, dense_bytes: Optional[int] = None) -> Dict[str, float]:
+        """
+        Sparse size against the equivalent dense float64 matrix.
+
+        Args:
+            dense_bytes (int, optional): Measured dense size; defaults to
+                rows x columns x 8
+
+        Returns:
+            Dict[str, float]: 'dense_mb', 'sparse_mb', 'reduction' and 'density'
+        """
+        rows, cols = self.shape
+        dense_bytes = rows * cols * 8 if dense_bytes is None else dense_bytes
+        return {
+            'dense_mb': dense_bytes / 1e6,
+            'sparse_mb': self.nbytes / 1e6,
+            'reduction': dense_bytes / max(self.nbytes, 1),
+            'density': self.matrix.nnz / max(rows * cols, 1),
+        }
+
+
+def to_sparse(df: pd.DataFrame, dtype=np.float32) -> SparseFeatures:
+    """
+    Build a CSR matrix from a numeric frame without a dense intermediate.
+
+    XGBoost treats an unstored entry as missing, not as 0. For 0/1 columns
+    that only changes which side the learned default direction sends the
+    zeros, so splits partition rows as on the dense frame and the zeros are
+    left out. Every other column keeps its zeros as explicit entries, so a
+    0 in Amount or a count is still a value. NaN is stored explicitly and
+    read as missing.
+
+    Args:
+        df (pd.DataFrame): Numeric (or boolean) feature frame
+        dtype: Value dtype of the matrix
+
+    Returns:
+        SparseFeatures: CSR matrix, column names and row index
+    """
+    rows, cols, values = [], [], []
+    for position, col in enumerate(df.columns):
+        column = df[col].to_numpy()
+        binary = np.isin(column[~pd.isna(column)], (0, 1)).all()
+        nonzero = np.flatnonzero(column != 0) if binary else np.arange(len(column))
+        rows.append(nonzero)
+        cols.append(np.full(len(nonzero), position, dtype=np.int32))
+        values.append(column[nonzero].astype(dtype))
+
+    matrix = sparse.coo_matrix(
+        (np.concatenate(values) if values else np.empty(0, dtype=dtype),
+         (np.concatenate(rows) if rows else np.empty(0, dtype=np.int64),
+          np.concatenate(cols) if cols else np.empty(0, dtype=np.int32))),
+        shape=df.shape, dtype=dtype,
+    ).tocsr()
+    return SparseFeatures(matrix, df.columns, df.index)
+
+
+def prune_rare_columns(features: SparseFeatures,
+                       min_count: int = 5,
+                       min_variance: float = 0.0) -> SparseFeatures:
+    """
+    Drop columns that are almost always zero or almost constant.
+
+    Counts and variances are computed on the sparse arrays, so pruning never
+    densifies the matrix. Explicitly stored zeros do not count as non-zero.
+
+    Args:
+        features (SparseFeatures): Input features
+        min_count (int): Keep columns with at least this many non-zero rows
+        min_variance (float): Keep columns whose variance exceeds this
+
+    Returns:
+        SparseFeatures: Kept columns, in their original order
+    """
+    matrix = features.matrix
+    rows = max(matrix.shape[0], 1)
+    counts = np.bincount(matrix.indices[matrix.data != 0], minlength=matrix.shape[1])
+    mean = np.asarray(matrix.sum(axis=0)).ravel() / rows
+    mean_sq = np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel() / rows
+    variance = mean_sq - mean ** 2
+
+    keep = np.flatnonzero((counts >= min_count) & (variance > min_variance))
+    return SparseFeatures(matrix[:, keep], features.columns[keep], features.index)
@@ -0,0 +1,194 @@
+"""
+Star-schema layout for companies, deals and tickets, plus a join planner.
+
+Companies form the dimension table (one row per company, keyed by an
+integer company_key); deals and tickets are fact tables carrying that key.
+Joins are planned at a single grain: the side that is not the grain is
+aggregated to the company before it is attached, so a company with 50
+deals and 20 tickets yields 50 rows at deal grain, 20 at ticket grain and
+one at company grain, never the 1,000-row cartesian product.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Mapping, Optional, Tuple
+
+from sales_playbook.graph_index import RelationshipGraph
+from sales_playbook.ids import id_index
+from sales_playbook.relationships import Edges
+
+# Fact name -> (column prefix, ID column in the source frame)
+FACTS: Dict[str, Tuple[str, str]] = {
+    'deal': ('Deal_', 'Record ID'),
+    'ticket': ('Ticket_', 'Ticket ID'),
+}
+
+# Default company-grain rollups: output name -> (source column, aggregation)
+DEFAULT_AGGREGATIONS: Dict[str, Dict[str, Tuple[str, str]]] = {
+    'deal': {
+        'Count': ('Record ID', 'count'),
+        'Amount': ('Amount', 'sum'),
+        'Won Count': ('Is Closed Won', 'sum'),
+        'Create Date': ('Create Date', 'min'),
+        'Close Date': ('Close Date', 'max'),
+    },
+    'ticket': {
+        'Count': ('Ticket ID', 'count'),
+        'Create date': ('Create date', 'min'),
+        'Close date': ('Close date', 'max'),
+        'Ticket status': ('Ticket status', 'last'),
+    },
+}
+
+
+class StarSchema:
+    """
+    Company dimension plus deal and ticket fact tables joined on integer keys.
+    """
+
+    def __init__(self, companies: pd.DataFrame, facts: Dict[str, pd.DataFrame]):
+        """
+        Initialize from already keyed tables.
+
+        Args:
+            companies (pd.DataFrame): Company dimension indexed by company_key
+            facts (Dict[str, pd.DataFrame]): 'deal' / 'ticket' fact tables with
+                a 'company_key' column
+        """
+        self.companies = companies
+        self.facts = facts
+
+    @classmethod
+    def build(cls,
+              companies: pd.DataFrame,
+              entities: Dict[str, pd.DataFrame],
+              edges: Dict[str, Edges],
+              company_id_column: str = 'Record ID') -> 'StarSchema':
+        """
+        Build the schema from entity frames and (company ID, entity ID) edges.
+
+        Args:
+            companies (pd.DataFrame): Companies with a company ID column
+            entities (Dict[str, pd.DataFrame]): 'deal' / 'ticket' frames
+            edges (Dict[str, Edges]): Same keys, (company IDs, entity IDs) arrays
+            company_id_column (str): Company ID column in companies
+
+        Returns:
+            StarSchema: The keyed tables
+        """
+        company_rows = id_index(companies[company_id_column])
+        dimension = companies.iloc[company_rows.to_numpy()].reset_index(drop=True)
+        dimension.index.name = 'company_key'
+        company_index = company_rows.index
+
+        facts = {}
+        for name, frame in entities.items():
+            if frame is None or name not in edges:
+                continue
+            _, id_column = FACTS[name]
+            entity_rows = id_index(frame[id_column])
+            entity_index = entity_rows.index
+            positions = entity_rows.to_numpy()
+
+            src, dst = edges[name]
+            company_keys = company_index.get_indexer(src)
+            hits = entity_index.get_indexer(dst)
+            rows = np.where(hits >= 0, positions[hits], -1)
+            matched = (company_keys >= 0) & (rows >= 0)
+
+            fact = frame.iloc[rows[matched]].reset_index(drop=True)
+            fact.insert(0, 'company_key', company_keys[matched].astype(np.int32))
+            facts[name] = fact
+
+        return cls(dimension, facts)
+
+    @classmethod
+    def from_mappings(cls,
+                      companies: pd.DataFrame,
+                      mappings: Mapping,
+                      deals: Optional[pd.DataFrame] = None,
+                      tickets: Optional[pd.DataFrame] = None) -> 'StarSchema':
+        """
+        Build the schema from the CompanyToDeals / CompanyToTickets mappings.
+
+        Args:
+            companies (pd.DataFrame): Companies with 'Record ID'
+            mappings (Mapping): Parsed mappings JSON
+            deals (pd.DataFrame, optional): Deals with 'Record ID'
+            tickets (pd.DataFrame, optional): Tickets with 'Ticket ID'
+
+        Returns:
+            StarSchema: The keyed tables
+        """
+        graph = RelationshipGraph.from_mappings(mappings)
+        edges = {}
+        for name, relation in (('deal', 'company_deals'), ('ticket', 'company_tickets')):
+            if relation in graph.relations:
+                edges[name] = graph.edges(relation)
+        return cls.build(companies, {'deal': deals, 'ticket': tickets}, edges)
+
+    def rollup(self, fact: str, aggregations: Optional[Dict[str, Tuple[str, str]]] = None) -> pd.DataFrame:
+        """
+        Aggregate a fact table to company grain.
+
+        Args:
+            fact (str): 'deal' or 'ticket'
+            aggregations (Dict[str, Tuple[str, str]], optional): Output name ->
+                (column, aggregation); defaults to DEFAULT_AGGREGATIONS[fact].
+                Entries whose column is missing are skipped.
+
+        Returns:
+            pd.DataFrame: One row per company_key with prefixed columns
+        """
+        prefix, _ = FACTS[fact]
+        table = self.facts.get(fact)
+        if table is None:
+            return pd.DataFrame(index=pd.Index([], name='company_key'))
+
+        aggregations = DEFAULT_AGGREGATIONS[fact] if aggregations is None else aggregations
+        named = {f'{prefix}{name}': pd.NamedAgg(column=column, aggfunc=func)
+                 for name, (column, func) in aggregations.items() if column in table.columns}
+        return table.groupby('company_key', sort=True).agg(**named)
+
+    def join(self, grain: str = 'company',
+             aggregations: Optional[Dict[str, Dict[str, Tuple[str, str]]]] = None) -> pd.DataFrame:
+        """
+        Plan and run a join at the requested grain.
+
+        Args:
+            grain (str): 'company' (one row per company with any deal or
+                ticket), 'deal' or 'ticket' (one row per fact, with the
+                company attributes and the other fact side rolled up)
+            aggregations (Dict, optional): Per-fact rollup overrides, see rollup
+
+        Returns:
+            pd.DataFrame: Joined frame with Company_ / Deal_ / Ticket_ prefixes
+        """
+        aggregations = aggregations or {}
+        companies = self.companies.add_prefix('Company_')
+
+        if grain == 'company':
+            rollups = [self.rollup(fact, aggregations.get(fact)) for fact in FACTS if fact in self.facts]
+            linked = np.unique(np.concatenate([r.index.to_numpy() for r in rollups])) if rollups else []
+            joined = companies.loc[linked]
+            for rollup in rollups:
+                joined = joined.join(rollup)
+            return joined.reset_index()
+
+        if grain not in FACTS:
+            raise ValueError(f"Unknown grain '{grain}'; expected 'company' or one of {sorted(FACTS)}")
+        if grain not in self.facts:
+            return pd.DataFrame()
+
+        prefix, _ = FACTS[grain]
+        table = self.facts[grain]
+        keys = table['company_key'].to_numpy()
+        joined = pd.concat([
+            companies.iloc[keys].reset_index(),
+            table.drop(columns='company_key').add_prefix(prefix)
+        ], axis=1)
+        for fact in FACTS:
+            if fact != grain and fact in self.facts:
+                rollup = self.rollup(fact, aggregations.get(fact))
+                joined = joined.join(rollup, on='company_key')
+        return joined
@@ -1,24 +1,167 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import altair as alt
 import plotly.express as px
+import os
+
+from sales_playbook.graph_index import load_or_build
+from sales_playbook.drilldown import RelatedEntityIndex
+from sales_playbook.deal_model import DEFAULT_MODEL_PATH, DealWinModel, build_deal_company_frame
+from sales_playbook.ingest import data_version
+from sales_playbook.segmentation import DEFAULT_SEGMENT_MODEL_PATH, SegmentModel
+from sales_playbook.lookalike import LookalikeIndex
+from sales_playbook.explanations import ExplanationCache
+from sales_playbook.simulation import deal_types, open_deals, simulate_pipeline
+from sales_playbook.forecasting import build_series, fit_cached
+from sales_playbook.profiling import profile_cached
 
 st.set_page_config(page_title="📊 SymTrain Dashboard", layout="wide")
 
-@st.cache_data
-def load_deals():
+@st.cache_data(max_entries=1)
+def load_deals(version):
+    # Keyed on data_version("data/deals.csv"), the same fingerprint the scoring and explanation caches use
     return pd.read_csv("data/deals.csv")
 
 @st.cache_data
 def load_tickets():
     return pd.read_csv("data/tickets.csv")
 
-@st.cache_data
-def load_companies():
+@st.cache_data(max_entries=1)
+def load_companies(version):
+    # Keyed on data_version("data/companies.csv"), like load_deals
     return pd.read_csv("data/companies.csv")
 
+def load_aliases(path, name_column):
+    # Anonymized name -> Record ID, used to resolve the name-keyed mappings
+    if not os.path.exists(path):
+        return None
+    names = pd.read_csv(path, usecols=[name_column, "Record ID"])
+    return names.dropna().set_index(name_column)["Record ID"]
+
+@st.cache_resource
+def load_related_index():
+    # Built once per process; every detail-panel lookup afterwards is a CSR slice
+    graph = load_or_build(
+        "mappings.json",
+        company_names=load_aliases("data/anonymized_hubspot_companies.csv", "Company name"),
+        deal_names=load_aliases("data/anonymized_hubspot_deals.csv", "Deal Name"),
+    )
+    companies = load_companies(data_version("data/companies.csv")) if os.path.exists("data/companies.csv") else None
+    return RelatedEntityIndex(graph, load_deals(data_version("data/deals.csv")), load_tickets(), companies)
+
+@st.cache_resource(max_entries=1)
+def load_deal_model(version):
+    # Loaded once per model file version, so a retrained model replaces the old one; None until trained
+    if not os.path.exists(DEFAULT_MODEL_PATH):
+        return None
+    return DealWinModel.load(DEFAULT_MODEL_PATH)
+
+@st.cache_data
+def load_deal_frame(version):
+    # Deals with their first company's attributes, as the deal-win model expects
+    companies = load_companies(data_version("data/companies.csv")) if os.path.exists("data/companies.csv") else None
+    edges = load_related_index().graph.edges("company_deals") if companies is not None else None
+    return build_deal_company_frame(load_deals(data_version("data/deals.csv")), companies, edges)
+
+@st.cache_data
+def score_deals(version):
+    # Batch-scores every deal once per data/model version; reruns reuse the cached array
+    model = load_deal_model(data_version(DEFAULT_MODEL_PATH))
+    if model is None:
+        return None
+    try:
+        return model.predict_proba(load_deal_frame(version)).to_numpy()
+    except ValueError as err:
+        st.warning(f"Win-probability model does not match the deals data: {err}")
+        return None
+
+@st.cache_resource
+def load_explanation_cache():
+    # One cache per process; its background thread computes each data/model version once
+    return ExplanationCache()
+
+def deal_explanations(version):
+    # Lookup only; a missing version is handed to the background worker pool and None is returned until it lands
+    model = load_deal_model(data_version(DEFAULT_MODEL_PATH))
+    if model is None:
+        return None
+    cache = load_explanation_cache()
+    explanations = cache.get(version)
+    if explanations is None:
+        job = cache.ensure(version, model, load_deal_frame(version))
+        if job.done() and job.exception() is not None:
+            st.warning(f"Could not compute deal explanations: {job.exception()}")
+    return explanations
+
+@st.cache_resource(max_entries=1)
+def load_segment_model(version):
+    # Scaler statistics + KMeans centroids saved by Model.ipynb, reloaded when the file changes; None until they exist
+    if not os.path.exists(DEFAULT_SEGMENT_MODEL_PATH):
+        return None
+    return SegmentModel.load(DEFAULT_SEGMENT_MODEL_PATH)
+
+@st.cache_data
+def assign_segments(version):
+    # Nearest-centroid lookup for every company, no refit; recomputed only when the data/model changes
+    model = load_segment_model(data_version(DEFAULT_SEGMENT_MODEL_PATH))
+    if model is None:
+        return None
+    try:
+        return model.assign_all(load_companies(data_version("data/companies.csv")))
+    except ValueError as err:
+        st.warning(f"Segment model does not match the companies data: {err}")
+        return None
+
+@st.cache_resource
+def load_lookalike_index():
+    # Company profiles packed into bitsets once per process; each query is one AND + popcount pass
+    return LookalikeIndex.build(load_companies(data_version("data/companies.csv")),
+                                revenue=load_related_index().company_revenue)
+
+@st.cache_data
+def run_simulation(version, probability_column, n_scenarios, months, start, slip_probability,
+                   max_slip_months, type_uplift, stage_uplift):
+    # Cached per data/model version and assumption set; uplifts arrive as hashable tuples
+    deals = load_deals(data_version("data/deals.csv"))
+    win_probability = score_deals(version)
+    if win_probability is not None:
+        deals = deals.assign(**{"Win probability": win_probability})
+    result = simulate_pipeline(
+        deals, n_scenarios=n_scenarios, probability_column=probability_column, months=months,
+        start=start, slip_probability=slip_probability, max_slip_months=max_slip_months,
+        type_uplift=dict(type_uplift), stage_uplift=dict(stage_uplift),
+    )
+    return result.quantiles(), result.total()
+
+@st.cache_data
+def deal_forecasts(version, freq, horizon):
+    # The saved Holt state per frequency is only fed newly completed periods; views never refit
+    series = build_series(load_deals(version), freq=freq)
+    forecaster = fit_cached(series, os.path.join("models", f"forecasts_{freq}.joblib"))
+    return series.to_frame(), forecaster.forecast(horizon)
+
+@st.cache_data
+def column_profile(path, version):
+    # One chunked pass per data version, saved under models/profiles
+    summary = profile_cached(path).summary()
+    # Date columns mix Timestamps into the statistics; show those as text
+    return summary.astype({col: "string" for col in summary.columns if summary[col].dtype == object})
+
+def show_profile(path):
+    with st.expander("Column Profile", expanded=False):
+        st.dataframe(column_profile(path, data_version(path)), column_config={
+            "Missing %": st.column_config.NumberColumn("Missing %", format="%.1f%%")})
+
+def show_related(title, related_df, columns):
+    st.markdown(f"#### {title}")
+    if related_df is None or related_df.empty:
+        st.write("None linked.")
+    else:
+        st.dataframe(related_df[[col for col in columns if col in related_df.columns]])
+
 # Sidebar dataset selector
 dataset = st.sidebar.selectbox("Select Dataset", ["Deals", "Tickets", "Companies"])
 
@@ -26,15 +169,20 @@ dataset = st.sidebar.selectbox("Select Dataset", ["Deals", "Tickets", "Companies
 # ========== DEALS DASHBOARD ==========
 # ===================================
 if dataset == "Deals":
-    df = load_deals()
+    df = load_deals(data_version("data/deals.csv"))
+    deals_version = data_version("data/deals.csv", "data/companies.csv", "mappings.json", DEFAULT_MODEL_PATH)
+    win_probability = score_deals(deals_version)
+    if win_probability is not None:
+        df = df.assign(**{"Win probability": win_probability})
     st.title("💼  Deals")
 
-    tab1, tab2 = st.tabs(["📋 Overview", "📊 Visual Insights"])
+    tab1, tab2, tab3, tab4 = st.tabs(["📋 Overview", "📊 Visual Insights", "🎲 Scenario Planning", "📈 Forecasts"])
 
     with tab1:
         st.subheader("Dataset Overview")
         st.write(f"Rows: {df.shape[0]} | Columns: {df.shape[1]}")
         st.dataframe(df.head())
+        show_profile("data/deals.csv")
 
     with tab2:
         st.title("Dashboard")
@@ -62,6 +210,9 @@ if dataset == "Deals":
                 wamount_min, wamount_max = float(df["Weighted amount"].min()), float(df["Weighted amount"].max())
                 wamount_range = st.slider("Weighted Amount Range", min_value=wamount_min, 
                                         max_value=wamount_max, value=(wamount_min, wamount_max))
+                if "Win probability" in df.columns:
+                    win_range = st.slider("Win Probability Range", min_value=0.0,
+                                          max_value=1.0, value=(0.0, 1.0))
 
             st.markdown("### Categorical Filters")
 
@@ -100,6 +251,9 @@ if dataset == "Deals":
             deal_type_filter = filtered_df[selected_deal_types].any(axis=1)
             filtered_df = filtered_df[deal_type_filter]
 
+        if "Win probability" in filtered_df.columns:
+            filtered_df = filtered_df[filtered_df["Win probability"].between(win_range[0], win_range[1])]
+
         st.markdown("---")
         st.subheader("Key Sales Metrics Overview")
         col1, col2, col3 = st.columns(3)
@@ -145,6 +299,19 @@ if dataset == "Deals":
         ).properties(width=600, height=400)
         st.altair_chart(hist_chart, use_container_width=True)
 
+        # ----- Predicted Win Probability -----
+        if "Win probability" in filtered_df.columns:
+            st.subheader("Predicted Win Probability")
+            ranked = filtered_df.sort_values("Win probability", ascending=False)
+            st.dataframe(
+                ranked[["Record ID", "Win probability", "Amount", "Days to close", "Deal Stage"]],
+                column_config={"Win probability": st.column_config.ProgressColumn(
+                    "Win probability", format="%.2f", min_value=0.0, max_value=1.0)},
+                hide_index=True,
+            )
+        else:
+            st.info("Train the deal-win model (python -m sales_playbook.deal_model train) to see win probabilities.")
+
         # ----- Deal Recommendations & Action Plans -----
         st.subheader("Deal Recommendations and Action Plans")
         record_ids = filtered_df["Record ID"].unique().tolist()
@@ -157,7 +324,13 @@ if dataset == "Deals":
 
             recommendation = ""
             action_plan = ""
-            if selected_deal["Deal Score"] < 50:
+            if "Win probability" in selected_deal:
+                # Precomputed at load; selecting a deal runs no inference
+                st.metric("Predicted Win Probability", f"{selected_deal['Win probability']:.0%}")
+            if selected_deal.get("Win probability", 1.0) < 0.25:
+                recommendation = "The model gives this deal a low chance of closing; revisit qualification."
+                action_plan = "Confirm budget, authority and timeline with the buyer before investing further."
+            elif selected_deal["Deal Score"] < 50:
                 recommendation = "The deal score is low; consider additional qualification."
                 action_plan = "Schedule a follow-up call to better understand client needs."
             elif selected_deal["Days to close"] > 60:
@@ -171,6 +344,23 @@ if dataset == "Deals":
             st.write(f"**Recommendation:** {recommendation}")
             st.write(f"**Action Plan:** {action_plan}")
 
+            if "Win probability" in selected_deal:
+                st.markdown("#### Why This Prediction")
+                explanations = deal_explanations(deals_version)
+                if explanations is None:
+                    st.info("Explanations for this model version are being computed in the background; reopen the deal shortly.")
+                else:
+                    explanation = explanations.explain(selected_record)
+                    if explanation.empty:
+                        st.write("No explanation stored for this deal.")
+                    else:
+                        # TreeSHAP contributions on the log-odds scale; positive values push towards a win
+                        st.dataframe(
+                            explanation,
+                            column_config={"Contribution": st.column_config.NumberColumn("Contribution", format="%+.3f")},
+                            hide_index=True,
+                        )
+
             st.markdown("#### Templated Messaging")
             if selected_deal.get("Deal Type_New", 0) == 1:
                 message = ("Thank you for your interest in our new offerings. "
@@ -182,9 +372,116 @@ if dataset == "Deals":
                 message = ("Please let us know if you have any questions or need further assistance. "
                         "We are here to support you.")
             st.write(message)
+
+            # ----- Related Records -----
+            st.markdown("### Related Records")
+            related = load_related_index().deal_detail(selected_record)
+            st.write(f"**Companies:** {', '.join(map(str, related['company_ids'])) or 'None linked'}")
+            show_related("Tickets", related["tickets"],
+                         ["Ticket ID", "Ticket status", "Response time hours", "Implementation Duration Days"])
         else:
             st.info("No deals match the selected filter criteria.")
 
+    with tab3:
+        st.subheader("Pipeline Revenue Simulation")
+        open_df = open_deals(df)
+        st.write(f"Simulating {len(open_df)} open deals: each one is won or lost with its win probability, "
+                 "and won deals can slip past their close month.")
+
+        with st.expander("Scenario Assumptions", expanded=True):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                probability_options = ["Deal probability"] + (["Win probability"] if "Win probability" in df.columns else [])
+                probability_column = st.selectbox("Win probability source", probability_options)
+                n_scenarios = st.number_input("Scenarios", min_value=1000, max_value=50000, value=10000, step=1000)
+            with col2:
+                start_month = st.date_input("First month", value=pd.Timestamp.today())
+                horizon = st.slider("Horizon (months)", 3, 24, 12)
+            with col3:
+                slip_probability = st.slider("Monthly slip probability", 0.0, 0.9, 0.25, 0.05)
+                max_slip_months = st.slider("Longest slip (months)", 0, 6, 3)
+
+            st.markdown("### Win-Rate Uplift by Deal Type (%)")
+            type_labels = sorted(deal_types(open_df).unique())
+            type_columns = st.columns(max(len(type_labels), 1))
+            type_uplift = {}
+            for column, label in zip(type_columns, type_labels):
+                with column:
+                    type_uplift[label] = 1 + st.slider(label, -50, 100, 0, 5, key=f"uplift_type_{label}") / 100
+
+            st.markdown("### Win-Rate Uplift by Deal Stage (%)")
+            stage_table = st.data_editor(
+                pd.DataFrame({"Deal Stage": sorted(open_df["Deal Stage"].dropna().unique()), "Uplift (%)": 0}),
+                disabled=["Deal Stage"], hide_index=True,
+            )
+            stage_uplift = {stage: 1 + uplift / 100 for stage, uplift in
+                            zip(stage_table["Deal Stage"], stage_table["Uplift (%)"].fillna(0))}
+
+        quantiles, totals = run_simulation(
+            deals_version, probability_column, int(n_scenarios), horizon, str(pd.Period(start_month, freq="M")),
+            slip_probability, max_slip_months,
+            tuple(sorted(type_uplift.items())), tuple(sorted(stage_uplift.items())),
+        )
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("P10 Total Revenue", f"${np.quantile(totals, 0.1):,.0f}")
+        col2.metric("P50 Total Revenue", f"${np.quantile(totals, 0.5):,.0f}")
+        col3.metric("P90 Total Revenue", f"${np.quantile(totals, 0.9):,.0f}")
+
+        st.subheader("Monthly Revenue Distribution")
+        chart_df = quantiles.reset_index()
+        chart_df["Month"] = chart_df["Month"].dt.to_timestamp()
+        band = alt.Chart(chart_df).mark_area(opacity=0.3).encode(
+            x=alt.X("Month:T", title="Month"),
+            y=alt.Y("P10:Q", title="Revenue"),
+            y2="P90:Q",
+            tooltip=["Month:T", "P10:Q", "P50:Q", "P90:Q"],
+        )
+        median = alt.Chart(chart_df).mark_line(point=True).encode(x="Month:T", y="P50:Q")
+        st.altair_chart((band + median).properties(width=700, height=400), use_container_width=True)
+        st.dataframe(quantiles, column_config={
+            col: st.column_config.NumberColumn(col, format="$%.0f") for col in quantiles.columns})
+
+    with tab4:
+        st.subheader("Deal Progression Forecasts")
+        col1, col2 = st.columns(2)
+        with col1:
+            frequency = st.radio("Frequency", ["Monthly", "Weekly"], horizontal=True)
+            metric = st.selectbox("Metric", ["created", "won", "lost", "revenue"],
+                                  format_func=lambda m: {"created": "Deals created", "won": "Deals won",
+                                                         "lost": "Deals lost", "revenue": "Won revenue"}[m])
+        with col2:
+            forecast_horizon = st.slider("Forecast horizon (periods)", 1, 26, 6)
+            dimension = st.selectbox("Segment by", ["All", "Deal Type", "Deal source attribution 2"])
+
+        history, forecasts = deal_forecasts(data_version("data/deals.csv"), "M" if frequency == "Monthly" else "W",
+                                            forecast_horizon)
+        history = history[(history["dimension"] == dimension) & (history["metric"] == metric)]
+        forecasts = forecasts[(forecasts["dimension"] == dimension) & (forecasts["metric"] == metric)]
+
+        volume = history.groupby("segment")["value"].sum().sort_values(ascending=False)
+        segments = st.multiselect("Segments", volume.index.tolist(), default=volume.index[:5].tolist())
+        history = history[history["segment"].isin(segments)].assign(period=lambda f: f["period"].dt.to_timestamp())
+        forecasts = forecasts[forecasts["segment"].isin(segments)].assign(period=lambda f: f["period"].dt.to_timestamp())
+
+        actual_line = alt.Chart(history).mark_line().encode(
+            x=alt.X("period:T", title="Period"), y=alt.Y("value:Q", title=metric.capitalize()),
+            color="segment:N", tooltip=["segment", "period:T", "value:Q"],
+        )
+        forecast_band = alt.Chart(forecasts).mark_area(opacity=0.2).encode(
+            x="period:T", y="lower:Q", y2="upper:Q", color="segment:N",
+        )
+        forecast_line = alt.Chart(forecasts).mark_line(strokeDash=[4, 4]).encode(
+            x="period:T", y="forecast:Q", color="segment:N",
+            tooltip=["segment", "period:T", "forecast:Q", "lower:Q", "upper:Q"],
+        )
+        st.altair_chart((actual_line + forecast_band + forecast_line).properties(width=700, height=400),
+                        use_container_width=True)
+
+        st.markdown("#### Forecasts by Segment")
+        table = forecasts.assign(period=forecasts["period"].dt.strftime("%Y-%m-%d"))
+        st.dataframe(table.pivot(index="segment", columns="period", values="forecast").round(1))
+
 # ===================================
 # ========== TICKETS DASHBOARD ==========
 # ===================================
@@ -198,6 +495,7 @@ elif dataset == "Tickets":
         st.subheader("Dataset Overview")
         st.write(f"Rows: {df.shape[0]} | Columns: {df.shape[1]}")
         st.dataframe(df.head())
+        show_profile("data/tickets.csv")
 
     with tab2:
         st.title("Dashboard")
@@ -341,11 +639,21 @@ elif dataset == "Tickets":
             st.markdown("#### Recommendations")
             st.write(f"**Recommendation:** {recommendation}")
             st.write(f"**Action Plan:** {action_plan}")
+
+            # ----- Related Records -----
+            st.markdown("### Related Records")
+            related = load_related_index().ticket_detail(selected_ticket)
+            st.write(f"**Companies:** {', '.join(map(str, related['company_ids'])) or 'None linked'}")
+            show_related("Deals", related["deals"],
+                         ["Record ID", "Deal Stage", "Amount", "Deal Score", "Days to close"])
         else:
             st.info("No tickets match the selected filter criteria.")
 
 elif dataset == "Companies":
-    df = load_companies()
+    df = load_companies(data_version("data/companies.csv"))
+    segments = assign_segments(data_version("data/companies.csv", DEFAULT_SEGMENT_MODEL_PATH))
+    if segments is not None:
+        df = pd.concat([df, segments], axis=1)
     st.title("🏢  Companies")
     
     # Create two tabs: Overview and Visual Insights
@@ -355,6 +663,7 @@ elif dataset == "Companies":
         st.subheader("Dataset Overview")
         st.write(f"Rows: {df.shape[0]} | Columns: {df.shape[1]}")
         st.dataframe(df.iloc[:, :100].head())
+        show_profile("data/companies.csv")
     
     with tab2:
         st.title("Dashboard")
@@ -391,6 +700,12 @@ elif dataset == "Companies":
             form_submission_filter = st.checkbox("Only show companies with Form Submission YN = Yes", value=False)
             close_filter = st.checkbox("Only show companies with Close YN = Yes", value=False)
 
+            if segments is not None:
+                st.markdown("### Segment Filters")
+                segment_column = st.selectbox("Segmentation", options=segments.columns.tolist())
+                segment_options = sorted(df[segment_column].unique().tolist())
+                selected_segments = st.multiselect("Segment", options=segment_options, default=segment_options)
+
         # ----- Filter the DataFrame -----
         filtered_df = df[df["Create Date_Year"].isin(selected_years)]
 
@@ -415,6 +730,8 @@ elif dataset == "Companies":
             filtered_df = filtered_df[filtered_df["Form Submission YN"] == 1]
         if close_filter:
             filtered_df = filtered_df[filtered_df["Close YN"] == 1]
+        if segments is not None:
+            filtered_df = filtered_df[filtered_df[segment_column].isin(selected_segments)]
 
         # ----- Compute Additional Metrics -----
         # Create a "Tech Count" column that counts the number of web technologies (assumed binary indicators)
@@ -438,6 +755,29 @@ elif dataset == "Companies":
             close_count = filtered_df[filtered_df["Close YN"] == 1].shape[0]
             st.metric("Companies with Close", close_count)
 
+        # ----- Per-Segment KPIs -----
+        if segments is not None:
+            st.markdown("---")
+            st.subheader(f"Segment KPIs ({segment_column.replace('Cluster_', '')})")
+            segment_kpis = filtered_df.groupby(segment_column).agg(
+                Companies=("Close YN", "size"),
+                **{"Form Submission Rate": ("Form Submission YN", "mean"),
+                   "Close Rate": ("Close YN", "mean"),
+                   "Avg Tech Count": ("Tech Count", "mean")}
+            )
+            st.dataframe(
+                segment_kpis,
+                column_config={
+                    "Form Submission Rate": st.column_config.ProgressColumn(
+                        "Form Submission Rate", format="%.2f", min_value=0.0, max_value=1.0),
+                    "Close Rate": st.column_config.ProgressColumn(
+                        "Close Rate", format="%.2f", min_value=0.0, max_value=1.0),
+                    "Avg Tech Count": st.column_config.NumberColumn("Avg Tech Count", format="%.1f"),
+                },
+            )
+        else:
+            st.info("Train the segment model in Model.ipynb to enable segment filters and KPIs.")
+
         # ----- Visualization 1: Company Type Distribution -----
         st.markdown("---")
         st.subheader("Company Type Distribution")
@@ -492,10 +832,15 @@ elif dataset == "Companies":
         # ----- Company Details & Recommendations -----
         st.markdown("---")
         st.subheader("Company Details and Recommendations")
-        # Use the DataFrame index as an identifier for selection
+        # Select by Record ID when available, otherwise fall back to the DataFrame index
         if not filtered_df.empty:
-            selected_company = st.selectbox("Select a Company (by row index)", filtered_df.index.tolist())
-            company_details = filtered_df.loc[selected_company]
+            if "Record ID" in filtered_df.columns:
+                selected_record = st.selectbox("Select a Company (Record ID)", filtered_df["Record ID"].tolist())
+                company_details = filtered_df[filtered_df["Record ID"] == selected_record].iloc[0]
+            else:
+                selected_record = None
+                selected_company = st.selectbox("Select a Company (by row index)", filtered_df.index.tolist())
+                company_details = filtered_df.loc[selected_company]
             st.markdown("### Company Details")
             st.write(company_details)
             
@@ -516,5 +861,41 @@ elif dataset == "Companies":
             st.markdown("#### Recommendations")
             st.write(f"**Recommendation:** {recommendation}")
             st.write(f"**Action Plan:** {action_plan}")
+
+            # ----- Related Records -----
+            if selected_record is not None:
+                st.markdown("### Related Records")
+                related = load_related_index().company_detail(selected_record)
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Deal Revenue", f"${related['revenue']:,.0f}")
+                with col2:
+                    st.metric("Closed Won Revenue", f"${related['won_revenue']:,.0f}")
+                with col3:
+                    st.metric("Parent Group Revenue", f"${related['group_revenue']:,.0f}")
+                show_related("Deals", related["deals"],
+                             ["Record ID", "Deal Stage", "Amount", "Deal Score", "Days to close"])
+                show_related("Tickets", related["tickets"],
+                             ["Ticket ID", "Ticket status", "Response time hours", "Implementation Duration Days"])
+                st.write(f"**Parent Company:** {', '.join(related['parent_names']) or 'None'}")
+                st.write(f"**Sibling Companies:** {', '.join(map(str, related['siblings'])) or 'None'}")
+                st.write(f"**Child Companies:** {', '.join(map(str, related['children'])) or 'None'}")
+
+                # ----- Lookalike Companies -----
+                st.markdown("### Lookalike Companies")
+                closed_only = st.checkbox("Only closed customers", value=True)
+                lookalikes = load_lookalike_index().query(selected_record, k=10, closed_only=closed_only)
+                if lookalikes.empty:
+                    st.write("No similar companies found.")
+                else:
+                    st.dataframe(
+                        lookalikes,
+                        column_config={
+                            "Similarity": st.column_config.ProgressColumn(
+                                "Similarity", format="%.2f", min_value=0.0, max_value=1.0),
+                            "Deal Revenue": st.column_config.NumberColumn("Deal Revenue", format="$%.0f"),
+                        },
+                        hide_index=True,
+                    )
         else:
             st.info("No companies match the selected filter criteria.")
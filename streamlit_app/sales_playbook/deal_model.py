@@ -0,0 +1,371 @@
+"""
+Persisted deal-win model.
+
+Reproduces the deal prediction from Final_code / Model as one fitted
+pipeline: a variance-threshold selector, a standard scaler, the feature
+list kept by an L1 logistic regression and an XGBClassifier on those
+features. The pipeline is saved with joblib together with the input
+schema and its hash, so scoring a frame whose columns have drifted fails
+loudly instead of silently misaligning features.
+
+Train from the repository root with:
+
+    python -m sales_playbook.deal_model train --output models/deal_win.joblib
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_selection import VarianceThreshold
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from typing import Dict, List, Optional
+from xgboost import XGBClassifier
+
+from sales_playbook.feature_selection import DEFAULT_CS, l1_path
+from sales_playbook.graph_index import load_or_build
+from sales_playbook.ids import ID_COLUMNS, merge_on_ids, normalize_ids
+from sales_playbook.ingest import load_typed_csv
+from sales_playbook.relationships import Edges
+
+TARGET = 'Is Closed Won'
+
+# Columns that encode the outcome, or are derived from the deal stage or its
+# win probability (which HubSpot sets from the outcome once a deal closes)
+LEAKAGE_COLUMNS: List[str] = [
+    'Is closed lost', 'Forecast category_Closed won', 'Deal probability',
+    'Close YN', 'Deal Score', 'Deal Stage',
+    'Weighted amount', 'Weighted amount in company currency',
+    'Forecast amount', 'Forecast probability',
+    'Is Closed (numeric)', 'Is Open (numeric)', 'Is Deal Closed?',
+]
+
+# Every column starting with one of these (the one-hot Forecast category
+# and Deal Stage dummies) is a leakage column too
+LEAKAGE_PREFIXES: List[str] = ['Forecast category', 'Deal Stage']
+
+
+def leakage_columns(columns) -> List[str]:
+    """
+    The columns that LEAKAGE_COLUMNS or LEAKAGE_PREFIXES exclude, on the deal
+    or the 'Company_' side.
+
+    Args:
+        columns: Column names
+
+    Returns:
+        List[str]: Leakage columns among columns, in their order
+    """
+    def leaked(col: str) -> bool:
+        name = col[len('Company_'):] if col.startswith('Company_') else col
+        return name in LEAKAGE_COLUMNS or name.startswith(tuple(LEAKAGE_PREFIXES))
+
+    return [col for col in columns if leaked(col)]
+
+
+DEFAULT_MODEL_PATH = os.path.join('models', 'deal_win.joblib')
+
+# Bumped whenever the saved layout changes
+_FORMAT_VERSION = 1
+
+
+def build_deal_company_frame(deals: pd.DataFrame,
+                             companies: Optional[pd.DataFrame] = None,
+                             edges: Optional[Edges] = None) -> pd.DataFrame:
+    """
+    One row per deal, with the first linked company's attributes attached.
+
+    Args:
+        deals (pd.DataFrame): Deals with 'Record ID'
+        companies (pd.DataFrame, optional): Companies with 'Record ID'
+        edges (Edges, optional): (company IDs, deal IDs) from the
+            relationship index
+
+    Returns:
+        pd.DataFrame: deals (same row order) plus 'Company_Record_ID' and
+            'Company_'-prefixed company columns when companies are given
+    """
+    if companies is None or edges is None:
+        return deals.copy()
+
+    company_ids, deal_ids = edges
+    first_company = pd.Series(company_ids, index=deal_ids)
+    first_company = first_company[~first_company.index.duplicated()]
+
+    frame = deals.copy()
+    frame['Company_Record_ID'] = normalize_ids(normalize_ids(frame['Record ID']).map(first_company))
+    frame = merge_on_ids(frame, companies.add_prefix('Company_'), 'Company_Record_ID', 'Company_Record ID', how='left')
+    return frame.drop(columns='Company_Record ID')
+
+
+def feature_matrix(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Numeric model inputs: every int64 / float64 column except IDs, the
+    target and leakage_columns(), with missing values filled with 0.
+
+    Args:
+        frame (pd.DataFrame): Output of build_deal_company_frame
+
+    Returns:
+        pd.DataFrame: float64 feature frame indexed like frame
+    """
+    numeric = frame.select_dtypes(include=['int64', 'float64'])
+    excluded = set(ID_COLUMNS) | {TARGET, f'Company_{TARGET}'} | set(leakage_columns(numeric.columns))
+    columns = [col for col in numeric.columns if col not in excluded]
+    return numeric[columns].astype('float64').fillna(0)
+
+
+def schema_hash(columns: List[str]) -> str:
+    """Stable hash of an ordered column list."""
+    return hashlib.sha256(json.dumps(list(columns)).encode()).hexdigest()[:16]
+
+
+class DealWinModel:
+    """
+    Variance threshold -> scaler -> L1 feature list -> XGBClassifier.
+    """
+
+    def __init__(self,
+                 variance_threshold: float = 0.01,
+                 l1_grid: Optional[np.ndarray] = None,
+                 cv: int = 5,
+                 random_state: int = 42,
+                 n_jobs: int = -1):
+        """
+        Initialize an unfitted model.
+
+        Args:
+            variance_threshold (float): VarianceThreshold cut-off
+            l1_grid (np.ndarray, optional): C values on the L1 selector's
+                path; defaults to np.logspace(-3, 1, 10)
+            cv (int): Cross-validation folds for the L1 path
+            random_state (int): Seed for the selector and the classifier
+            n_jobs (int): Parallel jobs for the L1 path folds
+        """
+        self.variance_threshold = variance_threshold
+        self.l1_grid = DEFAULT_CS if l1_grid is None else l1_grid
+        self.cv = cv
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+
+        self.schema: List[str] = []
+        self.schema_hash: Optional[str] = None
+        self.selector = None
+        self.scaler = None
+        self.features: List[str] = []
+        self._selected = np.empty(0, dtype=np.int64)
+        self.l1_path = None
+        self.classifier = None
+        self.metrics: Dict[str, float] = {}
+
+    def fit(self, frame: pd.DataFrame) -> 'DealWinModel':
+        """
+        Fit the pipeline on a deal frame that includes TARGET.
+
+        Args:
+            frame (pd.DataFrame): Output of build_deal_company_frame
+
+        Returns:
+            DealWinModel: self
+        """
+        X = feature_matrix(frame)
+        y = frame[TARGET].astype(int).to_numpy()
+        self.schema = list(X.columns)
+        self.schema_hash = schema_hash(self.schema)
+
+        self.selector = VarianceThreshold(threshold=self.variance_threshold)
+        kept = self.selector.fit_transform(X.to_numpy())
+        self.scaler = StandardScaler()
+        scaled = self.scaler.fit_transform(kept)
+
+        # L1 logistic regression picks the feature list, as in the notebooks
+        self.l1_path = l1_path(scaled, y, Cs=self.l1_grid, cv=self.cv, scoring='f1',
+                               n_jobs=self.n_jobs, random_state=self.random_state)
+        selected = np.flatnonzero(self.l1_path.support())
+        if len(selected) == 0:
+            # Everything shrunk to zero: keep all variance-filtered columns
+            selected = np.arange(scaled.shape[1])
+        kept_columns = np.asarray(self.schema)[self.selector.get_support()]
+        self.features = kept_columns[selected].tolist()
+        self._selected = selected
+
+        self.classifier = XGBClassifier(n_estimators=100, eval_metric='logloss', random_state=self.random_state)
+        self.classifier.fit(scaled[:, selected], y)
+        return self
+
+    def _check_schema(self, frame: pd.DataFrame) -> None:
+        missing = [col for col in self.schema if col not in frame.columns]
+        if missing:
+            raise ValueError(
+                f"Frame does not match model schema {self.schema_hash}; "
+                f"missing {len(missing)} column(s): {missing[:5]}"
+            )
+
+    def transform(self, frame: pd.DataFrame) -> np.ndarray:
+        """
+        Apply the fitted selector, scaler and feature list.
+
+        Args:
+            frame (pd.DataFrame): Frame with every column in the schema
+
+        Returns:
+            np.ndarray: Classifier input, one row per frame row
+        """
+        self._check_schema(frame)
+        X = frame[self.schema].astype('float64').fillna(0).to_numpy()
+        return self.scaler.transform(self.selector.transform(X))[:, self._selected]
+
+    def predict_proba(self, frame: pd.DataFrame) -> pd.Series:
+        """
+        Win probability for every row.
+
+        Args:
+            frame (pd.DataFrame): Frame with every column in the schema
+
+        Returns:
+            pd.Series: Probabilities indexed like frame
+        """
+        proba = self.classifier.predict_proba(self.transform(frame))[:, 1]
+        return pd.Series(proba, index=frame.index, name='Win probability')
+
+    def evaluate(self, frame: pd.DataFrame) -> Dict[str, float]:
+        """
+        Accuracy, precision, recall, F1 and AUC on a labelled frame.
+
+        Args:
+            frame (pd.DataFrame): Frame with the schema columns and TARGET
+
+        Returns:
+            Dict[str, float]: Metric name -> value
+        """
+        y = frame[TARGET].astype(int).to_numpy()
+        proba = self.predict_proba(frame).to_numpy()
+        pred = (proba >= 0.5).astype(int)
+        return {
+            'accuracy': accuracy_score(y, pred),
+            'precision': precision_score(y, pred, zero_division=0),
+            'recall': recall_score(y, pred, zero_division=0),
+            'f1': f1_score(y, pred, zero_division=0),
+            'auc': roc_auc_score(y, proba) if len(np.unique(y)) > 1 else np.nan,
+        }
+
+    def save(self, path: str) -> None:
+        """
+        Save the fitted pipeline and its schema with joblib.
+
+        Args:
+            path (str): Output file (parent directories are created)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        joblib.dump({
+            'format_version': _FORMAT_VERSION,
+            'schema': self.schema,
+            'schema_hash': self.schema_hash,
+            'selector': self.selector,
+            'scaler': self.scaler,
+            'features': self.features,
+            'selected': self._selected,
+            'classifier': self.classifier,
+            'metrics': self.metrics,
+        }, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'DealWinModel':
+        """
+        Load a pipeline written by save().
+
+        Args:
+            path (str): Saved model file
+
+        Returns:
+            DealWinModel: Fitted model
+        """
+        state = joblib.load(path)
+        if state.get('format_version') != _FORMAT_VERSION:
+            raise ValueError(f"{path} was saved in an unsupported format; retrain the model")
+        if schema_hash(state['schema']) != state['schema_hash']:
+            raise ValueError(f"{path} has a corrupted schema")
+
+        model = cls()
+        model.schema = state['schema']
+        model.schema_hash = state['schema_hash']
+        model.selector = state['selector']
+        model.scaler = state['scaler']
+        model.features = state['features']
+        model._selected = state['selected']
+        model.classifier = state['classifier']
+        model.metrics = state['metrics']
+        return model
+
+
+def train(deals_path: str = 'data/deals.csv',
+          companies_path: Optional[str] = 'data/companies.csv',
+          mappings_path: str = 'mappings.json',
+          output: str = DEFAULT_MODEL_PATH,
+          test_size: float = 0.2,
+          random_state: int = 42) -> DealWinModel:
+    """
+    Train on a stratified split, record hold-out metrics and save the model.
+
+    Company attributes are joined in when companies_path exists.
+
+    Args:
+        deals_path (str): Cleaned deals CSV
+        companies_path (str, optional): Cleaned companies CSV
+        mappings_path (str): Relationship mappings JSON
+        output (str): Where to save the model
+        test_size (float): Hold-out fraction
+        random_state (int): Split and model seed
+
+    Returns:
+        DealWinModel: The saved model, with .metrics filled in
+    """
+    deals = load_typed_csv(deals_path)
+    companies, edges = None, None
+    if companies_path and os.path.exists(companies_path):
+        companies = load_typed_csv(companies_path, low_memory=False)
+        edges = load_or_build(mappings_path).edges('company_deals')
+
+    frame = build_deal_company_frame(deals, companies, edges)
+    train_frame, test_frame = train_test_split(
+        frame, test_size=test_size, random_state=random_state, stratify=frame[TARGET]
+    )
+
+    model = DealWinModel(random_state=random_state).fit(train_frame)
+    model.metrics = model.evaluate(test_frame)
+    model.save(output)
+    return model
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m sales_playbook.deal_model',
+                                     description='Deal-win model tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = commands.add_parser('train', help='Fit and save the deal-win model')
+    train_parser.add_argument('--deals', default='data/deals.csv')
+    train_parser.add_argument('--companies', default='data/companies.csv')
+    train_parser.add_argument('--mappings', default='mappings.json')
+    train_parser.add_argument('--output', default=DEFAULT_MODEL_PATH)
+    train_parser.add_argument('--test-size', type=float, default=0.2)
+    train_parser.add_argument('--random-state', type=int, default=42)
+
+    args = parser.parse_args(argv)
+    if args.command == 'train':
+        model = train(args.deals, args.companies, args.mappings, args.output, args.test_size, args.random_state)
+        print(f"Saved {args.output} (schema {model.schema_hash}, "
+              f"{len(model.features)} of {len(model.schema)} features)")
+        for name, value in model.metrics.items():
+            print(f"  {name}: {value:.3f}")
+
+
+if __name__ == '__main__':
+    main()
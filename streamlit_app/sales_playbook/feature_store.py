@@ -0,0 +1,290 @@
+"""
+Versioned on-disk store for the deals x companies modeling matrix.
+
+The deal-prediction section of Final_code expands CompanyToDeals, joins
+deals and companies, drops IDs and leakage columns, keeps the numeric
+columns and applies VarianceThreshold before every experiment. The store
+runs that once and writes the result under
+
+    <root>/<version>/X.npy          float64, column-major (one contiguous run per feature)
+    <root>/<version>/y.npy          labels
+    <root>/<version>/ids.npy        (deal ID, company ID) per row
+    <root>/<version>/train.npy      stratified train row positions
+    <root>/<version>/test.npy       test row positions
+    <root>/<version>/manifest.json  columns, config, sources, shapes
+
+The version is a hash of the source-file fingerprints and the
+transformation config, so a changed CSV or config gets its own directory.
+The notebook's cleaning steps run before the store sees the frames, so a
+change to them needs a config key of its own (any extra key is hashed).
+Experiments open the arrays memory-mapped instead of rebuilding them.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_selection import VarianceThreshold
+from sklearn.model_selection import train_test_split
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sales_playbook.deal_model import LEAKAGE_COLUMNS, LEAKAGE_PREFIXES, TARGET
+from sales_playbook.ids import merge_on_ids
+from sales_playbook.ingest import data_version
+from sales_playbook.relationships import Edges
+
+DEFAULT_ROOT = 'features'
+
+# Transformation settings; every key is part of the version hash
+DEFAULT_CONFIG: Dict = {
+    'target': TARGET,
+    'leakage_columns': LEAKAGE_COLUMNS,
+    'leakage_prefixes': LEAKAGE_PREFIXES,
+    'id_columns': ['Company_Record_ID', 'Deal_Record_ID', 'Record ID_x', 'Record ID_y'],
+    'dropna_companies': True,
+    'variance_threshold': 0.01,
+    'test_size': 0.2,
+    'random_state': 42,
+    'stratify': True,
+}
+
+# Bumped whenever the on-disk layout changes
+_FORMAT_VERSION = 1
+
+
+def store_version(sources: Sequence[str], config: Dict) -> str:
+    """
+    Version of a materialized matrix.
+
+    Args:
+        sources (Sequence[str]): Source files the matrix is built from
+        config (Dict): Transformation config
+
+    Returns:
+        str: 16-character hex digest of the source fingerprints and config
+    """
+    payload = json.dumps({
+        'format': _FORMAT_VERSION,
+        'sources': data_version(*sources),
+        'config': config,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def build_matrix(deals: pd.DataFrame,
+                 companies: pd.DataFrame,
+                 edges: Edges,
+                 config: Optional[Dict] = None) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """
+    Run the Final_code modeling transformations.
+
+    Args:
+        deals (pd.DataFrame): Cleaned deals with 'Record ID'
+        companies (pd.DataFrame): Cleaned companies with 'Record ID'
+        edges (Edges): (company IDs, deal IDs) from the relationship index
+        config (Dict, optional): Overrides of DEFAULT_CONFIG
+
+    Returns:
+        Tuple[pd.DataFrame, np.ndarray, np.ndarray]: Variance-filtered
+            numeric features, labels and (deal ID, company ID) per row
+    """
+    config = dict(DEFAULT_CONFIG, **(config or {}))
+    if config['dropna_companies']:
+        companies = companies.dropna()
+
+    company_ids, deal_ids = edges
+    links = pd.DataFrame({'Company_Record_ID': company_ids, 'Deal_Record_ID': deal_ids})
+    deals_with_company = merge_on_ids(links, deals, 'Deal_Record_ID', 'Record ID')
+    df = merge_on_ids(deals_with_company, companies, 'Company_Record_ID', 'Record ID')
+
+    ids = df[['Deal_Record_ID', 'Company_Record_ID']].to_numpy(dtype=np.int64)
+    df = df.drop(columns=config['id_columns'], errors='ignore')
+    df = df.select_dtypes(exclude=['object'])
+    df = df.drop(columns=config['leakage_columns'], errors='ignore')
+    df = df.drop(columns=[col for col in df.columns if col.startswith(tuple(config['leakage_prefixes']))])
+
+    y = df[config['target']].to_numpy()
+    X = df.drop(columns=[config['target']])
+    numeric = X.select_dtypes(include=['int64', 'float64'])
+    selector = VarianceThreshold(threshold=config['variance_threshold'])
+    values = selector.fit_transform(numeric)
+    X = pd.DataFrame(values, columns=numeric.columns[selector.get_support()])
+    return X, y, ids
+
+
+class FeatureSet:
+    """
+    Memory-mapped view of one materialized version.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a version directory; arrays are mapped, not read.
+
+        Args:
+            path (str): <root>/<version> directory
+        """
+        self.path = path
+        with open(os.path.join(path, 'manifest.json')) as f:
+            self.manifest: Dict = json.load(f)
+        if self.manifest.get('format_version') != _FORMAT_VERSION:
+            raise ValueError(f"{path} was written in an unsupported format; rebuild it")
+
+        self.version: str = self.manifest['version']
+        self.columns: List[str] = self.manifest['columns']
+        self.X = np.load(os.path.join(path, 'X.npy'), mmap_mode='r')
+        self.y = np.load(os.path.join(path, 'y.npy'), mmap_mode='r')
+        self.ids = np.load(os.path.join(path, 'ids.npy'), mmap_mode='r')
+        self.train_index = np.load(os.path.join(path, 'train.npy'))
+        self.test_index = np.load(os.path.join(path, 'test.npy'))
+
+    @property
+    def shape(self):
+        return self.X.shape
+
+    def frame(self) -> pd.DataFrame:
+        """Features as a DataFrame over the mapped array (no copy)."""
+        return pd.DataFrame(self.X, columns=self.columns, copy=False)
+
+    def labels(self) -> pd.Series:
+        """Labels as a Series named after the target."""
+        return pd.Series(self.y, name=self.manifest['config']['target'])
+
+    def split(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
+        """
+        Train/test frames from the stored split manifest.
+
+        Returns:
+            Tuple: X_train, X_test, y_train, y_test in train_test_split order
+        """
+        X, y = self.frame(), self.labels()
+        return (X.iloc[self.train_index], X.iloc[self.test_index],
+                y.iloc[self.train_index], y.iloc[self.test_index])
+
+
+class FeatureStore:
+    """
+    Directory of versioned modeling matrices.
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT):
+        """
+        Initialize a store rooted at a directory (created on first write).
+
+        Args:
+            root (str): Store directory
+        """
+        self.root = root
+
+    def versions(self) -> List[str]:
+        """Materialized versions, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        found = []
+        for name in os.listdir(self.root):
+            manifest = os.path.join(self.root, name, 'manifest.json')
+            if '.tmp-' not in name and os.path.exists(manifest):
+                found.append((os.path.getmtime(manifest), name))
+        return [name for _, name in sorted(found)]
+
+    def open(self, version: Optional[str] = None) -> FeatureSet:
+        """
+        Open a version (the most recent one when not given).
+
+        Args:
+            version (str, optional): Version to open
+
+        Returns:
+            FeatureSet: Memory-mapped arrays and manifest
+        """
+        if version is None:
+            versions = self.versions()
+            if not versions:
+                raise FileNotFoundError(f"No feature sets under {self.root}")
+            version = versions[-1]
+        return FeatureSet(os.path.join(self.root, version))
+
+    def materialize(self,
+                    deals: pd.DataFrame,
+                    companies: pd.DataFrame,
+                    edges: Edges,
+                    sources: Sequence[str],
+                    config: Optional[Dict] = None) -> FeatureSet:
+        """
+        Build the matrix and write it as a new version (kept if it exists).
+
+        Args:
+            deals (pd.DataFrame): Cleaned deals
+            companies (pd.DataFrame): Cleaned companies
+            edges (Edges): (company IDs, deal IDs)
+            sources (Sequence[str]): Files the frames were built from
+            config (Dict, optional): Overrides of DEFAULT_CONFIG
+
+        Returns:
+            FeatureSet: The written version, opened
+        """
+        config = dict(DEFAULT_CONFIG, **(config or {}))
+        version = store_version(sources, config)
+        path = os.path.join(self.root, version)
+        if os.path.exists(os.path.join(path, 'manifest.json')):
+            return FeatureSet(path)
+
+        X, y, ids = build_matrix(deals, companies, edges, config)
+        positions = np.arange(len(X))
+        train, test = train_test_split(positions, test_size=config['test_size'],
+                                       random_state=config['random_state'],
+                                       stratify=y if config['stratify'] else None)
+
+        # Write into a scratch directory and rename, so readers never see a partial version
+        scratch = f"{path}.tmp-{os.getpid()}"
+        os.makedirs(scratch, exist_ok=True)
+        np.save(os.path.join(scratch, 'X.npy'), np.asfortranarray(X.to_numpy(dtype=np.float64)))
+        np.save(os.path.join(scratch, 'y.npy'), y)
+        np.save(os.path.join(scratch, 'ids.npy'), ids)
+        np.save(os.path.join(scratch, 'train.npy'), train)
+        np.save(os.path.join(scratch, 'test.npy'), test)
+        with open(os.path.join(scratch, 'manifest.json'), 'w') as f:
+            json.dump({
+                'format_version': _FORMAT_VERSION,
+                'version': version,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'sources': {source: data_version(source) for source in sources},
+                'config': config,
+                'columns': X.columns.tolist(),
+                'shape': list(X.shape),
+                'train_rows': int(len(train)),
+                'test_rows': int(len(test)),
+            }, f, indent=2, default=str)
+        try:
+            os.replace(scratch, path)
+        except OSError:
+            # Another process wrote the same version first
+            shutil.rmtree(scratch, ignore_errors=True)
+        return FeatureSet(path)
+
+    def get_or_build(self,
+                     sources: Sequence[str],
+                     load: Callable[[], Tuple[pd.DataFrame, pd.DataFrame, Edges]],
+                     config: Optional[Dict] = None) -> FeatureSet:
+        """
+        Open the version for these sources and config, building it on a miss.
+
+        Args:
+            sources (Sequence[str]): Files the frames are built from
+            load (Callable): Returns (deals, companies, edges); only called
+                when the version is not on disk yet
+            config (Dict, optional): Overrides of DEFAULT_CONFIG
+
+        Returns:
+            FeatureSet: Memory-mapped arrays and manifest
+        """
+        config = dict(DEFAULT_CONFIG, **(config or {}))
+        path = os.path.join(self.root, store_version(sources, config))
+        if os.path.exists(os.path.join(path, 'manifest.json')):
+            return FeatureSet(path)
+        deals, companies, edges = load()
+        return self.materialize(deals, companies, edges, sources, config)
@@ -0,0 +1,408 @@
+"""
+Deal-progression time series and per-segment forecasts.
+
+build_series() turns the deals table into weekly or monthly series of
+created, won and lost deals and won revenue, overall and per segment
+(Deal Type, source attribution, ...), with one np.bincount per segment
+column. SegmentForecaster fits Holt's linear-trend exponential smoothing
+to every series at once: the smoothing recursion runs over time with
+(grid point x series) arrays, so each step updates every candidate
+(alpha, beta) of every segment in a single vectorized operation, and each
+series keeps the grid point with the lowest one-step-ahead error.
+
+The fitted state (level, trend and error sum for every grid point) is
+exactly what the recursion needs to continue, so when new periods arrive
+update() feeds only those periods instead of refitting. It falls back to a
+full fit when the segments or the already-fitted history change.
+"""
+
+import hashlib
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Sequence
+
+METRICS: List[str] = ['created', 'won', 'lost', 'revenue']
+
+DEFAULT_SEGMENTS: List[str] = ['Deal Type', 'Deal source attribution 2']
+
+DEFAULT_FORECAST_PATH = os.path.join('models', 'forecasts.joblib')
+
+# Candidate smoothing parameters, every combination is tried per series
+DEFAULT_ALPHAS = np.linspace(0.05, 0.95, 10)
+DEFAULT_BETAS = np.array([0.0, 0.05, 0.1, 0.2, 0.3])
+
+# Bumped whenever the saved layout changes
+_FORMAT_VERSION = 1
+
+# z-scores for the symmetric forecast intervals offered by forecast()
+_Z = {0.5: 0.674, 0.8: 1.282, 0.9: 1.645, 0.95: 1.960}
+
+
+def segment_labels(deals: pd.DataFrame, column: str) -> pd.Series:
+    """
+    Segment label per deal, from a categorical column or its one-hot columns.
+
+    Args:
+        deals (pd.DataFrame): Raw deals (with column) or cleaned deals
+            (with '<column>_<value>' flags)
+        column (str): Segment column, e.g. 'Deal Type'
+
+    Returns:
+        pd.Series: Labels; 'Unknown' when missing or no flag is set
+    """
+    if column in deals.columns:
+        return deals[column].astype(object).fillna('Unknown').astype(str)
+    prefix = f'{column}_'
+    columns = [col for col in deals.columns if col.startswith(prefix)]
+    if not columns:
+        raise KeyError(f"No '{column}' column or '{prefix}' flags in the deals frame")
+    flags = deals[columns].fillna(0).to_numpy() != 0
+    labels = np.array([col[len(prefix):] for col in columns] + ['Unknown'], dtype=object)
+    first = np.where(flags.any(axis=1), flags.argmax(axis=1), len(columns))
+    return pd.Series(labels[first], index=deals.index)
+
+
+class DealSeries:
+    """
+    Matrix of per-period values, one row per (dimension, segment, metric).
+    """
+
+    def __init__(self, keys: pd.DataFrame, periods: pd.PeriodIndex, values: np.ndarray, complete: int):
+        """
+        Initialize from built arrays; use build_series() to create one.
+
+        Args:
+            keys (pd.DataFrame): 'dimension', 'segment' and 'metric' per row
+            periods (pd.PeriodIndex): One period per column
+            values (np.ndarray): (series x periods) float64 values
+            complete (int): Leading periods that are complete; the rest
+                (the period containing the as-of date) are still filling up
+        """
+        self.keys = keys.reset_index(drop=True)
+        self.periods = periods
+        self.values = values
+        self.complete = complete
+
+    @property
+    def freq(self) -> str:
+        return self.periods.freqstr
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long frame: 'dimension', 'segment', 'metric', 'period', 'value'."""
+        n_series, n_periods = self.values.shape
+        frame = self.keys.loc[np.repeat(np.arange(n_series), n_periods)].reset_index(drop=True)
+        frame['period'] = np.tile(self.periods, n_series)
+        frame['value'] = self.values.ravel()
+        return frame
+
+
+def build_series(deals: pd.DataFrame,
+                 freq: str = 'M',
+                 segment_by: Optional[Sequence[str]] = None,
+                 as_of=None) -> DealSeries:
+    """
+    Created / won / lost counts and won revenue per period and segment.
+
+    Deals count as created in the period of 'Create Date'; won and lost
+    deals (and won 'Amount') count in the period of 'Close Date'. Open
+    deals' future close dates are not counted.
+
+    Args:
+        deals (pd.DataFrame): Deals with 'Create Date', 'Close Date',
+            'Is Closed Won', 'Is closed lost' and 'Amount'
+        freq (str): 'W' (weekly) or 'M' (monthly)
+        segment_by (Sequence[str], optional): Segment columns; defaults to
+            DEFAULT_SEGMENTS (those missing from deals are skipped)
+        as_of: Last day covered, including events later that day; defaults
+            to the latest counted event
+
+    Returns:
+        DealSeries: An 'All' segment plus one row per segment and metric
+    """
+    segment_by = DEFAULT_SEGMENTS if segment_by is None else list(segment_by)
+    created = pd.to_datetime(deals['Create Date'], errors='coerce')
+    closed = pd.to_datetime(deals['Close Date'], errors='coerce')
+    won = deals['Is Closed Won'].fillna(0).to_numpy() == 1
+    lost = deals['Is closed lost'].fillna(0).to_numpy() == 1
+    amount = deals['Amount'].fillna(0).to_numpy(dtype=np.float64)
+
+    if as_of is None:
+        as_of = max(created.max(), closed[won | lost].max())
+    # Whole days: events later on the as_of day still count
+    as_of = pd.Timestamp(as_of).normalize()
+    first = min(created.min(), closed[won | lost].min())
+    periods = pd.period_range(pd.Period(first, freq=freq), pd.Period(as_of, freq=freq), freq=freq)
+    n_periods = len(periods)
+    # The as-of period is partial unless as_of is its last day
+    complete = n_periods if as_of >= periods[-1].end_time.normalize() else n_periods - 1
+
+    def period_codes(dates: pd.Series) -> np.ndarray:
+        codes = np.full(len(dates), -1, dtype=np.int64)
+        valid = dates.notna().to_numpy() & (dates.dt.normalize() <= as_of).to_numpy()
+        codes[valid] = periods.get_indexer(dates[valid].dt.to_period(freq))
+        return codes
+
+    created_code = period_codes(created)
+    closed_code = period_codes(closed)
+    # (metric, period code, weight) of every counted event
+    events = [
+        ('created', created_code, np.ones(len(deals))),
+        ('won', np.where(won, closed_code, -1), np.ones(len(deals))),
+        ('lost', np.where(lost, closed_code, -1), np.ones(len(deals))),
+        ('revenue', np.where(won, closed_code, -1), amount),
+    ]
+
+    dimensions = [('All', np.zeros(len(deals), dtype=np.int64), pd.Index(['All']))]
+    for column in segment_by:
+        try:
+            codes, labels = pd.factorize(segment_labels(deals, column), sort=True)
+        except KeyError:
+            continue
+        dimensions.append((column, codes.astype(np.int64), pd.Index(labels)))
+
+    keys, blocks = [], []
+    for dimension, codes, labels in dimensions:
+        for metric, period, weight in events:
+            counted = period >= 0
+            flat = codes[counted] * n_periods + period[counted]
+            block = np.bincount(flat, weights=weight[counted], minlength=len(labels) * n_periods)
+            blocks.append(block.reshape(len(labels), n_periods))
+            keys.append(pd.DataFrame({'dimension': dimension, 'segment': labels, 'metric': metric}))
+
+    return DealSeries(pd.concat(keys, ignore_index=True), periods, np.vstack(blocks), complete)
+
+
+def _history_digest(series: DealSeries, n_periods: int) -> str:
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(series.keys, index=False).to_numpy().tobytes())
+    digest.update(repr((series.freq, str(series.periods[0]) if len(series.periods) else None, n_periods)).encode())
+    digest.update(np.ascontiguousarray(series.values[:, :n_periods]).tobytes())
+    return digest.hexdigest()
+
+
+class SegmentForecaster:
+    """
+    Holt linear-trend smoothing for every series, grid-searched and incremental.
+    """
+
+    def __init__(self, alphas: Optional[np.ndarray] = None, betas: Optional[np.ndarray] = None):
+        """
+        Initialize an unfitted forecaster.
+
+        Args:
+            alphas (np.ndarray, optional): Level smoothing candidates;
+                defaults to DEFAULT_ALPHAS
+            betas (np.ndarray, optional): Trend smoothing candidates;
+                defaults to DEFAULT_BETAS
+        """
+        alphas = DEFAULT_ALPHAS if alphas is None else np.asarray(alphas, dtype=np.float64)
+        betas = DEFAULT_BETAS if betas is None else np.asarray(betas, dtype=np.float64)
+        grid_alpha, grid_beta = np.meshgrid(alphas, betas, indexing='ij')
+        # (grid, 1) so they broadcast over series
+        self.alpha = grid_alpha.ravel()[:, None]
+        self.beta = grid_beta.ravel()[:, None]
+
+        self.keys: Optional[pd.DataFrame] = None
+        self.periods: Optional[pd.PeriodIndex] = None
+        self.digest: Optional[str] = None
+        self.level = self.trend = self.sse = None
+        self.last_fit_periods = 0
+
+    @property
+    def n_fitted(self) -> int:
+        return 0 if self.periods is None else len(self.periods)
+
+    def _step(self, values: np.ndarray) -> None:
+        """Run the recursion over new columns for every grid point and series."""
+        for y in values.T:
+            predicted = self.level + self.trend
+            error = y - predicted
+            self.sse += error ** 2
+            self.level = predicted + self.alpha * error
+            self.trend = self.trend + self.alpha * self.beta * error
+
+    def fit(self, series: DealSeries) -> 'SegmentForecaster':
+        """
+        Fit every series on its complete periods from scratch.
+
+        Args:
+            series (DealSeries): Output of build_series
+
+        Returns:
+            SegmentForecaster: self
+        """
+        values = series.values[:, :series.complete]
+        n_grid, n_series = len(self.alpha), len(values)
+        first = values[:, 0] if values.shape[1] else np.zeros(n_series)
+        self.level = np.tile(first, (n_grid, 1))
+        self.trend = np.zeros((n_grid, n_series))
+        self.sse = np.zeros((n_grid, n_series))
+        self._step(values[:, 1:])
+
+        self.keys = series.keys.copy()
+        self.periods = series.periods[:series.complete]
+        self.digest = _history_digest(series, series.complete)
+        self.last_fit_periods = values.shape[1]
+        return self
+
+    def update(self, series: DealSeries) -> 'SegmentForecaster':
+        """
+        Continue the fit with newly completed periods.
+
+        Refits from scratch when nothing is fitted yet, or when the segments
+        or any already-fitted period differ from the fitted history.
+
+        Args:
+            series (DealSeries): Output of build_series over the same deals
+                plus newer ones
+
+        Returns:
+            SegmentForecaster: self
+        """
+        fitted = self.n_fitted
+        compatible = (
+            fitted > 0
+            and series.freq == self.periods.freqstr
+            and series.complete >= fitted
+            and series.periods[0] == self.periods[0]
+            and _history_digest(series, fitted) == self.digest
+        )
+        if not compatible:
+            return self.fit(series)
+        if series.complete > fitted:
+            self._step(series.values[:, fitted:series.complete])
+            self.periods = series.periods[:series.complete]
+            self.digest = _history_digest(series, series.complete)
+            self.last_fit_periods = series.complete - fitted
+        else:
+            self.last_fit_periods = 0
+        return self
+
+    def _best(self) -> np.ndarray:
+        """Grid point with the lowest one-step error, per series."""
+        return self.sse.argmin(axis=0)
+
+    def params(self) -> pd.DataFrame:
+        """
+        Chosen parameters per series.
+
+        Returns:
+            pd.DataFrame: keys plus 'alpha', 'beta' and 'rmse' (one-step-ahead)
+        """
+        best, columns = self._best(), np.arange(self.sse.shape[1])
+        frame = self.keys.copy()
+        frame['alpha'] = self.alpha[best, 0]
+        frame['beta'] = self.beta[best, 0]
+        frame['rmse'] = np.sqrt(self.sse[best, columns] / max(self.n_fitted - 1, 1))
+        return frame
+
+    def forecast(self, horizon: int = 6, interval: float = 0.8) -> pd.DataFrame:
+        """
+        Point forecasts and intervals for every series.
+
+        Args:
+            horizon (int): Periods ahead
+            interval (float): Interval coverage, one of 0.5, 0.8, 0.9, 0.95
+
+        Returns:
+            pd.DataFrame: keys plus 'period', 'forecast', 'lower' and
+                'upper', floored at 0 (counts and revenue are non-negative)
+        """
+        if self.periods is None:
+            raise ValueError("Fit the forecaster before forecasting")
+        if interval not in _Z:
+            raise ValueError(f"interval must be one of {sorted(_Z)}")
+        best, columns = self._best(), np.arange(self.sse.shape[1])
+        level, trend = self.level[best, columns], self.trend[best, columns]
+        alpha, beta = self.alpha[best, 0], self.beta[best, 0]
+        sigma2 = self.sse[best, columns] / max(self.n_fitted - 1, 1)
+
+        steps = np.arange(1, horizon + 1)
+        point = level[:, None] + steps[None, :] * trend[:, None]
+        # Holt h-step variance: sigma^2 * (1 + sum_{j<h} (alpha * (1 + j * beta))^2)
+        increments = (alpha[:, None] * (1 + np.arange(horizon)[None, :] * beta[:, None])) ** 2
+        increments[:, 0] = 0.0
+        spread = _Z[interval] * np.sqrt(sigma2[:, None] * (1 + np.cumsum(increments, axis=1)))
+
+        n_series = len(self.keys)
+        future = pd.period_range(self.periods[-1] + 1, periods=horizon, freq=self.periods.freq)
+        frame = self.keys.loc[np.repeat(np.arange(n_series), horizon)].reset_index(drop=True)
+        frame['period'] = np.tile(future, n_series)
+        frame['forecast'] = np.maximum(point, 0).ravel()
+        frame['lower'] = np.maximum(point - spread, 0).ravel()
+        frame['upper'] = np.maximum(point + spread, 0).ravel()
+        return frame
+
+    def save(self, path: str = DEFAULT_FORECAST_PATH) -> None:
+        """
+        Save the fitted state with joblib.
+
+        Args:
+            path (str): Output file (parent directories are created)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        joblib.dump({
+            'format_version': _FORMAT_VERSION,
+            'alpha': self.alpha,
+            'beta': self.beta,
+            'keys': self.keys,
+            'periods': self.periods,
+            'digest': self.digest,
+            'level': self.level,
+            'trend': self.trend,
+            'sse': self.sse,
+        }, path)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_FORECAST_PATH) -> 'SegmentForecaster':
+        """
+        Load a forecaster written by save().
+
+        Args:
+            path (str): Saved file
+
+        Returns:
+            SegmentForecaster: Fitted forecaster, ready to update()
+        """
+        state = joblib.load(path)
+        if state.get('format_version') != _FORMAT_VERSION:
+            raise ValueError(f"{path} was saved in an unsupported format; refit the forecasts")
+        forecaster = cls()
+        forecaster.alpha, forecaster.beta = state['alpha'], state['beta']
+        forecaster.keys, forecaster.periods, forecaster.digest = state['keys'], state['periods'], state['digest']
+        forecaster.level, forecaster.trend, forecaster.sse = state['level'], state['trend'], state['sse']
+        return forecaster
+
+
+def fit_cached(series: DealSeries, path: str = DEFAULT_FORECAST_PATH) -> SegmentForecaster:
+    """
+    Load the saved forecaster, feed it the new periods and save it back.
+
+    Args:
+        series (DealSeries): Current series
+        path (str): Saved forecaster (created on first use)
+
+    Returns:
+        SegmentForecaster: Up-to-date forecaster; last_fit_periods tells how
+            many periods this call fitted
+    """
+    forecaster = None
+    if os.path.exists(path):
+        try:
+            forecaster = SegmentForecaster.load(path)
+        except ValueError:
+            forecaster = None
+    if forecaster is None:
+        forecaster = SegmentForecaster().fit(series)
+    else:
+        before = forecaster.digest
+        forecaster.update(series)
+        if forecaster.digest == before:
+            return forecaster
+    forecaster.save(path)
+    return forecaster
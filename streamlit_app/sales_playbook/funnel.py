@@ -0,0 +1,105 @@
+"""
+Single-pass deal funnel over the pipeline stages.
+
+A deal counts as having reached a stage if it has a cumulative time in that
+stage or is currently sitting in it, so deals that have already moved on
+still count towards the stages they passed through. Every count is a
+np.bincount over (group, stage) codes, so the cost is linear in the number
+of deals however many groups or stages there are.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import List, Optional
+
+from sales_playbook.durations import PIPELINE_STAGES, stage_duration_matrix
+
+# Main sales path used for stage-to-stage conversion
+FUNNEL_STAGES: List[str] = [
+    'Opportunity', "BANT Deal. Pain ID'ed", 'Deep Dive. PSP Drafted',
+    'In Trial - Trial in Progress', 'Negotiation', 'Contract Sent', 'Closed Won'
+]
+
+
+def _group_codes(df: pd.DataFrame, group_by: Optional[str]):
+    """Factorize the grouping column (missing values become 'Unknown')."""
+    if group_by is None:
+        return np.zeros(len(df), dtype=np.int64), pd.Index(['All'])
+    codes, labels = pd.factorize(df[group_by].astype(object).fillna('Unknown'), sort=True)
+    return codes.astype(np.int64), pd.Index(labels, name=group_by)
+
+
+def stage_funnel(deals: pd.DataFrame,
+                 stage_durations: Optional[pd.DataFrame] = None,
+                 stages: Optional[List[str]] = None,
+                 group_by: Optional[str] = None) -> pd.DataFrame:
+    """
+    Compute stage occupancy, reach and stage-to-stage conversion.
+
+    Args:
+        deals (pd.DataFrame): Deals with 'Deal Stage' (and optionally
+            'Is Closed Won' and the cumulative-time columns)
+        stage_durations (pd.DataFrame, optional): Precomputed output of
+            stage_duration_matrix for the same rows; built here if omitted
+        stages (List[str], optional): Ordered funnel stages; defaults to
+            FUNNEL_STAGES
+        group_by (str, optional): Column to split the funnel by, e.g.
+            'Deal owner', 'Deal Type' or 'Deal source attribution 2'
+
+    Returns:
+        pd.DataFrame: One row per (group, stage) with columns
+            occupancy  - deals currently in the stage
+            reached    - deals that entered the stage at some point
+            progressed - of those, deals that reached any later stage
+            conversion - progressed / reached * 100 (NaN for the last stage
+                         or when no deal reached the stage)
+            The index is the stage, or (group, stage) when group_by is set.
+    """
+    stages = FUNNEL_STAGES if stages is None else stages
+    if stage_durations is None:
+        stage_durations = stage_duration_matrix(deals, [s for s in stages if s in PIPELINE_STAGES])
+
+    n_stages = len(stages)
+    current = pd.Categorical(deals['Deal Stage'], categories=stages).codes.astype(np.int64)
+
+    # Deals x stages "entered this stage" matrix
+    reached = np.zeros((len(deals), n_stages), dtype=bool)
+    for position, stage in enumerate(stages):
+        if stage in stage_durations.columns:
+            reached[:, position] = stage_durations[stage].notna().to_numpy()
+    in_stage = current >= 0
+    reached[np.flatnonzero(in_stage), current[in_stage]] = True
+    if 'Closed Won' in stages and 'Is Closed Won' in deals.columns:
+        reached[:, stages.index('Closed Won')] |= deals['Is Closed Won'].fillna(False).astype(bool).to_numpy()
+
+    # A deal progressed out of a stage if it reached any later stage
+    later = np.zeros_like(reached)
+    later[:, :-1] = np.logical_or.accumulate(reached[:, :0:-1], axis=1)[:, ::-1]
+    progressed = reached & later
+
+    group_codes, group_labels = _group_codes(deals, group_by)
+    n_cells = len(group_labels) * n_stages
+
+    def cell_counts(mask: np.ndarray) -> np.ndarray:
+        rows, cols = np.nonzero(mask)
+        return np.bincount(group_codes[rows] * n_stages + cols, minlength=n_cells)
+
+    occupancy = np.bincount(group_codes[in_stage] * n_stages + current[in_stage], minlength=n_cells)
+    reached_counts = cell_counts(reached)
+    progressed_counts = cell_counts(progressed)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        conversion = np.where(reached_counts > 0, progressed_counts / reached_counts * 100, np.nan)
+    conversion.reshape(-1, n_stages)[:, -1] = np.nan
+
+    if group_by is None:
+        index = pd.Index(stages, name='Deal Stage')
+    else:
+        index = pd.MultiIndex.from_product([group_labels, stages], names=[group_by, 'Deal Stage'])
+
+    return pd.DataFrame({
+        'occupancy': occupancy,
+        'reached': reached_counts,
+        'progressed': progressed_counts,
+        'conversion': conversion,
+    }, index=index)
@@ -0,0 +1,196 @@
+"""
+HubSpot ID normalization and integer-key joins.
+
+HubSpot IDs (Record ID, Ticket ID, mapping entries) are 10-12 digit
+integers, but they arrive as ints, floats (after a NaN crept into the
+column) or strings (mappings.json keys). Everything is normalized to int64
+here so joins compare machine integers instead of hashing Python strings.
+Lookups against a unique key use a positional index: a merge-style binary
+search when both sides are already sorted, an int64 hash otherwise.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Sequence, Tuple
+
+# ID columns across the exports and the mapping-derived frames
+ID_COLUMNS: List[str] = [
+    'Record ID', 'Ticket ID', 'Company ID',
+    'Company_Record_ID', 'Deal_Record_ID',
+]
+
+
+def normalize_ids(values) -> pd.Series:
+    """
+    Convert HubSpot IDs to integers.
+
+    Args:
+        values: IDs as ints, floats or strings (Series or array-like)
+
+    Returns:
+        pd.Series: int64 when every value is a valid ID, nullable Int64
+            with <NA> for missing or malformed values otherwise; the index
+            of a Series input is kept
+    """
+    if not isinstance(values, pd.Series):
+        values = pd.Series(values)
+    if pd.api.types.is_integer_dtype(values) and not pd.api.types.is_extension_array_dtype(values):
+        return values.astype(np.int64)
+    if pd.api.types.is_numeric_dtype(values):
+        numeric = values
+    else:
+        numeric = pd.to_numeric(values.astype(str).str.strip(), errors='coerce')
+    whole = numeric.notna() & (numeric % 1 == 0)
+    if whole.all():
+        return numeric.astype(np.int64)
+    return numeric.where(whole).astype('Int64')
+
+
+def id_array(values) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    IDs as a plain int64 array plus a validity mask.
+
+    Args:
+        values: IDs in any form accepted by normalize_ids
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: int64 IDs (0 where invalid) and a
+            boolean mask of valid positions
+    """
+    ids = normalize_ids(values)
+    if ids.dtype == np.int64:
+        return ids.to_numpy(), np.ones(len(ids), dtype=bool)
+    valid = ids.notna().to_numpy()
+    return ids.fillna(0).to_numpy(dtype=np.int64), valid
+
+
+def normalize_id_columns(df: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Normalize ID columns of df in place.
+
+    Args:
+        df (pd.DataFrame): Frame to convert
+        columns (Sequence[str], optional): Columns to convert; defaults to ID_COLUMNS
+
+    Returns:
+        List[str]: Columns that were converted
+    """
+    converted = []
+    for col in (ID_COLUMNS if columns is None else columns):
+        if col in df.columns:
+            df[col] = normalize_ids(df[col])
+            converted.append(col)
+    return converted
+
+
+def id_index(values) -> pd.Series:
+    """
+    Positional index from ID to row position (first occurrence wins).
+
+    Args:
+        values: Entity IDs in row order
+
+    Returns:
+        pd.Series: Row positions indexed by unique int64 IDs
+    """
+    ids, valid = id_array(values)
+    keep = valid.copy()
+    keep[valid] = ~pd.Series(ids[valid]).duplicated().to_numpy()
+    return pd.Series(np.flatnonzero(keep), index=pd.Index(ids[keep], dtype=np.int64))
+
+
+def _is_sorted(ids: np.ndarray, strict: bool = False) -> bool:
+    steps = np.diff(ids)
+    return bool(np.all(steps > 0) if strict else np.all(steps >= 0))
+
+
+def lookup_positions(keys, values) -> Optional[np.ndarray]:
+    """
+    Row of values holding each key, -1 where it is missing.
+
+    When both sides are sorted the lookup is a binary search over the raw
+    arrays, which walks both in order; otherwise an int64 hash index over
+    values is used.
+
+    Args:
+        keys: IDs to look up
+        values: IDs to search (e.g. the right side of a join)
+
+    Returns:
+        Optional[np.ndarray]: int64 positions into values, or None if the
+            valid values are not unique (no single row per key)
+    """
+    keys, keys_valid = id_array(keys)
+    target, target_valid = id_array(values)
+    if len(target) == 0:
+        return np.full(len(keys), -1, dtype=np.int64)
+
+    if target_valid.all() and _is_sorted(target, strict=True) and keys_valid.all() and _is_sorted(keys):
+        positions = np.minimum(np.searchsorted(target, keys), len(target) - 1)
+        return np.where(target[positions] == keys, positions, -1)
+
+    index = pd.Index(target[target_valid])
+    if not index.is_unique:
+        return None
+    hits = index.get_indexer(keys)
+    rows = np.flatnonzero(target_valid)
+    return np.where(keys_valid & (hits >= 0), rows[np.maximum(hits, 0)], -1)
+
+
+def merge_on_ids(left: pd.DataFrame,
+                 right: pd.DataFrame,
+                 left_on: str,
+                 right_on: Optional[str] = None,
+                 how: str = 'inner',
+                 suffixes: Tuple[str, str] = ('_x', '_y')) -> pd.DataFrame:
+    """
+    pd.merge on HubSpot ID columns, with the keys joined as int64.
+
+    When the right-hand keys are unique (the usual entity lookup) the join
+    is a positional take of right-hand rows (see lookup_positions);
+    otherwise it falls back to pd.merge on the normalized keys. Key columns come back as int64 (or
+    Int64 where some IDs are missing) and rows keep the left-hand order.
+
+    Args:
+        left (pd.DataFrame): Left frame
+        right (pd.DataFrame): Right frame
+        left_on (str): ID column in left
+        right_on (str, optional): ID column in right; defaults to left_on
+        how (str): 'inner' or 'left'
+        suffixes (Tuple[str, str]): Suffixes for overlapping column names
+
+    Returns:
+        pd.DataFrame: Joined frame with a fresh RangeIndex
+    """
+    if how not in ('inner', 'left'):
+        raise ValueError(f"Unsupported join type '{how}'; expected 'inner' or 'left'")
+    right_on = left_on if right_on is None else right_on
+
+    left = left.copy(deep=False)
+    right = right.copy(deep=False)
+    left[left_on] = normalize_ids(left[left_on])
+    right[right_on] = normalize_ids(right[right_on])
+
+    positions = lookup_positions(left[left_on], right[right_on])
+    if positions is None:
+        return pd.merge(left, right, left_on=left_on, right_on=right_on, how=how, suffixes=suffixes)
+
+    matched = positions >= 0
+    if how == 'inner':
+        left = left[matched]
+        positions = positions[matched]
+
+    # Same naming as pd.merge: a shared key column appears once, other overlaps get suffixes
+    right_columns = [c for c in right.columns if not (c == right_on and right_on == left_on)]
+    overlap = set(left.columns) & set(right_columns)
+    left_part = left.reset_index(drop=True).rename(columns={c: c + suffixes[0] for c in overlap})
+    right_part = right[right_columns].reset_index(drop=True)
+    if matched.all() or how == 'inner':
+        right_part = right_part.take(positions).reset_index(drop=True)
+    else:
+        # Unmatched rows (position -1) come back all-NaN, upcast the way pd.merge does
+        right_part = right_part.reindex(positions).reset_index(drop=True)
+        if right_on != left_on:
+            right_part[right_on] = normalize_ids(right_part[right_on])
+    right_part = right_part.rename(columns={c: c + suffixes[1] for c in overlap})
+    return pd.concat([left_part, right_part], axis=1)
@@ -0,0 +1,290 @@
+"""
+Incremental retraining of the deal-win model.
+
+A full retrain refits the selector, scaler, L1 feature list and XGBoost on
+every deal. The nightly refresh here only looks at the deals whose
+'Last Modified Date' is at or after the watermark of the previous run (new
+deals have a fresh modification date too). Modification dates only have
+minute resolution, so the IDs already seen at the watermark are recorded
+and skipped, while deals changed later in that minute are still picked
+up. It continues boosting the saved
+XGBoost model for a few rounds on that delta with the fitted
+preprocessing frozen, so the cost follows the day's changes rather than
+the size of the history.
+
+Boosting on changed deals cannot unlearn their old versions, so every
+update is checked on a holdout that never enters training: a fixed 1-in-5
+slice of deals chosen by a hash of the Record ID, stable across runs. The
+update is promoted if its holdout log loss is no worse than the current
+model's (within a tolerance). Otherwise, or when the delta is large, the
+schema drifted, or too many rounds have piled up, the model is retrained
+from scratch. The watermark and run history live in a JSON file next to
+the model.
+
+Run from the repository root with:
+
+    python -m sales_playbook.retraining --model models/deal_win.joblib
+"""
+
+import argparse
+import copy
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import log_loss, roc_auc_score
+from typing import Dict, List, Optional
+
+from sales_playbook.deal_model import DEFAULT_MODEL_PATH, TARGET, DealWinModel, build_deal_company_frame
+from sales_playbook.graph_index import load_or_build
+from sales_playbook.ids import id_array
+from sales_playbook.ingest import load_typed_csv
+
+DEFAULT_STATE_PATH = os.path.join('models', 'deal_win.state.json')
+
+# One deal in HOLDOUT_BUCKETS is held out, by Record ID hash
+HOLDOUT_BUCKETS = 5
+
+# Runs kept in the state file
+_HISTORY_LENGTH = 30
+
+
+def holdout_mask(ids, buckets: int = HOLDOUT_BUCKETS) -> np.ndarray:
+    """
+    Stable holdout membership per Record ID.
+
+    Args:
+        ids: Record IDs
+        buckets (int): One in this many IDs is held out
+
+    Returns:
+        np.ndarray: Boolean mask, the same for an ID on every run
+    """
+    values, valid = id_array(ids)
+    # Fibonacci hashing spreads sequential IDs evenly over the buckets
+    mixed = (values.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)
+    return valid & (mixed % np.uint64(buckets) == 0)
+
+
+def modified_dates(deals: pd.DataFrame) -> pd.Series:
+    """'Last Modified Date', falling back to 'Create Date' when missing."""
+    modified = pd.to_datetime(deals['Last Modified Date'], errors='coerce')
+    if 'Create Date' in deals.columns:
+        modified = modified.fillna(pd.to_datetime(deals['Create Date'], errors='coerce'))
+    return modified
+
+
+def _ids_at(frame: pd.DataFrame, modified: pd.Series, watermark) -> np.ndarray:
+    """Valid Record IDs of the deals last modified exactly at watermark."""
+    ids, valid = id_array(frame['Record ID'])
+    return np.unique(ids[valid & (modified == watermark).to_numpy()])
+
+
+def load_state(path: str = DEFAULT_STATE_PATH) -> Optional[Dict]:
+    """Retraining state written by the last run, or None."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_state(state: Dict, path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    scratch = f"{path}.tmp-{os.getpid()}"
+    with open(scratch, 'w') as f:
+        json.dump(state, f, indent=2, default=str)
+    os.replace(scratch, path)
+
+
+def _save_model(model: DealWinModel, path: str) -> None:
+    # Written aside and renamed, so the dashboard never loads a partial file
+    scratch = f"{path}.tmp-{os.getpid()}"
+    model.save(scratch)
+    os.replace(scratch, path)
+
+
+def holdout_metrics(model: DealWinModel, frame: pd.DataFrame) -> Dict[str, float]:
+    """
+    Log loss and AUC on a labelled frame.
+
+    Args:
+        model (DealWinModel): Fitted model
+        frame (pd.DataFrame): Holdout rows with TARGET
+
+    Returns:
+        Dict[str, float]: 'log_loss' and 'auc' (NaN with a single class)
+    """
+    y = frame[TARGET].astype(int).to_numpy()
+    proba = model.predict_proba(frame).to_numpy()
+    return {
+        'log_loss': log_loss(y, proba, labels=[0, 1]),
+        'auc': roc_auc_score(y, proba) if len(np.unique(y)) > 1 else np.nan,
+    }
+
+
+def continue_boosting(model: DealWinModel, delta: pd.DataFrame, rounds: int) -> DealWinModel:
+    """
+    A copy of model with more boosting rounds fitted on delta.
+
+    The variance selector, scaler and feature list stay as fitted.
+
+    Args:
+        model (DealWinModel): Fitted model
+        delta (pd.DataFrame): New and changed deals with TARGET
+        rounds (int): Trees to add
+
+    Returns:
+        DealWinModel: Updated copy; model itself is unchanged
+    """
+    X = model.transform(delta)
+    y = delta[TARGET].astype(int).to_numpy()
+    booster = xgb.train(model.classifier.get_xgb_params(), xgb.DMatrix(X, label=y),
+                        num_boost_round=rounds, xgb_model=model.classifier.get_booster())
+
+    updated = copy.copy(model)
+    classifier = xgb.XGBClassifier(**model.classifier.get_params())
+    classifier.load_model(booster.save_raw())
+    classifier.set_params(n_estimators=booster.num_boosted_rounds())
+    updated.classifier = classifier
+    return updated
+
+
+def retrain(deals_path: str = 'data/deals.csv',
+            companies_path: Optional[str] = 'data/companies.csv',
+            mappings_path: str = 'mappings.json',
+            model_path: str = DEFAULT_MODEL_PATH,
+            state_path: str = DEFAULT_STATE_PATH,
+            rounds: int = 10,
+            tolerance: float = 0.01,
+            max_delta_fraction: float = 0.25,
+            max_extra_rounds: int = 100,
+            full: bool = False,
+            random_state: int = 42) -> Dict:
+    """
+    Refresh the saved model from the deals changed since the last run.
+
+    Args:
+        deals_path (str): Cleaned deals CSV
+        companies_path (str, optional): Cleaned companies CSV (joined when present)
+        mappings_path (str): Relationship mappings JSON
+        model_path (str): Saved model, replaced when a new one is promoted
+        state_path (str): Watermark and run history
+        rounds (int): Boosting rounds added per incremental update
+        tolerance (float): Relative holdout log-loss increase still accepted
+        max_delta_fraction (float): Retrain fully when more of the training
+            deals than this changed
+        max_extra_rounds (int): Retrain fully once incremental updates have
+            added this many rounds since the last full fit
+        full (bool): Skip the incremental path
+        random_state (int): Seed for a full retrain
+
+    Returns:
+        Dict: Run report with 'action' ('unchanged', 'incremental' or
+            'full'), 'reason', row counts, holdout metrics and seconds
+    """
+    start = time.perf_counter()
+    deals = load_typed_csv(deals_path)
+    companies, edges = None, None
+    if companies_path and os.path.exists(companies_path):
+        companies = load_typed_csv(companies_path, low_memory=False)
+        edges = load_or_build(mappings_path).edges('company_deals')
+    frame = build_deal_company_frame(deals, companies, edges)
+
+    holdout = holdout_mask(frame['Record ID'])
+    modified = modified_dates(frame)
+    watermark = modified.max()
+    state = load_state(state_path)
+    model = DealWinModel.load(model_path) if os.path.exists(model_path) else None
+
+    report: Dict = {'watermark': str(watermark), 'training_rows': int((~holdout).sum()),
+                    'holdout_rows': int(holdout.sum())}
+    reason = None
+    if full:
+        reason = 'requested'
+    elif model is None or state is None:
+        reason = 'no saved model or state'
+
+    if reason is None:
+        previous = pd.Timestamp(state['watermark'])
+        # Same-minute changes after the last run count; the deals it already saw at that minute do not
+        seen = np.isin(id_array(frame['Record ID'])[0], state.get('watermark_ids', []))
+        changed = (modified >= previous).to_numpy() & ~((modified == previous).to_numpy() & seen)
+        delta = frame[changed & ~holdout]
+        report['delta_rows'] = int(len(delta))
+        if not changed.any():
+            report.update(action='unchanged', reason='no deals modified since the watermark',
+                          seconds=time.perf_counter() - start)
+            return report
+        if len(delta) == 0:
+            # Only holdout deals changed: nothing to train on
+            report.update(action='unchanged', reason='only holdout deals changed')
+        try:
+            model._check_schema(frame)
+        except ValueError as err:
+            reason = f'schema changed: {err}'
+        else:
+            if len(delta) > max_delta_fraction * max(report['training_rows'], 1):
+                reason = f'{len(delta)} changed deals exceed {max_delta_fraction:.0%} of training deals'
+            elif state.get('extra_rounds', 0) + rounds > max_extra_rounds:
+                reason = f'incremental rounds would exceed {max_extra_rounds}'
+
+    if reason is None and 'action' not in report:
+        current = holdout_metrics(model, frame[holdout])
+        candidate = continue_boosting(model, delta, rounds)
+        updated = holdout_metrics(candidate, frame[holdout])
+        report.update(current=current, updated=updated)
+        if updated['log_loss'] <= current['log_loss'] * (1 + tolerance):
+            candidate.metrics = updated
+            _save_model(candidate, model_path)
+            model = candidate
+            report.update(action='incremental', reason='holdout check passed')
+            state['extra_rounds'] = state.get('extra_rounds', 0) + rounds
+        else:
+            reason = (f"holdout log loss rose from {current['log_loss']:.4f} "
+                      f"to {updated['log_loss']:.4f}")
+
+    if reason is not None:
+        model = DealWinModel(random_state=random_state).fit(frame[~holdout])
+        model.metrics = holdout_metrics(model, frame[holdout])
+        _save_model(model, model_path)
+        report.update(action='full', reason=reason, updated=model.metrics)
+        state = {'extra_rounds': 0, 'full_retrain': str(watermark), 'history': (state or {}).get('history', [])}
+
+    report['seconds'] = time.perf_counter() - start
+    state['watermark'] = str(watermark)
+    state['watermark_ids'] = _ids_at(frame, modified, watermark).tolist()
+    state['schema_hash'] = model.schema_hash
+    history: List[Dict] = state.get('history', [])
+    history.append({key: report.get(key) for key in ('watermark', 'action', 'reason', 'delta_rows', 'updated', 'seconds')})
+    state['history'] = history[-_HISTORY_LENGTH:]
+    _save_state(state, state_path)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m sales_playbook.retraining',
+                                     description='Refresh the deal-win model from new and changed deals')
+    parser.add_argument('--deals', default='data/deals.csv')
+    parser.add_argument('--companies', default='data/companies.csv')
+    parser.add_argument('--mappings', default='mappings.json')
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--state', default=DEFAULT_STATE_PATH)
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--tolerance', type=float, default=0.01)
+    parser.add_argument('--full', action='store_true', help='Retrain from scratch')
+
+    args = parser.parse_args(argv)
+    report = retrain(args.deals, args.companies, args.mappings, args.model, args.state,
+                     rounds=args.rounds, tolerance=args.tolerance, full=args.full)
+    print(f"{report['action']}: {report['reason']} ({report['seconds']:.1f}s)")
+    for name, value in (report.get('updated') or {}).items():
+        print(f"  holdout {name}: {value:.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,479 @@
+"""
+Incremental RFM scoring for companies.
+
+Per-company running aggregates (deal count, amount, win rate, days to close,
+last close) are updated from deal-level deltas, so a daily batch only
+touches the companies whose deals changed. R and M bucket edges come from
+mergeable histogram sketches and stay frozen between deltas; they are
+re-frozen (and every company rescored) only when the sketch quantiles drift
+past a tolerance, or on an explicit rebuild().
+
+Scoring follows the notebooks: R and M are quintiles (R reversed so the
+most recent companies score 5), F is the 1 / 3 / 5 deal-count rule, and
+the top-customer threshold is the 0.8 quantile of RFM_Score.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class QuantileSketch:
+    """
+    Fixed-bin histogram on a signed log1p scale.
+
+    Values are bucketed to a relative precision of roughly 1 / resolution,
+    counts can be added and removed (so a changed value is a remove plus an
+    add), and two sketches with the same settings merge by adding counts.
+    """
+
+    def __init__(self, resolution: int = 256, max_abs: float = 1e13):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            resolution (int): Buckets per unit of log1p(|value|)
+            max_abs (float): Largest magnitude kept apart; larger values
+                share the outermost bucket
+        """
+        self.resolution = resolution
+        self.max_abs = max_abs
+        self.limit = int(np.ceil(np.log1p(max_abs) * resolution))
+        self.counts = np.zeros(2 * self.limit + 1, dtype=np.int64)
+
+    def _bins(self, values: np.ndarray) -> np.ndarray:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        scaled = np.sign(values) * np.log1p(np.abs(values)) * self.resolution
+        return np.clip(np.rint(scaled), -self.limit, self.limit).astype(np.int64) + self.limit
+
+    def add(self, values, weight: int = 1) -> None:
+        """Add values (NaN ignored); a negative weight removes them."""
+        bins = self._bins(values)
+        if len(bins):
+            self.counts += weight * np.bincount(bins, minlength=len(self.counts))
+
+    def remove(self, values) -> None:
+        """Remove previously added values."""
+        self.add(values, weight=-1)
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """
+        Merge another sketch into this one.
+
+        Args:
+            other (QuantileSketch): Sketch with the same resolution and range
+
+        Returns:
+            QuantileSketch: self
+        """
+        if other.resolution != self.resolution or other.limit != self.limit:
+            raise ValueError("Sketches with different resolution or range cannot be merged")
+        self.counts += other.counts
+        return self
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def quantiles(self, qs) -> np.ndarray:
+        """
+        Approximate quantiles.
+
+        Each quantile is reported as the upper bound of the bucket it falls
+        in, so values tied with it land on the lower side of a right-closed
+        bin edge, as they would with pd.qcut.
+
+        Args:
+            qs: Quantile levels in [0, 1]
+
+        Returns:
+            np.ndarray: One value per level, NaN if the sketch is empty
+        """
+        qs = np.asarray(qs, dtype=np.float64)
+        total = self.count
+        if total == 0:
+            return np.full(qs.shape, np.nan)
+        cumulative = np.cumsum(self.counts)
+        bins = np.searchsorted(cumulative, qs * (total - 1), side='right')
+        lower = (bins - self.limit - 0.5) / self.resolution
+        upper = lower + 1 / self.resolution
+        return np.where(upper > 0, np.expm1(np.maximum(upper, 0)), -np.expm1(-lower))
+
+
+def _quantile_from_counts(counts: np.ndarray, q: float) -> float:
+    """Linearly interpolated quantile (as pd.Series.quantile) of integer values given their counts."""
+    total = counts.sum()
+    if total == 0:
+        return np.nan
+    position = q * (total - 1)
+    cumulative = np.cumsum(counts)
+    lower = np.searchsorted(cumulative, np.floor(position), side='right')
+    upper = np.searchsorted(cumulative, np.ceil(position), side='right')
+    return float(lower + (upper - lower) * (position - np.floor(position)))
+
+
+def frequency_score(counts: np.ndarray) -> np.ndarray:
+    """F score: 1 for a single deal, 3 for up to 10 deals, 5 above that."""
+    return np.select([counts == 1, counts <= 10], [1, 3], 5).astype(np.int8)
+
+
+class RFMScorer:
+    """
+    Company RFM scores maintained from deal-level deltas.
+
+    Deals are keyed by (company, deal) so a deal shared by several companies
+    counts towards each of them, as in the company-deal mapping.
+    """
+
+    # Growable per-deal and per-company arrays
+    _ROW_FIELDS = ('company', 'amount', 'won', 'days', 'recency', 'alive')
+    _COMPANY_FIELDS = ('count', 'amount_sum', 'amount_n', 'won_sum', 'won_n',
+                       'days_sum', 'days_n', 'recency', 'active', 'r', 'f', 'm')
+
+    def __init__(self,
+                 company_column: str = 'Company_Record_ID',
+                 deal_column: str = 'Record ID',
+                 n_bins: int = 5,
+                 tolerance: float = 0.05,
+                 anchor: Optional[pd.Timestamp] = None,
+                 resolution: int = 256):
+        """
+        Initialize an empty scorer.
+
+        Args:
+            company_column (str): Company key column in the deltas
+            deal_column (str): Deal key column in the deltas
+            n_bins (int): Number of R and M buckets
+            tolerance (float): Relative edge drift that triggers re-freezing
+                the R / M edges and rescoring every company
+            anchor (pd.Timestamp, optional): Fixed date recency is measured
+                from internally (defaults to today); R only depends on the
+                ordering, so it does not need to move with the calendar
+            resolution (int): QuantileSketch resolution
+        """
+        self.company_column = company_column
+        self.deal_column = deal_column
+        self.n_bins = n_bins
+        self.tolerance = tolerance
+        self.anchor = pd.Timestamp(anchor) if anchor is not None else pd.Timestamp.today().normalize()
+
+        self.m_sketch = QuantileSketch(resolution)
+        self.r_sketch = QuantileSketch(resolution)
+        self.m_edges: Optional[np.ndarray] = None
+        self.r_edges: Optional[np.ndarray] = None
+        self.rescored_all = False
+
+        self._row_index: Dict[Tuple[Hashable, Hashable], int] = {}
+        self._n_rows = 0
+        self._rows = self._allocate(self._ROW_FIELDS, 0)
+
+        self._company_index: Dict[Hashable, int] = {}
+        self._company_keys: List[Hashable] = []
+        self._company_rows: List[List[int]] = []
+        self._companies = self._allocate(self._COMPANY_FIELDS, 0)
+
+        # RFM_Score histogram for the top-customer threshold
+        self._score_counts = np.zeros(2 * n_bins + 6, dtype=np.int64)
+
+    @staticmethod
+    def _allocate(fields, size: int) -> Dict[str, np.ndarray]:
+        dtypes = {'company': np.int64, 'alive': bool, 'active': bool,
+                  'count': np.int64, 'r': np.int8, 'f': np.int8, 'm': np.int8}
+        arrays = {}
+        for field in fields:
+            dtype = dtypes.get(field, np.float64)
+            fill = np.nan if field == 'recency' else 0
+            arrays[field] = np.full(size, fill, dtype=dtype)
+        return arrays
+
+    @staticmethod
+    def _grow(arrays: Dict[str, np.ndarray], needed: int) -> None:
+        capacity = len(next(iter(arrays.values())))
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity, 1024)
+        for field, values in arrays.items():
+            grown = np.full(capacity, np.nan if field == 'recency' else 0, dtype=values.dtype)
+            grown[:len(values)] = values
+            arrays[field] = grown
+
+    def _company_codes(self, keys: pd.Series) -> np.ndarray:
+        """Integer codes for company keys, registering unseen companies."""
+        codes, uniques = pd.factorize(keys)
+        unique_codes = np.empty(len(uniques), dtype=np.int64)
+        for i, key in enumerate(uniques):
+            code = self._company_index.get(key)
+            if code is None:
+                code = len(self._company_keys)
+                self._company_index[key] = code
+                self._company_keys.append(key)
+                self._company_rows.append([])
+            unique_codes[i] = code
+        self._grow(self._companies, len(self._company_keys))
+        return unique_codes[codes]
+
+    def _lookup_rows(self, companies: pd.Series, deals: pd.Series) -> np.ndarray:
+        pairs = zip(companies.tolist(), deals.tolist())
+        return np.fromiter((self._row_index.get(pair, -1) for pair in pairs), dtype=np.int64, count=len(companies))
+
+    def _accumulate(self, rows: np.ndarray, sign: int) -> None:
+        """Add (sign=1) or subtract (sign=-1) deal rows from their company aggregates."""
+        rows_ = self._rows
+        agg = self._companies
+        companies = rows_['company'][rows]
+        np.add.at(agg['count'], companies, sign)
+        for value, total, n in (('amount', 'amount_sum', 'amount_n'),
+                                ('won', 'won_sum', 'won_n'),
+                                ('days', 'days_sum', 'days_n')):
+            values = rows_[value][rows]
+            present = ~np.isnan(values)
+            np.add.at(agg[total], companies[present], sign * values[present])
+            np.add.at(agg[n], companies[present], sign)
+
+    def update(self, delta: pd.DataFrame) -> List[Hashable]:
+        """
+        Apply new or changed deals.
+
+        A (company, deal) pair already seen replaces its previous values.
+        Deals that moved to another company should be removed from the old
+        one with remove().
+
+        Args:
+            delta (pd.DataFrame): Company key, deal key, 'Amount',
+                'Is Closed Won', 'Days to close' and 'Close Date' columns
+
+        Returns:
+            List[Hashable]: Company keys whose scores were refreshed
+        """
+        delta = delta.drop_duplicates([self.company_column, self.deal_column], keep='last')
+        if delta.empty:
+            return []
+
+        codes = self._company_codes(delta[self.company_column])
+        rows = self._lookup_rows(delta[self.company_column], delta[self.deal_column])
+        changed = np.unique(codes)
+        self._retract(changed)
+
+        # Take the previous version of changed deals out of the aggregates
+        existing = rows[rows >= 0]
+        self._accumulate(existing[self._rows['alive'][existing]], -1)
+
+        # Allocate rows for unseen (company, deal) pairs
+        new = np.flatnonzero(rows < 0)
+        if len(new):
+            start = self._n_rows
+            self._n_rows += len(new)
+            self._grow(self._rows, self._n_rows)
+            rows[new] = np.arange(start, self._n_rows)
+            pairs = zip(delta[self.company_column].to_numpy()[new].tolist(),
+                        delta[self.deal_column].to_numpy()[new].tolist())
+            for row, pair, code in zip(rows[new].tolist(), pairs, codes[new].tolist()):
+                self._row_index[pair] = row
+                self._company_rows[code].append(row)
+
+        close = pd.to_datetime(delta['Close Date'], errors='coerce')
+        rows_ = self._rows
+        rows_['company'][rows] = codes
+        rows_['amount'][rows] = pd.to_numeric(delta['Amount'], errors='coerce').to_numpy(dtype=np.float64)
+        rows_['won'][rows] = pd.to_numeric(delta['Is Closed Won'], errors='coerce').to_numpy(dtype=np.float64)
+        rows_['days'][rows] = pd.to_numeric(delta['Days to close'], errors='coerce').to_numpy(dtype=np.float64)
+        rows_['recency'][rows] = ((self.anchor - close).dt.total_seconds() / 86400).to_numpy(dtype=np.float64)
+        rows_['alive'][rows] = True
+        self._accumulate(rows, 1)
+
+        return self._refresh(changed)
+
+    def remove(self, pairs: pd.DataFrame) -> List[Hashable]:
+        """
+        Remove deals from their companies.
+
+        Args:
+            pairs (pd.DataFrame): Company key and deal key columns
+
+        Returns:
+            List[Hashable]: Company keys whose scores were refreshed
+        """
+        rows = self._lookup_rows(pairs[self.company_column], pairs[self.deal_column])
+        rows = np.unique(rows[rows >= 0])
+        rows = rows[self._rows['alive'][rows]]
+        if not len(rows):
+            return []
+        changed = np.unique(self._rows['company'][rows])
+        self._retract(changed)
+        self._accumulate(rows, -1)
+        self._rows['alive'][rows] = False
+        return self._refresh(changed)
+
+    def _recompute_recency(self, codes: np.ndarray) -> None:
+        """Most recent close (smallest recency) over the live deals of each company."""
+        company_rows = [np.asarray(self._company_rows[code], dtype=np.int64) for code in codes.tolist()]
+        lengths = np.fromiter((len(r) for r in company_rows), dtype=np.int64, count=len(codes))
+        rows = np.concatenate(company_rows) if company_rows else np.empty(0, dtype=np.int64)
+        owners = np.repeat(codes, lengths)
+        live = self._rows['alive'][rows]
+        recency = pd.Series(self._rows['recency'][rows[live]]).groupby(owners[live]).min()
+        self._companies['recency'][codes] = recency.reindex(codes).to_numpy()
+
+    def _recency_days(self, codes: np.ndarray) -> np.ndarray:
+        """Whole days since the last close, the unit R is bucketed in."""
+        return np.floor(self._companies['recency'][codes])
+
+    def _scores_for(self, codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        agg = self._companies
+        m = (np.searchsorted(self.m_edges, agg['amount_sum'][codes], side='left') + 1).astype(np.int8)
+        r = (self.n_bins - np.searchsorted(self.r_edges, self._recency_days(codes), side='left')).astype(np.int8)
+        f = frequency_score(agg['count'][codes])
+        return r, f, m
+
+    def _set_scores(self, codes: np.ndarray) -> None:
+        agg = self._companies
+        r, f, m = self._scores_for(codes)
+        agg['r'][codes], agg['f'][codes], agg['m'][codes] = r, f, m
+        np.add.at(self._score_counts, (r + f + m).astype(np.int64), 1)
+
+    def _unset_scores(self, codes: np.ndarray) -> None:
+        agg = self._companies
+        totals = agg['r'][codes].astype(np.int64) + agg['f'][codes] + agg['m'][codes]
+        np.add.at(self._score_counts, totals, -1)
+
+    def _inner_edges(self, sketch: QuantileSketch) -> np.ndarray:
+        return sketch.quantiles(np.linspace(0, 1, self.n_bins + 1)[1:-1])
+
+    def _retract(self, codes: np.ndarray) -> None:
+        """Take companies about to change out of the sketches and score histogram."""
+        agg = self._companies
+        was_active = codes[agg['active'][codes]]
+        self.m_sketch.remove(agg['amount_sum'][was_active])
+        self.r_sketch.remove(self._recency_days(was_active))
+        if self.m_edges is not None:
+            self._unset_scores(was_active)
+
+    def _refresh(self, codes: np.ndarray) -> List[Hashable]:
+        """Recompute derived state for changed companies in O(their deals)."""
+        agg = self._companies
+        self._recompute_recency(codes)
+        agg['active'][codes] = agg['count'][codes] > 0
+        active = codes[agg['active'][codes]]
+        self.m_sketch.add(agg['amount_sum'][active])
+        self.r_sketch.add(self._recency_days(active))
+
+        self.rescored_all = False
+        if self.m_edges is None or self._edges_drifted():
+            self._freeze(self._inner_edges(self.m_sketch), self._inner_edges(self.r_sketch))
+        else:
+            self._set_scores(active)
+        return [self._company_keys[code] for code in codes.tolist()]
+
+    def _edges_drifted(self) -> bool:
+        for frozen, current in ((self.m_edges, self._inner_edges(self.m_sketch)),
+                                (self.r_edges, self._inner_edges(self.r_sketch))):
+            if np.isnan(current).any():
+                continue
+            drift = np.abs(current - frozen) / np.maximum(np.abs(frozen), 1.0)
+            if np.max(drift, initial=0.0) > self.tolerance:
+                return True
+        return False
+
+    def _freeze(self, m_edges: np.ndarray, r_edges: np.ndarray) -> None:
+        """Freeze new edges and rescore every active company."""
+        self.m_edges, self.r_edges = m_edges, r_edges
+        active = np.flatnonzero(self._companies['active'][:len(self._company_keys)])
+        self._score_counts[:] = 0
+        self._set_scores(active)
+        self.rescored_all = True
+
+    def rebuild(self) -> None:
+        """
+        Recompute every aggregate, both sketches and exact quantile edges
+        (as pd.qcut would) from the stored deals, then rescore all companies.
+        """
+        n_companies = len(self._company_keys)
+        fresh = self._allocate(self._COMPANY_FIELDS, n_companies)
+        self._grow(fresh, len(next(iter(self._companies.values()))))
+        self._companies = fresh
+
+        rows = np.flatnonzero(self._rows['alive'][:self._n_rows])
+        self._accumulate(rows, 1)
+        self._recompute_recency(np.arange(n_companies, dtype=np.int64))
+
+        agg = self._companies
+        agg['active'][:n_companies] = agg['count'][:n_companies] > 0
+        active = np.flatnonzero(agg['active'][:n_companies])
+
+        self.m_sketch = QuantileSketch(self.m_sketch.resolution, self.m_sketch.max_abs)
+        self.r_sketch = QuantileSketch(self.r_sketch.resolution, self.r_sketch.max_abs)
+        self.m_sketch.add(agg['amount_sum'][active])
+        self.r_sketch.add(self._recency_days(active))
+
+        levels = np.linspace(0, 1, self.n_bins + 1)[1:-1]
+        amounts = agg['amount_sum'][active]
+        recency = self._recency_days(active)
+        recency = recency[~np.isnan(recency)]
+        self._freeze(np.quantile(amounts, levels) if len(amounts) else np.full(len(levels), np.nan),
+                     np.quantile(recency, levels) if len(recency) else np.full(len(levels), np.nan))
+
+    def fit(self, deals: pd.DataFrame) -> 'RFMScorer':
+        """
+        Load a full company-deal frame and score it with exact edges.
+
+        Args:
+            deals (pd.DataFrame): Same columns as update()
+
+        Returns:
+            RFMScorer: self
+        """
+        self.update(deals)
+        self.rebuild()
+        return self
+
+    def score_threshold(self, q: float = 0.8) -> float:
+        """RFM_Score quantile over all active companies, from the score histogram."""
+        return _quantile_from_counts(self._score_counts, q)
+
+    def scores(self, companies: Optional[List[Hashable]] = None,
+               as_of: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Company-level aggregates and RFM scores.
+
+        Args:
+            companies (List[Hashable], optional): Subset of company keys;
+                defaults to every company with at least one deal
+            as_of (pd.Timestamp, optional): Date Recency is reported from;
+                defaults to today
+
+        Returns:
+            pd.DataFrame: The notebook's deals_agg layout (Total_Deals_Count,
+                Total_Deal_Amount, Average_Deal_Amount, Win_Rate,
+                Average_Days_to_Close, Recency, R_Score, F_Score, M_Score,
+                RFM_Score) keyed by the company column
+        """
+        agg = self._companies
+        if companies is None:
+            codes = np.flatnonzero(agg['active'][:len(self._company_keys)])
+        else:
+            codes = np.array([self._company_index[key] for key in companies
+                              if key in self._company_index], dtype=np.int64)
+            codes = codes[agg['active'][codes]]
+
+        as_of = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp.today()
+        shift = (as_of - self.anchor).total_seconds() / 86400
+        recency = np.floor(agg['recency'][codes] + shift)
+        if not np.isnan(recency).any():
+            recency = recency.astype(np.int64)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frame = pd.DataFrame({
+                self.company_column: [self._company_keys[code] for code in codes.tolist()],
+                'Total_Deals_Count': agg['count'][codes],
+                'Total_Deal_Amount': agg['amount_sum'][codes],
+                'Average_Deal_Amount': agg['amount_sum'][codes] / agg['amount_n'][codes],
+                'Win_Rate': agg['won_sum'][codes] / agg['won_n'][codes],
+                'Average_Days_to_Close': agg['days_sum'][codes] / agg['days_n'][codes],
+                'Recency': recency,
+                'R_Score': agg['r'][codes].astype(int),
+                'F_Score': agg['f'][codes].astype(int),
+                'M_Score': agg['m'][codes].astype(int),
+            })
+        frame['RFM_Score'] = frame['R_Score'] + frame['F_Score'] + frame['M_Score']
+        return frame
@@ -0,0 +1,432 @@
+"""
+Local HTTP scoring service for the deal-win model.
+
+The CRM integration posts deal records as JSON and gets win probabilities
+back. Request threads do not call the model themselves: they validate
+their records against the saved feature schema and hand them to a
+MicroBatcher, whose worker thread collects records from concurrent
+requests until max_batch rows are waiting or max_wait_ms has passed since
+the first one, scores them with one vectorized predict_proba call and
+hands each request its slice. Everything uses the standard library plus
+the model's own dependencies and runs on CPU.
+
+    POST /score     {"records": [{...}, ...]} or a single record object
+    GET  /schema    feature columns and schema hash
+    GET  /metrics   request / batch counts, latency percentiles, throughput
+    GET  /health    liveness
+
+Start it from the repository root with:
+
+    python -m sales_playbook.scoring_server --model models/deal_win.joblib --port 8765
+"""
+
+import argparse
+import json
+import math
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+
+from sales_playbook.deal_model import DEFAULT_MODEL_PATH, DealWinModel
+
+# Records accepted in one request
+MAX_RECORDS = 10000
+
+# Latencies kept for the percentiles in /metrics
+_LATENCY_WINDOW = 4096
+
+
+class SchemaError(ValueError):
+    """Records that cannot be scored against the model schema."""
+
+
+def validate_records(records: Any, schema: List[str], max_records: int = MAX_RECORDS) -> Tuple[List[Dict], int]:
+    """
+    Check a request payload against the model schema.
+
+    Schema columns may be omitted (they are scored as missing, like
+    unfilled CRM fields); present ones must be numbers, booleans or null.
+    Columns outside the schema are ignored.
+
+    Args:
+        records: Decoded JSON: one record object or a list of them
+        schema (List[str]): Model feature columns
+        max_records (int): Largest accepted batch
+
+    Returns:
+        Tuple[List[Dict], int]: The records as a list and the number of
+            schema values they left out
+
+    Raises:
+        SchemaError: Describing the first problems found
+    """
+    if isinstance(records, dict):
+        records = [records]
+    if not isinstance(records, list) or not records:
+        raise SchemaError("Expected a record object or a non-empty list of records")
+    if len(records) > max_records:
+        raise SchemaError(f"At most {max_records} records per request; got {len(records)}")
+
+    problems, missing = [], 0
+    for position, record in enumerate(records):
+        if not isinstance(record, dict):
+            problems.append(f"record {position} is not an object")
+            continue
+        for column in schema:
+            value = record.get(column)
+            if value is None:
+                missing += 1
+            elif not isinstance(value, (int, float)) or not math.isfinite(value):
+                # bool is an int subclass, so one-hot flags sent as true/false pass
+                problems.append(f"record {position}: '{column}' must be a finite number, got {value!r}")
+        if len(problems) >= 5:
+            break
+    if problems:
+        raise SchemaError('; '.join(problems[:5]))
+    return records, missing
+
+
+class ServiceMetrics:
+    """
+    Thread-safe counters and a rolling latency window.
+    """
+
+    def __init__(self, window: int = _LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._latency_ms = np.zeros(window)
+        self._count = 0
+        self.started = time.time()
+        self.requests = 0
+        self.records = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_records = 0
+        self.largest_batch = 0
+
+    def record_request(self, n_records: int, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+                return
+            self.records += n_records
+            self._latency_ms[self._count % len(self._latency_ms)] = seconds * 1000
+            self._count += 1
+
+    def record_batch(self, n_records: int) -> None:
+        with self._lock:
+            self.batches += 1
+            self.batched_records += n_records
+            self.largest_batch = max(self.largest_batch, n_records)
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """Counters, mean batch size, latency percentiles (ms, None before any request) and records per second."""
+        with self._lock:
+            latencies = self._latency_ms[:min(self._count, len(self._latency_ms))]
+            uptime = time.time() - self.started
+            # None serializes as null; NaN is not valid JSON
+            p50, p95, p99 = map(float, np.percentile(latencies, [50, 95, 99])) if len(latencies) else (None,) * 3
+            return {
+                'uptime_seconds': uptime,
+                'requests': self.requests,
+                'errors': self.errors,
+                'records': self.records,
+                'batches': self.batches,
+                'mean_batch_size': self.batched_records / self.batches if self.batches else 0.0,
+                'largest_batch': self.largest_batch,
+                'latency_p50_ms': p50,
+                'latency_p95_ms': p95,
+                'latency_p99_ms': p99,
+                'records_per_second': self.records / uptime if uptime > 0 else 0.0,
+            }
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent scoring calls into vectorized model calls.
+    """
+
+    def __init__(self,
+                 model: DealWinModel,
+                 max_batch: int = 512,
+                 max_wait_ms: float = 5.0,
+                 metrics: Optional[ServiceMetrics] = None):
+        """
+        Start the batching thread.
+
+        Args:
+            model (DealWinModel): Fitted model
+            max_batch (int): Score as soon as this many records are waiting
+            max_wait_ms (float): Longest a record waits for others to join
+            metrics (ServiceMetrics, optional): Batch counters to update
+        """
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.metrics = metrics
+        self._queue: 'queue.Queue[Optional[Tuple[List[Dict], Future]]]' = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, records: List[Dict]) -> Future:
+        """
+        Queue validated records for scoring.
+
+        Args:
+            records (List[Dict]): Records to score
+
+        Returns:
+            Future: Resolves to a float64 array of probabilities in record order
+        """
+        future: Future = Future()
+        self._queue.put((records, future))
+        return future
+
+    def close(self) -> None:
+        """Stop the worker after the queued requests are scored."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            pending, size = [item], len(item[0])
+            deadline = time.perf_counter() + self.max_wait
+            stop = False
+            while size < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                pending.append(item)
+                size += len(item[0])
+            self._score(pending, size)
+            if stop:
+                return
+
+    def _score(self, pending: List[Tuple[List[Dict], Future]], size: int) -> None:
+        records = [record for batch, _ in pending for record in batch]
+        try:
+            frame = pd.DataFrame.from_records(records, columns=self.model.schema)
+            probabilities = self.model.predict_proba(frame).to_numpy()
+        except Exception as err:
+            for _, future in pending:
+                future.set_exception(err)
+            return
+        if self.metrics is not None:
+            self.metrics.record_batch(size)
+        start = 0
+        for batch, future in pending:
+            future.set_result(probabilities[start:start + len(batch)])
+            start += len(batch)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: 'ScoringServer'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # Requests are counted in /metrics instead of logged one per line
+        pass
+
+    def _send(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload, default=float).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        model = self.server.model
+        if self.path == '/health':
+            self._send(200, {'status': 'ok'})
+        elif self.path == '/schema':
+            self._send(200, {'schema_hash': model.schema_hash, 'features': model.schema})
+        elif self.path == '/metrics':
+            self._send(200, self.server.metrics.snapshot())
+        else:
+            self._send(404, {'error': f'Unknown path {self.path}'})
+
+    def do_POST(self):
+        if self.path != '/score':
+            self._send(404, {'error': f'Unknown path {self.path}'})
+            return
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'null')
+            records = payload.get('records', payload) if isinstance(payload, dict) else payload
+            records, missing = validate_records(records, self.server.model.schema, self.server.max_records)
+        except (ValueError, json.JSONDecodeError) as err:
+            self.server.metrics.record_request(0, time.perf_counter() - start, ok=False)
+            self._send(400, {'error': str(err)})
+            return
+
+        try:
+            probabilities = self.server.batcher.submit(records).result()
+        except Exception as err:
+            self.server.metrics.record_request(len(records), time.perf_counter() - start, ok=False)
+            self._send(500, {'error': f'Scoring failed: {err}'})
+            return
+
+        self.server.metrics.record_request(len(records), time.perf_counter() - start)
+        self._send(200, {
+            'schema_hash': self.server.model.schema_hash,
+            'missing_values': missing,
+            'predictions': [
+                {'Record ID': record.get('Record ID'), 'win_probability': float(p)}
+                for record, p in zip(records, probabilities)
+            ],
+        })
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server with a shared micro-batcher; usable as a context manager.
+    """
+
+    daemon_threads = True
+    # Listen backlog; the default of 5 resets connections under bursts
+    request_queue_size = 128
+
+    def __init__(self,
+                 model: DealWinModel,
+                 host: str = '127.0.0.1',
+                 port: int = 8765,
+                 max_batch: int = 512,
+                 max_wait_ms: float = 5.0,
+                 max_records: int = MAX_RECORDS):
+        """
+        Bind the server (port 0 picks a free port; see url).
+
+        Args:
+            model (DealWinModel): Fitted model
+            host (str): Interface to bind; loopback by default
+            port (int): Port to bind
+            max_batch (int): Micro-batch size limit
+            max_wait_ms (float): Micro-batch wait limit
+            max_records (int): Largest accepted request
+        """
+        super().__init__((host, port), _Handler)
+        self.model = model
+        self.max_records = max_records
+        self.metrics = ServiceMetrics()
+        self.batcher = MicroBatcher(model, max_batch=max_batch, max_wait_ms=max_wait_ms, metrics=self.metrics)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'ScoringServer':
+        """Serve on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name='scoring-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and release the socket and batcher."""
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+        self.batcher.close()
+
+    def __enter__(self) -> 'ScoringServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class ScoringClient:
+    """
+    Minimal client for a running ScoringServer (e.g. over loopback in tests).
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        """
+        Args:
+            url (str): Server base URL, e.g. ScoringServer.url
+            timeout (float): Per-request timeout in seconds
+        """
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, path: str, payload: Optional[Any] = None) -> Dict:
+        data = None if payload is None else json.dumps(payload).encode()
+        request = urllib.request.Request(self.url + path, data=data,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as err:
+            detail = json.loads(err.read() or b'{}').get('error', err.reason)
+            raise ValueError(f"{err.code}: {detail}") from None
+
+    def score(self, records) -> np.ndarray:
+        """
+        Win probabilities for one record or a list of records.
+
+        Args:
+            records: Record dict or list of record dicts
+
+        Returns:
+            np.ndarray: Probabilities in record order
+
+        Raises:
+            ValueError: When the server rejects the records
+        """
+        response = self._request('/score', {'records': records if isinstance(records, list) else [records]})
+        return np.array([p['win_probability'] for p in response['predictions']])
+
+    def schema(self) -> Dict:
+        return self._request('/schema')
+
+    def metrics(self) -> Dict[str, float]:
+        return self._request('/metrics')
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m sales_playbook.scoring_server',
+                                     description='Serve deal-win probabilities over HTTP')
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch', type=int, default=512)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+
+    args = parser.parse_args(argv)
+    server = ScoringServer(DealWinModel.load(args.model), args.host, args.port,
+                           max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    print(f"Scoring {args.model} (schema {server.model.schema_hash}) on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+
+
+if __name__ == '__main__':
+    main()
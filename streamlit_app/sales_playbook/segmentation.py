@@ -0,0 +1,368 @@
+"""
+KMeans segmentation sweep with a model cache.
+
+The notebooks draw the elbow curve by fitting KMeans from scratch for
+k = 1..39 one after another and then fit the chosen K values again. Here
+the sweep warm-starts every k from the fit below it: the k-1 centroids
+plus one new center drawn by k-means++ on the residuals (squared distance
+to the nearest existing centroid), refined by a single Lloyd run instead
+of a fresh k-means++ initialisation. Most centroids barely move between neighbouring
+k, so each fit converges in a few iterations. The sampled silhouette
+scores, the expensive part, are computed in parallel afterwards. The
+sweep records inertia, silhouette and fit time for each k. Fitted models
+are cached by (feature-set hash, k), so the chosen K is taken from the
+sweep instead of being refitted, and re-running with the same features
+costs nothing. warm_start=False fits every k independently (in parallel),
+and minibatch=True uses MiniBatchKMeans for large feature sets.
+
+SegmentModel persists the scaler statistics and the centroids of the
+chosen K values, so the dashboard assigns new companies by a vectorized
+nearest-centroid lookup instead of rerunning the clustering.
+"""
+
+import hashlib
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_SEGMENT_MODEL_PATH = os.path.join('models', 'segments.joblib')
+
+# Bumped whenever the saved SegmentModel layout changes
+_FORMAT_VERSION = 1
+
+# Fitted models shared by every sweep in the process: (feature-set hash, k) -> (model, stats)
+_CACHE: Dict[Tuple[str, int], Tuple[KMeans, Dict[str, float]]] = {}
+
+
+def feature_hash(X: np.ndarray, columns: Optional[Sequence[str]] = None) -> str:
+    """
+    Stable hash of a feature matrix and its column names.
+
+    Args:
+        X (np.ndarray): Feature matrix
+        columns (Sequence[str], optional): Feature names
+
+    Returns:
+        str: 16-character hex digest
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    digest = hashlib.sha256()
+    digest.update(repr((X.shape, list(columns) if columns is not None else None)).encode())
+    digest.update(X.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _grow_centers(X: np.ndarray, centers: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Extend centers to k rows by k-means++ sampling on the residuals.
+
+    Each new center is a row drawn with probability proportional to its
+    squared distance to the nearest existing center.
+    """
+    centers = list(centers)
+    closest = np.full(len(X), np.inf)
+    for center in centers:
+        closest = np.minimum(closest, ((X - center) ** 2).sum(axis=1))
+    while len(centers) < k:
+        total = closest.sum()
+        if total > 0:
+            new = X[rng.choice(len(X), p=closest / total)]
+        else:
+            # Every row already sits on a center
+            new = X[rng.integers(len(X))]
+        centers.append(new)
+        closest = np.minimum(closest, ((X - new) ** 2).sum(axis=1))
+    return np.asarray(centers)
+
+
+def _fit_k(X: np.ndarray,
+           k: int,
+           minibatch: bool,
+           random_state: int,
+           init: Optional[np.ndarray] = None) -> Tuple[KMeans, Dict[str, float]]:
+    """Fit one k, from k-means++ restarts or from init centers (a single run)."""
+    start = time.perf_counter()
+    estimator = MiniBatchKMeans if minibatch else KMeans
+    if init is None:
+        model = estimator(n_clusters=k, random_state=random_state, n_init='auto')
+    else:
+        model = estimator(n_clusters=k, random_state=random_state, init=init, n_init=1)
+    model.fit(X)
+    seconds = time.perf_counter() - start
+    return model, {'inertia': float(model.inertia_), 'fit_seconds': seconds}
+
+
+def _silhouette(X: np.ndarray, labels: np.ndarray, sample: int, random_state: int) -> float:
+    if not 1 < len(np.unique(labels)) < len(X):
+        return np.nan
+    return float(silhouette_score(X, labels, sample_size=min(sample, len(X)), random_state=random_state))
+
+
+class SegmentationSweep:
+    """
+    KMeans fits over a range of k on one feature set, cached by (hash, k).
+    """
+
+    def __init__(self,
+                 X,
+                 columns: Optional[Sequence[str]] = None,
+                 random_state: int = 42,
+                 minibatch: bool = False,
+                 warm_start: bool = True,
+                 silhouette_sample: int = 2000,
+                 n_jobs: int = -1,
+                 cache_dir: Optional[str] = None):
+        """
+        Initialize a sweep over a standardized feature matrix.
+
+        Args:
+            X: Feature matrix (array or DataFrame)
+            columns (Sequence[str], optional): Feature names; taken from X
+                when it is a DataFrame
+            random_state (int): Seed for KMeans and the silhouette sample
+            minibatch (bool): Use MiniBatchKMeans instead of KMeans
+            warm_start (bool): Seed each k from the nearest smaller fitted k
+                instead of fitting it from scratch
+            silhouette_sample (int): Rows sampled for the silhouette score
+            n_jobs (int): Parallel fits
+            cache_dir (str, optional): Also persist fitted models here
+        """
+        if columns is None and isinstance(X, pd.DataFrame):
+            columns = list(X.columns)
+        self.X = np.ascontiguousarray(np.asarray(X, dtype=np.float64))
+        self.columns = list(columns) if columns is not None else None
+        self.random_state = random_state
+        self.minibatch = minibatch
+        self.warm_start = warm_start
+        self.silhouette_sample = silhouette_sample
+        self.n_jobs = n_jobs
+        self.cache_dir = cache_dir
+
+        # Fit settings are part of the feature-set key so different sweeps never share models
+        settings = (f"{'minibatch' if minibatch else 'kmeans'}{'-warm' if warm_start else ''}"
+                    f"-{random_state}-{silhouette_sample}")
+        self.key = f"{feature_hash(self.X, self.columns)}-{settings}"
+
+    def _cache_path(self, k: int) -> Optional[str]:
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, f"{self.key}-k{k}.joblib")
+
+    def _cached(self, k: int) -> Optional[Tuple[KMeans, Dict[str, float]]]:
+        entry = _CACHE.get((self.key, k))
+        path = self._cache_path(k)
+        if entry is None and path is not None and os.path.exists(path):
+            entry = joblib.load(path)
+            _CACHE[(self.key, k)] = entry
+        return entry
+
+    def _store(self, k: int, entry: Tuple[KMeans, Dict[str, float]]) -> None:
+        _CACHE[(self.key, k)] = entry
+        path = self._cache_path(k)
+        if path is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            joblib.dump(entry, path)
+
+    def run(self, k_range: Iterable[int]) -> pd.DataFrame:
+        """
+        Fit (or fetch) every k and report the elbow / silhouette statistics.
+
+        Args:
+            k_range (Iterable[int]): Cluster counts to evaluate
+
+        Returns:
+            pd.DataFrame: Indexed by k with 'inertia', 'silhouette',
+                'fit_seconds' and 'cached' columns
+        """
+        ks = [int(k) for k in k_range]
+        cached = {k: self._cached(k) is not None for k in ks}
+        missing = [k for k in ks if not cached[k]]
+
+        missing = sorted(missing)
+        if self.warm_start:
+            # Each k seeds the next, so the fits run in order of k
+            fitted = {}
+            for k in missing:
+                fitted[k] = self._fit(k, fitted)
+        else:
+            fitted = dict(zip(missing, Parallel(n_jobs=self.n_jobs)(
+                delayed(_fit_k)(self.X, k, self.minibatch, self.random_state) for k in missing
+            )))
+        scores = Parallel(n_jobs=self.n_jobs)(
+            delayed(_silhouette)(self.X, fitted[k][0].labels_, self.silhouette_sample, self.random_state)
+            for k in missing
+        )
+        for k, silhouette in zip(missing, scores):
+            model, stats = fitted[k]
+            self._store(k, (model, dict(stats, silhouette=silhouette)))
+
+        rows = [dict(self._cached(k)[1], cached=cached[k]) for k in ks]
+        return pd.DataFrame(rows, index=pd.Index(ks, name='k'))
+
+    def model(self, k: int) -> KMeans:
+        """
+        Fitted model for k, from the cache when the sweep already covered it.
+
+        Args:
+            k (int): Number of clusters
+
+        Returns:
+            KMeans: Fitted model
+        """
+        entry = self._cached(k)
+        if entry is None:
+            model, stats = self._fit(k, {}) if self.warm_start else _fit_k(self.X, k, self.minibatch, self.random_state)
+            silhouette = _silhouette(self.X, model.labels_, self.silhouette_sample, self.random_state)
+            entry = (model, dict(stats, silhouette=silhouette))
+            self._store(k, entry)
+        return entry[0]
+
+    def _fit(self, k: int, fitted: Dict[int, Tuple[KMeans, Dict[str, float]]]) -> Tuple[KMeans, Dict[str, float]]:
+        """Fit k warm-started from the largest smaller k in fitted or the cache."""
+        for j in range(min(k, len(self.X)) - 1, 0, -1):
+            seed = fitted.get(j) or self._cached(j)
+            if seed is not None:
+                rng = np.random.default_rng([self.random_state, k])
+                init = _grow_centers(self.X, seed[0].cluster_centers_, k, rng)
+                return _fit_k(self.X, k, self.minibatch, self.random_state, init=init)
+        return _fit_k(self.X, k, self.minibatch, self.random_state)
+
+    def labels(self, k: int) -> np.ndarray:
+        """Cluster label of every row for k."""
+        return self.model(k).labels_
+
+
+def clear_cache() -> None:
+    """Drop every in-memory model (persisted cache_dir files are kept)."""
+    _CACHE.clear()
+
+
+class SegmentModel:
+    """
+    Persisted scaler statistics and KMeans centroids for nearest-centroid assignment.
+    """
+
+    def __init__(self,
+                 features: Sequence[str],
+                 mean: np.ndarray,
+                 scale: np.ndarray,
+                 centroids: Dict[int, np.ndarray]):
+        """
+        Initialize from fitted arrays.
+
+        Args:
+            features (Sequence[str]): Input columns, in scaler order
+            mean (np.ndarray): Per-feature mean removed by the scaler
+            scale (np.ndarray): Per-feature scale applied by the scaler
+            centroids (Dict[int, np.ndarray]): K -> (K x n_features) centroids
+                in the scaled space
+        """
+        self.features = list(features)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.centroids = {int(k): np.asarray(c, dtype=np.float64) for k, c in centroids.items()}
+        # ||c||^2 per centroid, reused by every assignment
+        self._norms = {k: np.einsum('ij,ij->i', c, c) for k, c in self.centroids.items()}
+
+    @property
+    def ks(self) -> List[int]:
+        return sorted(self.centroids)
+
+    @classmethod
+    def from_sweep(cls, sweep: SegmentationSweep, scaler, ks: Iterable[int]) -> 'SegmentModel':
+        """
+        Collect the centroids of the chosen K values from a sweep.
+
+        Args:
+            sweep (SegmentationSweep): Sweep over scaler-transformed features
+            scaler: Fitted StandardScaler that produced the sweep's input
+            ks (Iterable[int]): K values to keep
+
+        Returns:
+            SegmentModel: Model ready to save
+        """
+        if sweep.columns is None:
+            raise ValueError("The sweep needs column names to build a SegmentModel")
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(len(sweep.columns))
+        centroids = {k: sweep.model(k).cluster_centers_ for k in ks}
+        return cls(sweep.columns, scaler.mean_, scale, centroids)
+
+    def _scaled(self, frame: pd.DataFrame) -> np.ndarray:
+        missing = [col for col in self.features if col not in frame.columns]
+        if missing:
+            raise ValueError(f"Frame is missing {len(missing)} segment feature(s): {missing[:5]}")
+        X = frame[self.features].to_numpy(dtype=np.float64)
+        Z = (X - self.mean) / self.scale
+        # A missing value sits at the feature mean, i.e. 0 after scaling
+        return np.nan_to_num(Z, nan=0.0)
+
+    def assign(self, frame: pd.DataFrame, k: int) -> np.ndarray:
+        """
+        Nearest-centroid segment for every row, as KMeans.predict would give.
+
+        Args:
+            frame (pd.DataFrame): Rows with every feature column
+            k (int): One of ks
+
+        Returns:
+            np.ndarray: int32 segment labels in row order
+        """
+        if k not in self.centroids:
+            raise KeyError(f"No centroids saved for K={k}; available: {self.ks}")
+        Z = self._scaled(frame)
+        # argmin ||z - c||^2 = argmin (||c||^2 - 2 z.c); ||z||^2 is the same for every centroid
+        distances = self._norms[k] - 2.0 * (Z @ self.centroids[k].T)
+        return distances.argmin(axis=1).astype(np.int32)
+
+    def assign_all(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Segment labels for every saved K.
+
+        Args:
+            frame (pd.DataFrame): Rows with every feature column
+
+        Returns:
+            pd.DataFrame: 'Cluster_K<k>' columns indexed like frame
+        """
+        return pd.DataFrame({f'Cluster_K{k}': self.assign(frame, k) for k in self.ks}, index=frame.index)
+
+    def save(self, path: str = DEFAULT_SEGMENT_MODEL_PATH) -> None:
+        """
+        Save the scaler statistics and centroids with joblib.
+
+        Args:
+            path (str): Output file (parent directories are created)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        joblib.dump({
+            'format_version': _FORMAT_VERSION,
+            'features': self.features,
+            'mean': self.mean,
+            'scale': self.scale,
+            'centroids': self.centroids,
+        }, path)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_SEGMENT_MODEL_PATH) -> 'SegmentModel':
+        """
+        Load a model written by save().
+
+        Args:
+            path (str): Saved model file
+
+        Returns:
+            SegmentModel: Model ready to assign segments
+        """
+        state = joblib.load(path)
+        if state.get('format_version') != _FORMAT_VERSION:
+            raise ValueError(f"{path} was saved in an unsupported format; refit the segments")
+        return cls(state['features'], state['mean'], state['scale'], state['centroids'])
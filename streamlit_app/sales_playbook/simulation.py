@@ -0,0 +1,226 @@
+"""
+Monte Carlo revenue simulation over the open pipeline.
+
+Every open deal either closes (with its win probability, optionally scaled
+per deal type or stage) or is lost, and a won deal may slip past its close
+month. Scenarios are drawn as one NumPy batch per block of deals rather than
+per deal: a single uniform u per (scenario, deal) decides both outcomes,
+because u < p is the win and, given a win, u / p is again uniform and picks
+the slip. Comparing u against the cumulative thresholds p * C_j and
+multiplying the 0/1 matrices by (deal x month) amount matrices accumulates
+monthly revenue with BLAS, so the cost is a few passes over
+scenarios x deals and memory stays bounded by the block size. Blocks have
+their own seeded streams and run on a thread pool.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from typing import Dict, Optional, Sequence
+
+# Deal Type one-hot columns in the cleaned deals data
+DEAL_TYPE_PREFIX = 'Deal Type_'
+
+# Scenario x deal cells per block (float32 draws plus the 0/1 matrix: ~8 bytes per cell)
+_BLOCK_CELLS = 1 << 24
+
+# Per-thread draw / hit buffers, reused across blocks
+_BUFFERS = threading.local()
+
+
+def open_deals(deals: pd.DataFrame) -> pd.DataFrame:
+    """Deals that are neither closed won nor closed lost."""
+    won = deals['Is Closed Won'].fillna(0) == 1 if 'Is Closed Won' in deals.columns else False
+    lost = deals['Is closed lost'].fillna(0) == 1 if 'Is closed lost' in deals.columns else False
+    return deals[~(won | lost)]
+
+
+def deal_types(deals: pd.DataFrame) -> pd.Series:
+    """
+    Deal Type label per deal from the one-hot columns.
+
+    Args:
+        deals (pd.DataFrame): Deals with 'Deal Type_' columns
+
+    Returns:
+        pd.Series: e.g. 'New', 'PS', 'Renewal'; 'Other' when no flag is set
+    """
+    columns = [col for col in deals.columns if col.startswith(DEAL_TYPE_PREFIX)]
+    if not columns:
+        return pd.Series('Other', index=deals.index)
+    flags = deals[columns].fillna(0).to_numpy() != 0
+    labels = np.array([col[len(DEAL_TYPE_PREFIX):] for col in columns] + ['Other'], dtype=object)
+    first = np.where(flags.any(axis=1), flags.argmax(axis=1), len(columns))
+    return pd.Series(labels[first], index=deals.index)
+
+
+def slip_distribution(slip_probability: float, max_slip_months: int) -> np.ndarray:
+    """
+    P(a won deal closes k months late) for k = 0..max_slip_months.
+
+    Each month a deal slips one more month with slip_probability; deals
+    still slipping at max_slip_months close then.
+    """
+    if not 0.0 <= slip_probability <= 1.0:
+        raise ValueError("slip_probability must be between 0 and 1")
+    k = np.arange(max_slip_months + 1)
+    probabilities = (1.0 - slip_probability) * slip_probability ** k
+    probabilities[-1] = slip_probability ** max_slip_months
+    return probabilities
+
+
+def _simulate_block(seed: np.random.SeedSequence,
+                    probability: np.ndarray,
+                    amount: np.ndarray,
+                    offset: np.ndarray,
+                    cumulative: np.ndarray,
+                    n_scenarios: int,
+                    n_columns: int) -> np.ndarray:
+    """Revenue per (scenario, month column) from one block of deals."""
+    cells = n_scenarios * len(amount)
+    if getattr(_BUFFERS, 'draws', None) is None or _BUFFERS.draws.size < cells:
+        _BUFFERS.draws = np.empty(cells, dtype=np.float32)
+        _BUFFERS.hits = np.empty(cells, dtype=np.float32)
+    u = _BUFFERS.draws[:cells].reshape(n_scenarios, len(amount))
+    won = _BUFFERS.hits[:cells].reshape(u.shape)
+    np.random.default_rng(seed).random(out=u, dtype=np.float32)
+
+    revenue = np.zeros((n_scenarios, n_columns), dtype=np.float64)
+    rows = np.arange(len(amount))
+    for j, level in enumerate(cumulative):
+        # Amount lands in month offset + j for "slips <= j" and leaves it again for "slips <= j + 1"
+        weights = np.zeros((len(amount), n_columns), dtype=np.float32)
+        weights[rows, offset + j] += amount
+        if j + 1 < len(cumulative):
+            weights[rows, offset + j + 1] -= amount
+        np.less(u, (probability * level).astype(np.float32), out=won, casting='unsafe')
+        revenue += won @ weights
+    return revenue
+
+
+class SimulationResult:
+    """
+    Simulated revenue per scenario and month.
+    """
+
+    def __init__(self, months: pd.PeriodIndex, revenue: np.ndarray):
+        """
+        Initialize from simulated arrays.
+
+        Args:
+            months (pd.PeriodIndex): Monthly periods, one per revenue column
+            revenue (np.ndarray): (scenarios x months) simulated revenue
+        """
+        self.months = months
+        self.revenue = revenue
+
+    @property
+    def n_scenarios(self) -> int:
+        return self.revenue.shape[0]
+
+    def quantiles(self, qs: Sequence[float] = (0.1, 0.5, 0.9)) -> pd.DataFrame:
+        """
+        Revenue percentiles per month.
+
+        Args:
+            qs (Sequence[float]): Quantiles to report
+
+        Returns:
+            pd.DataFrame: Indexed by month with 'P10', 'P50', 'P90' (one
+                column per quantile) and 'Mean'
+        """
+        values = np.quantile(self.revenue, qs, axis=0)
+        frame = pd.DataFrame(values.T, index=self.months, columns=[f'P{round(q * 100)}' for q in qs])
+        frame['Mean'] = self.revenue.mean(axis=0)
+        frame.index.name = 'Month'
+        return frame
+
+    def total(self) -> np.ndarray:
+        """Total revenue over the horizon, one value per scenario."""
+        return self.revenue.sum(axis=1)
+
+
+def simulate_pipeline(deals: pd.DataFrame,
+                      n_scenarios: int = 10000,
+                      probability_column: str = 'Deal probability',
+                      months: int = 12,
+                      start=None,
+                      slip_probability: float = 0.25,
+                      max_slip_months: int = 3,
+                      type_uplift: Optional[Dict[str, float]] = None,
+                      stage_uplift: Optional[Dict] = None,
+                      random_state: Optional[int] = 42,
+                      block_cells: int = _BLOCK_CELLS,
+                      n_jobs: int = -1) -> SimulationResult:
+    """
+    Simulate monthly closed revenue from the open deals.
+
+    A deal's base month is its 'Close Date' (or 'Create Date' plus 'Days to
+    close' when that is missing); overdue deals are due in the start month.
+    Revenue landing after the horizon is dropped.
+
+    Args:
+        deals (pd.DataFrame): Deals with 'Amount', probability_column and
+            'Close Date'; closed deals are ignored
+        n_scenarios (int): Scenarios to draw
+        probability_column (str): Win probability per deal, e.g.
+            'Deal probability' or the model's 'Win probability'
+        months (int): Horizon in months
+        start: First month (anything pd.Period accepts); defaults to the
+            current month
+        slip_probability (float): Monthly chance that a won deal slips again
+        max_slip_months (int): Longest slip
+        type_uplift (Dict[str, float], optional): Deal Type -> win-probability
+            multiplier, e.g. {'Renewal': 1.1}
+        stage_uplift (Dict, optional): Deal Stage -> win-probability multiplier
+        random_state (int, optional): Seed
+        block_cells (int): Scenario x deal cells drawn per block
+        n_jobs (int): Threads simulating blocks in parallel
+
+    Returns:
+        SimulationResult: Revenue per scenario and month
+    """
+    start = pd.Period(pd.Timestamp.today() if start is None else start, freq='M')
+    periods = pd.period_range(start, periods=months, freq='M')
+    revenue = np.zeros((n_scenarios, months + max_slip_months), dtype=np.float64)
+
+    pipeline = open_deals(deals)
+    probability = pipeline[probability_column].fillna(0).to_numpy(dtype=np.float64)
+    if type_uplift:
+        probability = probability * deal_types(pipeline).map(type_uplift).fillna(1.0).to_numpy(dtype=np.float64)
+    if stage_uplift and 'Deal Stage' in pipeline.columns:
+        probability = probability * pipeline['Deal Stage'].map(stage_uplift).fillna(1.0).to_numpy(dtype=np.float64)
+    probability = np.clip(probability, 0.0, 1.0)
+
+    close = pd.to_datetime(pipeline['Close Date'], errors='coerce')
+    if 'Create Date' in pipeline.columns and 'Days to close' in pipeline.columns:
+        expected = (pd.to_datetime(pipeline['Create Date'], errors='coerce')
+                    + pd.to_timedelta(pipeline['Days to close'], unit='D'))
+        close = close.fillna(expected)
+    close_month = close.dt.year.to_numpy() * 12 + close.dt.month.to_numpy() - 1
+    offset = np.maximum(close_month - (start.year * 12 + start.month - 1), 0)
+    amount = pipeline['Amount'].fillna(0).to_numpy(dtype=np.float64)
+
+    # Deals that can never add revenue inside the horizon are not simulated
+    live = (probability > 0) & (amount != 0) & (offset < months) & close.notna().to_numpy()
+    probability, amount, offset = probability[live], amount[live], offset[live].astype(np.int64)
+
+    # u < p * C_j  <=>  the deal is won and slips at most j months
+    cumulative = np.cumsum(slip_distribution(slip_probability, max_slip_months))
+    cumulative[-1] = 1.0
+    block = max(1, block_cells // max(n_scenarios, 1))
+    starts = range(0, len(amount), block)
+    # One seed per block, so results do not depend on n_jobs
+    seeds = np.random.SeedSequence(random_state).spawn(len(starts))
+    # NumPy releases the GIL in the draws, comparisons and BLAS, so threads scale
+    partials = Parallel(n_jobs=n_jobs, prefer='threads')(
+        delayed(_simulate_block)(seed, probability[begin:begin + block], amount[begin:begin + block],
+                                 offset[begin:begin + block], cumulative, n_scenarios, revenue.shape[1])
+        for seed, begin in zip(seeds, starts)
+    )
+    for partial in partials:
+        revenue += partial
+
+    return SimulationResult(periods, revenue[:, :months])